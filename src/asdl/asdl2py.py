@@ -16,22 +16,59 @@ from dataclasses import dataclass
 PRELUDE = """
 type optional[T] = T | None
 
-@dataclass(frozen=True)
-class Ident:
-    name: str
+{ident}
 
 type ident = Ident
 type string = str
 """
 
+IDENT = """
+@dataclass({identArgs})
+class Ident:
+    name: str
+"""
+
+INTERNED_IDENT = """
+@dataclass({identArgs}, eq=False)
+class Ident:
+    \"\"\"
+    Identifiers are interned: Ident(name) always returns the same object for the same name.
+    Thus, comparing identifiers is mostly an identity check.
+    \"\"\"
+    name: str
+    def __new__(cls, name: str) -> Ident:
+        x = _identTable.get(name)
+        if x is None:
+            x = object.__new__(cls)
+            _identTable[name] = x
+        return x
+    def __eq__(self, other: object) -> bool:
+        return self is other or (isinstance(other, Ident) and self.name == other.name)
+    def __hash__(self) -> int:
+        return hash(self.name)
+    def __reduce__(self) -> tuple[type[Ident], tuple[str]]:
+        return (Ident, (self.name,))
+
+_identTable: dict[str, Ident] = {{}}
+"""
+
 def abort(msg: str):
     sys.stderr.write(f'ERROR: {msg}\n')
     sys.exit(1)
 
+def dataclassArgs(frozen: bool, slots: bool) -> str:
+    args = []
+    if frozen:
+        args.append('frozen=True')
+    if slots:
+        args.append('slots=True')
+    return ', '.join(args)
+
 @dataclass
 class Record:
     name: str
     fields: list[tuple[str, str, Optional[str]]]
+    slots: bool = False
     def generate(self):
         fs = []
         for (name, ty, default) in self.fields:
@@ -40,7 +77,8 @@ class Record:
             else:
                 fs.append(f'    {name}: {ty}')
         fsStr = '\n'.join(fs) if fs else '    pass'
-        return f"""@dataclass
+        decorator = f'@dataclass({dataclassArgs(False, True)})' if self.slots else '@dataclass'
+        return f"""{decorator}
 class {self.name}:
 {fsStr}
 """
@@ -59,7 +97,9 @@ class Union:
             return f'type {self.name} = {" | ".join(self.alternatives)}'
 
 class Output:
-    def __init__(self):
+    def __init__(self, slots: bool = False, intern: bool = False):
+        self.slots = slots
+        self.intern = intern
         self.defs = []
     def append(self, d):
         self.defs.append(d)
@@ -68,12 +108,15 @@ class Output:
         if commonModule:
             l.append(f'from {commonModule} import *')
         else:
-            l.append(PRELUDE.strip())
+            ident = INTERNED_IDENT if self.intern else IDENT
+            ident = ident.strip().format(identArgs=dataclassArgs(True, self.slots))
+            l.append(PRELUDE.strip().format(ident=ident))
         for d in self.defs:
             l.append(d.generate().strip())
         return '\n\n'.join(l)
 
-def generateCodeForConstructor(c: asdl.Constructor, attrs: list[asdl.Field], allTypes: set[str]) -> Record:
+def generateCodeForConstructor(c: asdl.Constructor, attrs: list[asdl.Field], allTypes: set[str],
+                               slots: bool) -> Record:
     fields = []
     inputFields = c.fields + attrs
     for i, f in enumerate(inputFields):
@@ -92,7 +135,7 @@ def generateCodeForConstructor(c: asdl.Constructor, attrs: list[asdl.Field], all
             ty = f.type
         name = f.name if f.name else f.type
         fields.append((name, ty, default))
-    return Record(c.name, fields)
+    return Record(c.name, fields, slots)
 
 asdl.Product.__match_args__ = ('fields', 'attributes')
 asdl.Sum.__match_args__ = ('types', 'attributes')
@@ -106,7 +149,7 @@ def generateCode(mod: asdl.Module, out: Output):
             case asdl.Sum(constructors, attrs):
                 alternatives = []
                 for c in constructors:
-                    d = generateCodeForConstructor(c, attrs, allTypes)
+                    d = generateCodeForConstructor(c, attrs, allTypes, out.slots)
                     out.append(d)
                     alternatives.append(c.name)
                 out.append(Union(ty.name, alternatives))
@@ -119,6 +162,12 @@ def parseArgs():
     parser.add_argument('inputFile')
     parser.add_argument('--out', required=False)
     parser.add_argument('--common', required=False)
+    parser.add_argument('--slots', action='store_true',
+                        help='Generate classes with __slots__. Instances need less memory and ' \
+                            'attribute access is faster, but no attributes other than the fields ' \
+                            'can be set.')
+    parser.add_argument('--intern', action='store_true',
+                        help='Intern identifiers, Ident(x) returns the same object for equal x')
     return parser.parse_args()
 
 def writeFile(filename: str, content: str):
@@ -132,12 +181,13 @@ def writeFile(filename: str, content: str):
         ts = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         f.write(f' ({ts})\n')
         f.write(content)
+        f.write('\n')
 
 def main():
     args = parseArgs()
     print(f'Parsing {args.inputFile}')
     mod = asdl.parse(args.inputFile)
-    out = Output()
+    out = Output(args.slots, args.intern)
     generateCode(mod, out)
     s = out.generate(args.common)
     if args.out:
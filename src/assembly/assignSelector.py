@@ -0,0 +1,97 @@
+"""
+A table-driven instruction selector for TACspill assign instructions.
+
+Every assign instruction is classified by a key (operator name, kind of the left operand,
+kind of the right operand), where the kind of an operand is 'C' for a constant and 'N' for
+a name. The operator name is None for an assignment without an operator. A single
+dictionary lookup with this key yields the function emitting the MIPS code.
+"""
+
+import assembly.tacSpill_ast as tacSpill
+import assembly.mips_ast as mips
+from typing import *
+from assembly.mipsHelper import *
+
+type Kind = Literal['C', 'N']
+type PatternKey = tuple[Optional[str], Kind, Optional[Kind]]
+# Emits the code for target := left op right (right is None if there is no operator)
+type Emit = Callable[[mips.reg, tacSpill.prim, Optional[tacSpill.prim]], list[mips.instr]]
+
+MIPS_OPS: dict[str, mips.op] = {
+    'ADD': mips.Add(),
+    'SUB': mips.Sub(),
+    'MUL': mips.Mul(),
+    'LT_S': mips.Less(),
+    'LE_S': mips.LessEq(),
+    'GT_S': mips.Greater(),
+    'GE_S': mips.GreaterEq(),
+    'EQ': mips.Eq(),
+    'NE': mips.NotEq()
+}
+
+# Operators with a variant taking an immediate right operand
+MIPS_OPS_I: dict[str, mips.opI] = {
+    'ADD': mips.AddI(),
+    'LT_S': mips.LessI()
+}
+
+def _kind(p: tacSpill.prim) -> Kind:
+    match p:
+        case tacSpill.Const(_): return 'C'
+        case tacSpill.Name(_): return 'N'
+
+def _const(p: Optional[tacSpill.prim]) -> int:
+    match p:
+        case tacSpill.Const(n): return n
+        case _: raise ValueError(f'Expected constant, got {p}')
+
+def _reg(p: Optional[tacSpill.prim]) -> mips.reg:
+    match p:
+        case tacSpill.Name(x): return reg(x)
+        case _: raise ValueError(f'Expected name, got {p}')
+
+def _opNN(op: mips.op) -> Emit:
+    return lambda x, l, r: [mips.Op(op, x, _reg(l), _reg(r))]
+
+def _opNI(op: mips.opI) -> Emit:
+    return lambda x, l, r: [mips.OpI(op, x, _reg(l), imm(_const(r)))]
+
+def _opNC(op: mips.op) -> Emit:
+    return lambda x, l, r: [mips.LoadI(Regs.t2, imm(_const(r))), mips.Op(op, x, _reg(l), Regs.t2)]
+
+def _opCN(op: mips.op) -> Emit:
+    return lambda x, l, r: [mips.LoadI(Regs.t2, imm(_const(l))), mips.Op(op, x, Regs.t2, _reg(r))]
+
+def _opCC(op: mips.op) -> Emit:
+    # x is overwritten anyway, so we can use it as the second temporary register
+    return lambda x, l, r: [mips.LoadI(Regs.t2, imm(_const(l))), mips.LoadI(x, imm(_const(r))),
+                            mips.Op(op, x, Regs.t2, x)]
+
+def _mkPatterns() -> dict[PatternKey, Emit]:
+    t: dict[PatternKey, Emit] = {
+        (None, 'C', None): lambda x, l, _r: [mips.LoadI(x, imm(_const(l)))],
+        (None, 'N', None): lambda x, l, _r: [mips.Move(x, _reg(l))]
+    }
+    for name, op in MIPS_OPS.items():
+        t[(name, 'N', 'N')] = _opNN(op)
+        t[(name, 'C', 'N')] = _opCN(op)
+        t[(name, 'C', 'C')] = _opCC(op)
+        opI = MIPS_OPS_I.get(name)
+        t[(name, 'N', 'C')] = _opNI(opI) if opI is not None else _opNC(op)
+    return t
+
+PATTERNS = _mkPatterns()
+
+def assignToMips(i: tacSpill.Assign) -> list[mips.instr]:
+    key: PatternKey
+    right: Optional[tacSpill.prim] = None
+    match i.right:
+        case tacSpill.Prim(left):
+            key = (None, _kind(left), None)
+        case tacSpill.BinOp(left, op, r):
+            right = r
+            key = (op.name, _kind(left), _kind(r))
+    emit = PATTERNS.get(key)
+    if emit is None:
+        raise ValueError(f'No instruction selection pattern for {i}')
+    return emit(reg(i.var), left, right)
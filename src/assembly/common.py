@@ -9,6 +9,7 @@ import assembly.tac_ast as tac
 import assembly.tacSpill_ast as tacSpill
 import assembly.tacPretty as tacPretty
 from assembly.graph import Graph
+from assembly.interfGraph import InterfGraph
 
 @dataclass
 class BasicBlock:
@@ -26,8 +27,25 @@ class BasicBlock:
         return f'BasicBlock({self.index}, {self.labels}, {instrs})'
 
 
-type ControlFlowGraph = Graph[int, BasicBlock]
-type InterfGraph = Graph[tac.ident, None]
+class ControlFlowGraph(Graph[int, BasicBlock]):
+    """
+    A directed graph of basic blocks. In addition to the successors, it records
+    the predecessors of every block.
+    """
+    def __init__(self):
+        super().__init__('directed')
+        self.__preds: dict[int, list[int]] = {}
+    def addEdge(self, src: int, tgt: int):
+        super().addEdge(src, tgt)
+        l = self.__preds.setdefault(tgt, [])
+        if src not in l:
+            l.append(src)
+    def preds(self, v: int) -> list[int]:
+        """
+        Given a vertex v, returns all vertices w such that there exists an edge
+        from w to v.
+        """
+        return self.__preds.get(v, [])
 
 class RegisterMap(Protocol):
     def resolve(self, x: tac.ident) -> Optional[tacSpill.ident]:
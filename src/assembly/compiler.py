@@ -7,7 +7,7 @@ from typing import *
 from assembly.common import *
 from common.compilerSupport import *
 from assembly.tacToTacSpill import tacToTacSpill
-from assembly.tacSpillToMips import tacSpillToMips
+from assembly.tacSpillToMips import tacSpillToMips, DEFAULT_ASSIGN_SELECTOR
 from assembly.tac_ast import *
 import common.utils as utils
 import common.log as log
@@ -32,14 +32,14 @@ MIPS_END = """
   syscall
 """
 
-def compileFile(args: genCompiler.Args):
+def compileFile(args: genCompiler.Args, selector: str = DEFAULT_ASSIGN_SELECTOR):
     log.info(f'Compiling {args.input} to assembly file {args.output}, args={args}')
     tacInstrs = loopToTac(args)
-    log.debug('TAC:\n' + tacPretty.prettyInstrs(tacInstrs))
+    log.debugLazy(lambda: 'TAC:\n' + tacPretty.prettyInstrs(tacInstrs))
     maxRegs = args.maxRegisters if args.maxRegisters is not None else MAX_REGISTERS
     tacSpillInstrs = tacToTacSpill(tacInstrs, maxRegs)
-    log.debug('TAC spill:\n' + tacSpillPretty.prettyInstrs(tacSpillInstrs))
-    mipsInstrs = tacSpillToMips(tacSpillInstrs)
+    log.debugLazy(lambda: 'TAC spill:\n' + tacSpillPretty.prettyInstrs(tacSpillInstrs))
+    mipsInstrs = tacSpillToMips(tacSpillInstrs, selector)
     s = mipsPretty.mipsPretty(mipsInstrs)
     utils.writeTextFile(args.output, MIPS_START + s + MIPS_END)
     log.info(f'Wrote assembly file {args.output}')
@@ -8,47 +8,40 @@ from typing import *
 from assembly.common import *
 import common.log as log
 
-def _firstBasicBlock(instrs: list[tac.instr], blockIdx: int) -> tuple[BasicBlock, list[tac.instr]]:
-    # First, strip off all labels
-    labels: list[str] = []
-    firstNonLabelIdx = 0
-    for idx, instr in enumerate(instrs):
-        if not isinstance(instr, tac.Label):
-            firstNonLabelIdx = idx
-            break
-        else:
-            labels.append(instr.label)
-    else:
-        # only labels or no instructions at all
-        return (BasicBlock(blockIdx, labels, []), [])
-    instrs = instrs[firstNonLabelIdx:]
-    # Now find the first instruction that is a jump or a label
-    firstJumpOrLabelIdx = 0
-    for idx, instr in enumerate(instrs):
-        if not isinstance(instr, tac.Assign) and not isinstance(instr, tac.Call):
-            firstJumpOrLabelIdx = idx
-            break
-    else:
-        # instrs only contains assign or calls
-        return (BasicBlock(blockIdx, labels, instrs), [])
-    # idx is the index of the first instruction that is a jump or a label.
-    offset = 0 if isinstance(instrs[firstJumpOrLabelIdx], tac.Label) else 1
-    # jumps are part of the basic block, labels not
-    basicInstrs = instrs[:firstJumpOrLabelIdx+offset]
-    rest = instrs[firstJumpOrLabelIdx+offset:]
-    return (BasicBlock(blockIdx, labels, basicInstrs), rest)
+def _basicBlocks(instrs: list[tac.instr]) -> list[BasicBlock]:
+    """
+    Splits instrs into basic blocks in a single pass. A block starts with a sequence of
+    labels (possibly empty), followed by assignments and calls, and ends before the next
+    label or with a jump (jumps are part of the block, labels are not).
+    """
+    blocks: list[BasicBlock] = []
+    n = len(instrs)
+    i = 0
+    while i < n:
+        labels: list[str] = []
+        while i < n:
+            match instrs[i]:
+                case tac.Label(l):
+                    labels.append(l)
+                    i += 1
+                case _:
+                    break
+        start = i
+        while i < n and isinstance(instrs[i], (tac.Assign, tac.Call)):
+            i += 1
+        if i < n and not isinstance(instrs[i], tac.Label):
+            i += 1 # the jump ending the block
+        blocks.append(BasicBlock(len(blocks), labels, instrs[start:i]))
+    return blocks
 
 def buildControlFlowGraph(instrs: list[tac.instr]) -> ControlFlowGraph:
-    g = Graph[int, BasicBlock]('directed')
-    idx = 0
+    g = ControlFlowGraph()
     labelToIdx: dict[str, int] = {}
-    while instrs:
-        (bb, instrs) = _firstBasicBlock(instrs, idx)
-        log.debug(f'{bb}')
-        g.addVertex(idx, bb)
+    for bb in _basicBlocks(instrs):
+        log.debugLazy(lambda: f'{bb}')
+        g.addVertex(bb.index, bb)
         for l in bb.labels:
-            labelToIdx[l] = idx
-        idx += 1
+            labelToIdx[l] = bb.index
     for bb in g.values:
         succs: list[int] = []
         match bb.last:
@@ -0,0 +1,94 @@
+"""
+This module implements the interference graph used for register allocation.
+"""
+
+from typing import *
+import assembly.tac_ast as tac
+
+class InterfGraph:
+    """
+    An undirected graph whose vertices are TAC variables.
+
+    Internally, vertices are identified by dense integer ids 0, 1, ..., in the order
+    in which they were added. Edges are stored twice:
+
+    - in a triangular bit matrix, so that interferes/hasEdge run in O(1),
+    - in adjacency lists, so that iterating over the neighbors of a vertex is fast.
+
+    The bit for the edge between i and j (with j < i) is bit i*(i-1)/2 + j. Hence, adding
+    a vertex only appends to the matrix, existing entries never move.
+    """
+    def __init__(self, vars: Iterable[tac.ident] = []):
+        self.vars: list[tac.ident] = []
+        self.__ids: dict[tac.ident, int] = {}
+        self.__matrix = bytearray()
+        self.__adj: list[list[int]] = []
+        for x in vars:
+            self.addVertex(x)
+    def __repr__(self):
+        return f'InterfGraph(vertices={len(self.vars)}, edges={self.edges})'
+    @property
+    def numVertices(self) -> int:
+        return len(self.vars)
+    def addVertex(self, x: tac.ident) -> int:
+        """
+        Adds x to the graph and returns its id.
+        """
+        if x in self.__ids:
+            raise ValueError(f'Vertex {x} already added to graph')
+        i = len(self.vars)
+        self.__ids[x] = i
+        self.vars.append(x)
+        self.__adj.append([])
+        n = i + 1
+        bytesNeeded = (n * (n - 1) // 2 + 7) // 8
+        if len(self.__matrix) < bytesNeeded:
+            self.__matrix.extend(bytes(bytesNeeded - len(self.__matrix)))
+        return i
+    def hasVertex(self, x: tac.ident) -> bool:
+        return x in self.__ids
+    def vertexId(self, x: tac.ident) -> int:
+        return self.__ids[x]
+    def addEdgeIds(self, i: int, j: int):
+        """
+        Adds an edge between the vertices with ids i and j. Self loops are ignored.
+        """
+        if i == j:
+            return
+        (hi, lo) = (i, j) if i > j else (j, i)
+        k = hi * (hi - 1) // 2 + lo
+        mask = 1 << (k & 7)
+        if self.__matrix[k >> 3] & mask:
+            return
+        self.__matrix[k >> 3] |= mask
+        self.__adj[i].append(j)
+        self.__adj[j].append(i)
+    def addEdge(self, x: tac.ident, y: tac.ident):
+        self.addEdgeIds(self.__ids[x], self.__ids[y])
+    def hasEdgeIds(self, i: int, j: int) -> bool:
+        if i == j:
+            return False
+        (hi, lo) = (i, j) if i > j else (j, i)
+        k = hi * (hi - 1) // 2 + lo
+        return bool(self.__matrix[k >> 3] & (1 << (k & 7)))
+    def interferes(self, x: tac.ident, y: tac.ident) -> bool:
+        return self.hasEdgeIds(self.__ids[x], self.__ids[y])
+    def adjIds(self, i: int) -> list[int]:
+        """
+        Returns the ids of all neighbors of the vertex with id i. The list must not be modified.
+        """
+        return self.__adj[i]
+    @property
+    def vertices(self) -> list[tac.ident]:
+        return self.vars
+    def succs(self, x: tac.ident) -> list[tac.ident]:
+        """
+        Returns all neighbors of x.
+        """
+        return [self.vars[j] for j in self.__adj[self.__ids[x]]]
+    @property
+    def edges(self) -> list[tuple[tac.ident, tac.ident]]:
+        """
+        Returns all edges of the graph, in both directions.
+        """
+        return [(x, self.vars[j]) for (x, adj) in zip(self.vars, self.__adj) for j in adj]
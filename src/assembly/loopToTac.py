@@ -19,8 +19,7 @@ def loopToTac(args: genCompiler.Args) -> list[tac.instr]:
     log.debug(f'Generating TAC from {args.input}')
     wasmMod = genCompiler.compileMain(args, c.compileModule, ast)
     wasmInstrs = wasmMod.funcs[0].instrs
-    wasmCode = sexp.renderSExp(wasmMod.render())
-    log.debug('Wasm instructions:\n' + wasmCode)
+    log.debugLazy(lambda: 'Wasm instructions:\n' + sexp.renderSExp(wasmMod.render()))
     (res, tacInstrs) = wasmToTac.wasmToTac(wasmToTac.downcast(wasmInstrs))
     if res is not None:
         raise ValueError(f'Value returned from tac.toTac is not None: {res}')
@@ -1,132 +1,150 @@
-# AUTOMATICALLY GENERATED (2024-04-03 17:32:36)
+# AUTOMATICALLY GENERATED (2026-10-18 03:18:30)
 from __future__ import annotations
 from dataclasses import dataclass
 
 type optional[T] = T | None
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True, eq=False)
 class Ident:
+    """
+    Identifiers are interned: Ident(name) always returns the same object for the same name.
+    Thus, comparing identifiers is mostly an identity check.
+    """
     name: str
+    def __new__(cls, name: str) -> Ident:
+        x = _identTable.get(name)
+        if x is None:
+            x = object.__new__(cls)
+            _identTable[name] = x
+        return x
+    def __eq__(self, other: object) -> bool:
+        return self is other or (isinstance(other, Ident) and self.name == other.name)
+    def __hash__(self) -> int:
+        return hash(self.name)
+    def __reduce__(self) -> tuple[type[Ident], tuple[str]]:
+        return (Ident, (self.name,))
+
+_identTable: dict[str, Ident] = {}
 
 type ident = Ident
 type string = str
 
-@dataclass
+@dataclass(slots=True)
 class Add:
     pass
 
-@dataclass
+@dataclass(slots=True)
 class Sub:
     pass
 
-@dataclass
+@dataclass(slots=True)
 class Mul:
     pass
 
-@dataclass
+@dataclass(slots=True)
 class Less:
     pass
 
-@dataclass
+@dataclass(slots=True)
 class LessEq:
     pass
 
-@dataclass
+@dataclass(slots=True)
 class Greater:
     pass
 
-@dataclass
+@dataclass(slots=True)
 class GreaterEq:
     pass
 
-@dataclass
+@dataclass(slots=True)
 class Eq:
     pass
 
-@dataclass
+@dataclass(slots=True)
 class NotEq:
     pass
 
 type op = Add | Sub | Mul | Less | LessEq | Greater | GreaterEq | Eq | NotEq
 
-@dataclass
+@dataclass(slots=True)
 class AddI:
     pass
 
-@dataclass
+@dataclass(slots=True)
 class LessI:
     pass
 
 type opI = AddI | LessI
 
-@dataclass
+@dataclass(slots=True)
 class Imm:
     value: int
 
 type imm = Imm
 
-@dataclass
+@dataclass(slots=True)
 class Reg:
     name: string
 
 type reg = Reg
 
-@dataclass
+@dataclass(slots=True)
 class Op:
     op: op
     target: reg
     left: reg
     right: reg
 
-@dataclass
+@dataclass(slots=True)
 class OpI:
     opI: opI
     target: reg
     left: reg
     right: imm
 
-@dataclass
+@dataclass(slots=True)
 class LoadWord:
     target: reg
     offset: imm
     src: reg
 
-@dataclass
+@dataclass(slots=True)
 class LoadI:
     target: reg
     value: imm
 
-@dataclass
+@dataclass(slots=True)
 class LoadA:
     target: reg
     label: str
 
-@dataclass
+@dataclass(slots=True)
 class StoreWord:
     src: reg
     offset: imm
     baseAddr: reg
 
-@dataclass
+@dataclass(slots=True)
 class BranchNeqZero:
     reg: reg
     label: string
 
-@dataclass
+@dataclass(slots=True)
 class Branch:
     label: string
 
-@dataclass
+@dataclass(slots=True)
 class Move:
     target: reg
     source: reg
 
-@dataclass
+@dataclass(slots=True)
 class Syscall:
     pass
 
-@dataclass
+@dataclass(slots=True)
 class Label:
     label: string
 
-type instr = Op | OpI | LoadWord | LoadI | LoadA | StoreWord | BranchNeqZero | Branch | Move | Syscall | Label
\ No newline at end of file
+type instr = Op | OpI | LoadWord | LoadI | LoadA | StoreWord | BranchNeqZero | Branch | Move | Syscall | Label
@@ -2,77 +2,140 @@
 An interpreter for TAC.
 """
 from assembly.tac_ast import *
+from typing import *
 import common.utils as utils
 import common.genericCompiler as genCompiler
 import assembly.tacPretty as tacPretty
 from assembly.loopToTac import loopToTac
+import operator
 
 type Vars = dict[ident, int]
 
-def evalPrim(p: prim, vars: Vars) -> int:
-    match p:
-        case Const(v): return v
-        case Name(x): return vars[x]
+# Executes a single (decoded) instruction and returns the index of the next instruction
+type Step = Callable[[Vars], int]
 
 def bi(b: bool) -> int:
     return 1 if b else 0
 
-def evalExp(e: exp, vars: Vars) -> int:
+BIN_OPS: dict[str, Callable[[int, int], int]] = {
+    'ADD': operator.add,
+    'SUB': operator.sub,
+    'MUL': operator.mul,
+    'EQ': lambda v1, v2: bi(v1 == v2),
+    'NE': lambda v1, v2: bi(v1 != v2),
+    'LT_S': lambda v1, v2: bi(v1 < v2),
+    'GT_S': lambda v1, v2: bi(v1 > v2),
+    'LE_S': lambda v1, v2: bi(v1 <= v2),
+    'GE_S': lambda v1, v2: bi(v1 >= v2),
+}
+
+def decodePrim(p: prim) -> Callable[[Vars], int]:
+    match p:
+        case Const(v): return lambda _vars: v
+        case Name(x): return lambda vars: vars[x]
+
+def decodeExp(e: exp) -> Callable[[Vars], int]:
     match e:
-        case Prim(p): return evalPrim(p, vars)
+        case Prim(Const(v)):
+            return lambda _vars: v
+        case Prim(Name(x)):
+            return lambda vars: vars[x]
         case BinOp(p1, op, p2):
-            v1 = evalPrim(p1, vars)
-            v2 = evalPrim(p2, vars)
-            match op.name:
-                case 'ADD': return v1 + v2
-                case 'SUB': return v1 - v2
-                case 'MUL': return v1 * v2
-                case 'EQ': return bi(v1 == v2)
-                case 'NE': return bi(v1 != v2)
-                case 'LT_S': return bi(v1 < v2)
-                case 'GT_S': return bi(v1 > v2)
-                case 'LE_S': return bi(v1 <= v2)
-                case 'GE_S': return bi(v1 >= v2)
-                case s:
-                    raise ValueError(f'Unhandled operator: {s}')
+            f = BIN_OPS.get(op.name)
+            if f is None:
+                # Fail only if the expression is actually evaluated
+                def unhandledOp(_vars: Vars) -> int:
+                    raise ValueError(f'Unhandled operator: {op.name}')
+                return unhandledOp
+            # Specialize the common cases to avoid one level of indirection
+            match (p1, p2):
+                case (Name(x1), Name(x2)):
+                    return lambda vars: f(vars[x1], vars[x2])
+                case (Name(x1), Const(c2)):
+                    return lambda vars: f(vars[x1], c2)
+                case _:
+                    v1 = decodePrim(p1)
+                    v2 = decodePrim(p2)
+                    return lambda vars: f(v1(vars), v2(vars))
 
-def findLabel(instrs: list[instr], label: str) -> int:
+def resolveLabels(instrs: list[instr]) -> dict[str, int]:
+    """
+    Maps each label to the index of its first occurrence in instrs.
+    """
+    labels: dict[str, int] = {}
     for idx, instr in enumerate(instrs):
         match instr:
-            case Label(l) if l == label:
-                return idx
+            case Label(l):
+                labels.setdefault(l, idx)
             case _:
                 pass
-    raise ValueError(f'Label {label} not found in {instrs}')
+    return labels
+
+def decodeInstr(instr: instr, idx: int, labels: dict[str, int]) -> Step:
+    nextIdx = idx + 1
+    def missingLabel(label: str) -> Step:
+        # Fail only if the jump is actually taken
+        def jump(_vars: Vars) -> int:
+            raise ValueError(f'Label {label} not found')
+        return jump
+    match instr:
+        case Assign(x, e):
+            f = decodeExp(e)
+            def assign(vars: Vars) -> int:
+                vars[x] = f(vars)
+                return nextIdx
+            return assign
+        case Call(x, fun, args):
+            match (fun, args):
+                case (Ident('$input_i64'), []):
+                    y = utils.assertNotNone(x)
+                    def inputInt(vars: Vars) -> int:
+                        vars[y] = utils.inputInt('Enter some int: ')
+                        return nextIdx
+                    return inputInt
+                case (Ident('$print_i32'), [p]) | (Ident('$print_i64'), [p]):
+                    v = decodePrim(p)
+                    def printPrim(vars: Vars) -> int:
+                        print(v(vars))
+                        return nextIdx
+                    return printPrim
+                case _:
+                    # Fail only if the call is actually executed
+                    def invalidCall(_vars: Vars) -> int:
+                        raise ValueError(f'Invalid call: {instr}')
+                    return invalidCall
+        case GotoIf(test, label):
+            v = decodePrim(test)
+            if label not in labels:
+                fail = missingLabel(label)
+                return lambda vars: fail(vars) if v(vars) != 0 else nextIdx
+            # Jump directly behind the label
+            t = labels[label] + 1
+            return lambda vars: t if v(vars) != 0 else nextIdx
+        case Goto(label):
+            if label not in labels:
+                return missingLabel(label)
+            t = labels[label] + 1
+            return lambda _vars: t
+        case Label(_):
+            return lambda _vars: nextIdx
+
+def decodeInstrs(instrs: list[instr]) -> list[Step]:
+    """
+    Prepares instrs for execution: labels are resolved to instruction indices, and every
+    instruction is turned into a closure. As with a direct interpretation, a jump goes to
+    the first occurrence of a label, and invalid instructions fail only when executed.
+    """
+    labels = resolveLabels(instrs)
+    return [decodeInstr(instr, idx, labels) for idx, instr in enumerate(instrs)]
 
 def interpInstrs(instrs: list[instr]):
+    code = decodeInstrs(instrs)
+    n = len(code)
     pc = 0
     vars: Vars = {}
-    while pc < len(instrs):
-        instr = instrs[pc]
-        match instr:
-            case Assign(x, e):
-                vars[x] = evalExp(e, vars)
-                pc += 1
-            case Call(x, fun, args):
-                match (fun, args):
-                    case (Ident('$input_i64'), []):
-                        vars[utils.assertNotNone(x)] = utils.inputInt('Enter some int: ')
-                    case (Ident('$print_i32'), [p]) | (Ident('$print_i64'), [p]):
-                        print(evalPrim(p, vars))
-                    case _:
-                        raise ValueError(f'Invalid call: {instr}')
-                pc += 1
-            case GotoIf(test, label):
-                v = evalPrim(test, vars)
-                if v != 0:
-                    pc = findLabel(instrs, label)
-                else:
-                    pc += 1
-            case Goto(label):
-                pc = findLabel(instrs, label)
-            case Label(_):
-                pc += 1
+    while pc < n:
+        pc = code[pc](vars)
 
 def interpFile(args: genCompiler.Args, printTac: bool):
     tacInstrs = loopToTac(args)
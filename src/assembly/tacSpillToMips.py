@@ -1,9 +1,9 @@
 """
 This module implements to translation from TACspill to MIPS by performing
 instruction selection. Instruction selection for TACspill assign instructions
-is expected to be implemented by students in the module
-compilers.assembly.tacSpillAssignToMips, see templates/assembly for a
-template file.
+is pluggable, see ASSIGN_SELECTORS. By default, it is expected to be implemented
+by students in the module compilers.assembly.tacSpillAssignToMips, see templates/assembly
+for a template file.
 """
 
 import assembly.tacSpill_ast as tacSpill
@@ -14,6 +14,31 @@ from assembly.mipsHelper import *
 from common.compilerSupport import *
 import common.utils as utils
 
+type AssignSelector = Callable[[tacSpill.Assign], list[mips.instr]]
+
+# Instruction selectors for TACspill assign instructions: name of the selector ->
+# (module, function). The module is imported only when the selector is used.
+ASSIGN_SELECTORS: dict[str, tuple[str, str]] = {
+    'student': ('compilers.assembly.tacSpillAssignToMips', 'assignToMips'),
+    'table': ('assembly.assignSelector', 'assignToMips')
+}
+
+DEFAULT_ASSIGN_SELECTOR = 'student'
+
+def registerAssignSelector(name: str, modName: str, funName: str):
+    ASSIGN_SELECTORS[name] = (modName, funName)
+
+def resolveAssignSelector(name: str) -> AssignSelector:
+    """
+    Returns the function implementing the instruction selector with the given name.
+    """
+    if name not in ASSIGN_SELECTORS:
+        raise ValueError(f'Unknown instruction selector {name}, ' \
+                         f'available: {", ".join(ASSIGN_SELECTORS)}')
+    (modName, funName) = ASSIGN_SELECTORS[name]
+    m = utils.importModuleNotInStudent(modName)
+    return getattr(m, funName)
+
 class StackLocs:
     def __init__(self):
         self._d: dict[str, int] = {}
@@ -31,11 +56,10 @@ printNewlineInstrs: list[mips.instr] = [
     mips.Syscall()
 ]
 
-def toMips(i: tacSpill.instr, locs: StackLocs) -> list[mips.instr]:
+def toMips(i: tacSpill.instr, locs: StackLocs, assignToMips: AssignSelector) -> list[mips.instr]:
     match i:
         case tacSpill.Assign():
-            m = utils.importModuleNotInStudent('compilers.assembly.tacSpillAssignToMips')
-            return m.assignToMips(i)
+            return assignToMips(i)
         case tacSpill.Call(x, f, args):
             prints = ['$print_i64', '$print_i32']
             inputs = ['$input_i64']
@@ -72,6 +96,8 @@ def toMips(i: tacSpill.instr, locs: StackLocs) -> list[mips.instr]:
             off = locs.stackOffset(name)
             return [mips.LoadWord(reg(x), imm(off), Regs.sp)]
 
-def tacSpillToMips(instrs: list[tacSpill.instr]) -> list[mips.instr]:
+def tacSpillToMips(instrs: list[tacSpill.instr],
+                   selector: str = DEFAULT_ASSIGN_SELECTOR) -> list[mips.instr]:
     locs = StackLocs()
-    return [x for i in instrs for x in toMips(i, locs)]
+    assignToMips = resolveAssignSelector(selector)
+    return [x for i in instrs for x in toMips(i, locs, assignToMips)]
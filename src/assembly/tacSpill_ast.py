@@ -1,37 +1,55 @@
-# AUTOMATICALLY GENERATED (2024-06-06 16:09:37)
+# AUTOMATICALLY GENERATED (2026-10-18 03:18:30)
 from __future__ import annotations
 from dataclasses import dataclass
 
 type optional[T] = T | None
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True, eq=False)
 class Ident:
+    """
+    Identifiers are interned: Ident(name) always returns the same object for the same name.
+    Thus, comparing identifiers is mostly an identity check.
+    """
     name: str
+    def __new__(cls, name: str) -> Ident:
+        x = _identTable.get(name)
+        if x is None:
+            x = object.__new__(cls)
+            _identTable[name] = x
+        return x
+    def __eq__(self, other: object) -> bool:
+        return self is other or (isinstance(other, Ident) and self.name == other.name)
+    def __hash__(self) -> int:
+        return hash(self.name)
+    def __reduce__(self) -> tuple[type[Ident], tuple[str]]:
+        return (Ident, (self.name,))
+
+_identTable: dict[str, Ident] = {}
 
 type ident = Ident
 type string = str
 
-@dataclass
+@dataclass(slots=True)
 class Op:
     name: string
 
 type op = Op
 
-@dataclass
+@dataclass(slots=True)
 class Const:
     value: int
 
-@dataclass
+@dataclass(slots=True)
 class Name:
     var: ident
 
 type prim = Const | Name
 
-@dataclass
+@dataclass(slots=True)
 class Prim:
     p: prim
 
-@dataclass
+@dataclass(slots=True)
 class BinOp:
     left: prim
     op: op
@@ -39,38 +57,38 @@ class BinOp:
 
 type exp = Prim | BinOp
 
-@dataclass
+@dataclass(slots=True)
 class Assign:
     var: ident
     right: exp
 
-@dataclass
+@dataclass(slots=True)
 class Call:
     var: optional[ident]
     name: ident
     args: list[prim]
 
-@dataclass
+@dataclass(slots=True)
 class GotoIf:
     test: prim
     label: string
 
-@dataclass
+@dataclass(slots=True)
 class Goto:
     label: string
 
-@dataclass
+@dataclass(slots=True)
 class Label:
     label: string
 
-@dataclass
+@dataclass(slots=True)
 class Spill:
     var: ident
     origName: string
 
-@dataclass
+@dataclass(slots=True)
 class Unspill:
     var: ident
     origName: string
 
-type instr = Assign | Call | GotoIf | Goto | Label | Spill | Unspill
\ No newline at end of file
+type instr = Assign | Call | GotoIf | Goto | Label | Spill | Unspill
@@ -103,9 +103,9 @@ def tacToTacSpill(instrs: list[tac.instr], maxRegs: int=asCommon.MAX_REGISTERS)
     liveness =  utils.importModuleNotInStudent('compilers.assembly.liveness')
     graphColoring = utils.importModuleNotInStudent('compilers.assembly.graphColoring')
     ctrlFlowG = controlFlow.buildControlFlowGraph(instrs)
-    log.debug(f'control flow graph: {ctrlFlowG}')
+    log.debugLazy(lambda: f'control flow graph: {ctrlFlowG}')
     interfGraph = liveness.buildInterfGraph(ctrlFlowG)
-    log.debug(f'interference graph: {interfGraph}')
+    log.debugLazy(lambda: f'interference graph: {interfGraph}')
     regMap = graphColoring.colorInterfGraph(interfGraph, maxRegs=maxRegs)
-    log.debug(f'Register map: {regMap}')
+    log.debugLazy(lambda: f'Register map: {regMap}')
     return [x for i in instrs for x in spillInstr(i, regMap)]
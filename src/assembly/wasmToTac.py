@@ -27,16 +27,29 @@ class _Emitter:
         return f'L_{hint}_{i}'
 
 def wasmToTac(instrs: list[WasmInstrL]) -> tuple[Optional[tac.prim], list[tac.instr]]:
-    return _toTacR(list(reversed(instrs)))
+    return _toTacSeq(instrs, _Emitter())
 
-def _toTacR(rInstrs: list[WasmInstrL]) -> tuple[Optional[tac.prim], list[tac.instr]]:
-    e = _Emitter()
-    (val, rest) = _toTacSingle(rInstrs, None, e)
-    if rest:
-        (_, l) = _toTacR(rest)
-    else:
-        l = []
-    return (val, l + e.instrs)
+def _toTacSeq(instrs: list[WasmInstrL], e: _Emitter) -> tuple[Optional[tac.prim], list[tac.instr]]:
+    """
+    Translates a sequence of instructions. The sequence is consumed from its end: every
+    call of _toTacSingle translates the last unconsumed instruction together with all
+    instructions computing its operands. We call such a group a tree. Trees are translated
+    from last to first, so the code of the trees is collected separately and then
+    concatenated in reverse order. The fresh registers and labels come from the
+    emitter e, which is shared by all sequences of a function.
+    """
+    saved = e.instrs
+    chunks: list[list[tac.instr]] = []
+    val: Optional[tac.prim] = None
+    pos = len(instrs)
+    while pos > 0:
+        e.instrs = []
+        (v, pos) = _toTacSingle(instrs, pos, None, e)
+        if not chunks:
+            val = v
+        chunks.append(e.instrs)
+    e.instrs = saved
+    return (val, [i for c in reversed(chunks) for i in c])
 
 def _callInfo(id: WasmId) -> tuple[int, bool]:
     """
@@ -52,14 +65,22 @@ def _callInfo(id: WasmId) -> tuple[int, bool]:
 def downcast(l: list[WasmInstr]) -> list[WasmInstrL]:
     return cast(list[WasmInstrL], l)
 
-def _toTacSingle(rInstrs: list[WasmInstrL], targetVar: Optional[tac.ident], e: _Emitter) -> tuple[Optional[tac.prim], list[WasmInstrL]]:
-    match rInstrs:
-        case [WasmInstrVarLocal(op, x), *rest]:
+def _toTacSingle(instrs: list[WasmInstrL], pos: int, targetVar: Optional[tac.ident],
+                 e: _Emitter) -> tuple[Optional[tac.prim], int]:
+    """
+    Translates the tree ending at instrs[pos-1]. Returns the value of the tree and
+    the position of the first instruction not consumed.
+    """
+    if pos == 0:
+        return (None, 0)
+    rest = pos - 1
+    match instrs[rest]:
+        case WasmInstrVarLocal(op, x):
             if op == 'get':
                 return (tac.Name(tac.Ident(x.id)), rest)
             else:
                 tacVar = tac.Ident(x.id)
-                (val, rest) = _toTacSingleNotNone(rest, tacVar, e)
+                (val, rest) = _toTacSingleNotNone(instrs, rest, tacVar, e)
                 match val:
                     case tac.Name(v) if v == tacVar:
                         pass # nothing todo
@@ -70,19 +91,19 @@ def _toTacSingle(rInstrs: list[WasmInstrL], targetVar: Optional[tac.ident], e: _
                 else:
                     res = tac.Name(tacVar)
                 return (res, rest)
-        case [WasmInstrNumBinOp(_, op), *rest] | [WasmInstrIntRelOp(_, op), *rest]:
-            (right, rest) = _toTacSingleNotNone(rest, None, e)
-            (left, rest) = _toTacSingleNotNone(rest, None, e)
+        case WasmInstrNumBinOp(_, op) | WasmInstrIntRelOp(_, op):
+            (right, rest) = _toTacSingleNotNone(instrs, rest, None, e)
+            (left, rest) = _toTacSingleNotNone(instrs, rest, None, e)
             # no optimization
             opCode = op.upper()
             targetReg = targetVar or e.freshReg()
             e.emit(tac.Assign(targetReg, tac.BinOp(left, tac.Op(opCode), right)))
             return (tac.Name(targetReg), rest)
-        case [WasmInstrCall(name), *rest]:
+        case WasmInstrCall(name):
             (n, hasResult) = _callInfo(name)
             args = []
             for _ in range(n):
-                (arg, rest) = _toTacSingleNotNone(rest, None, e)
+                (arg, rest) = _toTacSingleNotNone(instrs, rest, None, e)
                 args = [arg] + args
             if hasResult:
                 targetReg = targetVar or e.freshReg()
@@ -90,31 +111,31 @@ def _toTacSingle(rInstrs: list[WasmInstrL], targetVar: Optional[tac.ident], e: _
                 targetReg = None
             e.emit(tac.Call(targetReg, tac.Ident(name.id), args))
             return (tac.Name(targetReg) if targetReg else None, rest)
-        case [WasmInstrConst(_, v), *rest]:
+        case WasmInstrConst(_, v):
             if isinstance(v, int):
                 return (tac.Const(v), rest)
             else:
                 raise ValueError(f'float constants not supported in TAC')
-        case [WasmInstrBranch(target, True), *rest]: # conditional branch
-            (val, rest) = _toTacSingleNotNone(rest, None, e)
+        case WasmInstrBranch(target, True): # conditional branch
+            (val, rest) = _toTacSingleNotNone(instrs, rest, None, e)
             e.emit(tac.GotoIf(val, target.id))
             return (None, rest)
-        case [WasmInstrBranch(target, False), *rest]: # unconditional branch
+        case WasmInstrBranch(target, False): # unconditional branch
             e.emit(tac.Goto(target.id))
             return (None, rest)
-        case [WasmInstrIf(_, [], elseInstrs), *rest]:
-            (val, rest) = _toTacSingleNotNone(rest, None, e)
+        case WasmInstrIf(_, [], elseInstrs):
+            (val, rest) = _toTacSingleNotNone(instrs, rest, None, e)
             labelEnd = e.freshLabel('end')
             e.emit(tac.GotoIf(val, labelEnd))
-            (_, elseInstrsTac) = wasmToTac(downcast(elseInstrs))
+            (_, elseInstrsTac) = _toTacSeq(downcast(elseInstrs), e)
             e.add(elseInstrsTac)
             e.emit(tac.Label(labelEnd))
             return (None, rest)
-        case [WasmInstrIf(resTy, thenInstrs, elseInstrs), *rest]:
-            (val, rest) = _toTacSingleNotNone(rest, None, e)
+        case WasmInstrIf(resTy, thenInstrs, elseInstrs):
+            (val, rest) = _toTacSingleNotNone(instrs, rest, None, e)
             targetReg = targetVar or e.freshReg()
-            (valElse, elseInstrsTac) = wasmToTac(downcast(elseInstrs))
-            (valThen, thenInstrsTac) = wasmToTac(downcast(thenInstrs))
+            (valElse, elseInstrsTac) = _toTacSeq(downcast(elseInstrs), e)
+            (valThen, thenInstrsTac) = _toTacSeq(downcast(thenInstrs), e)
             labelThen = e.freshLabel('then')
             labelEnd = e.freshLabel('end')
             e.emit(tac.GotoIf(val, labelThen))
@@ -131,13 +152,13 @@ def _toTacSingle(rInstrs: list[WasmInstrL], targetVar: Optional[tac.ident], e: _
                 return (tac.Name(targetReg), rest)
             else:
                 return (None, rest)
-        case [WasmInstrLoop(label, body), *rest]:
-            (_, instrsTac) = wasmToTac(downcast(body))
+        case WasmInstrLoop(label, body):
+            (_, instrsTac) = _toTacSeq(downcast(body), e)
             e.emit(tac.Label(label.id))
             e.add(instrsTac)
             return (None, rest)
-        case [WasmInstrBlock(label, resultTy, body), *rest]:
-            (val, instrsTac) = wasmToTac(downcast(body))
+        case WasmInstrBlock(label, resultTy, body):
+            (val, instrsTac) = _toTacSeq(downcast(body), e)
             e.add(instrsTac)
             if resultTy is not None:
                 targetReg = targetVar or e.freshReg()
@@ -147,13 +168,12 @@ def _toTacSingle(rInstrs: list[WasmInstrL], targetVar: Optional[tac.ident], e: _
             else:
                 e.emit(tac.Label(label.id))
                 return (None, rest)
-        case []:
-            return (None, [])
-        case _:
-            raise ValueError(f"Don't know what to do with reversed stack {rInstrs}")
+        case instr:
+            raise ValueError(f"Don't know what to do with instruction {instr}")
 
-def _toTacSingleNotNone(rInstrs: list[WasmInstrL], targetVar: Optional[tac.ident], e: _Emitter) -> tuple[tac.prim, list[WasmInstrL]]:
-    (x, rest) = _toTacSingle(rInstrs, targetVar, e)
+def _toTacSingleNotNone(instrs: list[WasmInstrL], pos: int, targetVar: Optional[tac.ident],
+                        e: _Emitter) -> tuple[tac.prim, int]:
+    (x, rest) = _toTacSingle(instrs, pos, targetVar, e)
     if x is None:
-        raise ValueError(f'toTacSingle returned None for rInstrs={rInstrs}')
+        raise ValueError(f'toTacSingle returned None for instruction {instrs[pos-1] if pos else None}')
     return (x, rest)
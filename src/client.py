@@ -0,0 +1,58 @@
+"""
+Thin client for the compile server (see common/compileServer.py). It accepts the
+same arguments as main.py, but lets a running server do the work:
+
+  python src/client.py [--socket PATH] --lang=loop compile FILE.py
+
+Start the server with `python src/main.py serve`.
+
+This module must only import modules from the standard library (and no heavy ones),
+otherwise we lose the startup time we want to save.
+"""
+import common.constants as constants
+import json
+import os
+import socket
+import sys
+
+def parseArgs(argv: list[str]) -> tuple[str, list[str]]:
+    prefix = '--socket='
+    if len(argv) >= 2 and argv[0] == '--socket':
+        return (argv[1], argv[2:])
+    elif argv and argv[0].startswith(prefix):
+        return (argv[0][len(prefix):], argv[1:])
+    else:
+        return (constants.DEFAULT_SERVER_SOCKET, argv)
+
+def runRemote(socketPath: str, argv: list[str]) -> int:
+    """
+    Runs main.py with the given arguments inside the server and returns the exit code.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+        try:
+            s.connect(socketPath)
+        except OSError as e:
+            sys.stderr.write(f'ERROR: cannot connect to compile server at {socketPath}: {e}\n' \
+                'Start the server with `python src/main.py serve`\n')
+            return 1
+        msg = json.dumps({'argv': argv, 'cwd': os.getcwd()}) + '\n'
+        socket.send_fds(s, [msg.encode('utf-8')], [0, 1, 2])
+        data = b''
+        while True:
+            chunk = s.recv(64)
+            if not chunk:
+                break
+            data += chunk
+    try:
+        return int(data.decode('ascii'))
+    except ValueError:
+        sys.stderr.write('ERROR: compile server did not return an exit code\n')
+        return 1
+
+def main():
+    (socketPath, argv) = parseArgs(sys.argv[1:])
+    sys.stdout.flush()
+    sys.exit(runRemote(socketPath, argv))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""
+A content-addressed on-disk cache for build artifacts.
+
+Artifacts are stored under a key computed from everything the artifact depends on
+(see mkKey). The total size of the cache is bounded, if it grows too large, the
+least recently used artifacts are evicted. The modification time of an artifact file
+serves as its time of last use.
+
+Writes are atomic (write to a temporary file, then rename), so several processes
+may safely use the same cache directory.
+"""
+from typing import *
+import common.log as log
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+
+DEFAULT_MAX_SIZE = 100 * 1024 * 1024 # 100MB
+# When evicting, shrink the cache to this fraction of its max size, so that
+# we do not have to evict again on the next write.
+EVICT_TO = 0.8
+
+def mkKey(*parts: str) -> str:
+    """
+    Computes a cache key from the given parts.
+    """
+    h = hashlib.sha256()
+    for p in parts:
+        b = p.encode('utf-8')
+        h.update(str(len(b)).encode('ascii') + b':' + b)
+    return h.hexdigest()
+
+class ArtifactCache:
+    def __init__(self, dir: str, maxSize: int = DEFAULT_MAX_SIZE):
+        self.dir = dir
+        self.maxSize = maxSize
+        self.__lock = threading.Lock()
+        # Total size of all artifacts, computed on first write
+        self.__size: Optional[int] = None
+    def artifactPath(self, key: str) -> str:
+        return os.path.join(self.dir, key[:2], key)
+    def get(self, key: str, dest: str) -> bool:
+        """
+        Copies the artifact for key to dest. Returns False if the cache does not contain
+        an artifact for key.
+        """
+        p = self.artifactPath(key)
+        try:
+            shutil.copyfile(p, dest)
+            os.utime(p)
+        except FileNotFoundError:
+            return False
+        log.info(f'Cache hit for {dest} (key {key})')
+        return True
+    def getText(self, key: str) -> Optional[str]:
+        """
+        Returns the artifact for key as a string, or None if the cache does not contain
+        an artifact for key.
+        """
+        p = self.artifactPath(key)
+        try:
+            with open(p, 'r') as f:
+                s = f.read()
+            os.utime(p)
+            return s
+        except FileNotFoundError:
+            return None
+    def put(self, key: str, src: str):
+        """
+        Stores file src as the artifact for key.
+        """
+        with open(src, 'rb') as f:
+            self.__store(key, f.read())
+    def putText(self, key: str, s: str):
+        self.__store(key, s.encode('utf-8'))
+    def __store(self, key: str, content: bytes):
+        p = self.artifactPath(key)
+        d = os.path.dirname(p)
+        os.makedirs(d, exist_ok=True)
+        (fd, tmp) = tempfile.mkstemp(dir=d, prefix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(content)
+            os.replace(tmp, p)
+        except BaseException:
+            os.remove(tmp)
+            raise
+        self.__grow(len(content))
+    def __entries(self) -> list[tuple[float, int, str]]:
+        entries: list[tuple[float, int, str]] = []
+        for root, _dirs, files in os.walk(self.dir):
+            for file in files:
+                if file.startswith('.tmp'):
+                    continue
+                p = os.path.join(root, file)
+                try:
+                    st = os.stat(p)
+                except FileNotFoundError:
+                    continue # removed concurrently
+                entries.append((st.st_mtime, st.st_size, p))
+        return entries
+    def __grow(self, n: int):
+        with self.__lock:
+            if self.__size is None:
+                self.__size = sum(size for (_, size, _) in self.__entries())
+            else:
+                self.__size += n
+            if self.__size > self.maxSize:
+                self.__size = self.__evict(int(self.maxSize * EVICT_TO))
+    def __evict(self, targetSize: int) -> int:
+        entries = self.__entries()
+        entries.sort()
+        total = sum(size for (_, size, _) in entries)
+        for (_, size, p) in entries:
+            if total <= targetSize:
+                break
+            try:
+                os.remove(p)
+            except FileNotFoundError:
+                pass
+            total -= size
+            log.debug(f'Evicted {p} from cache {self.dir}')
+        return total
+    def evict(self):
+        """
+        Removes the least recently used artifacts until the size of the cache
+        is at most self.maxSize.
+        """
+        with self.__lock:
+            self.__size = self.__evict(self.maxSize)
@@ -0,0 +1,185 @@
+"""
+Batch driver for the compiler tests. It runs the same checks as test/test_compiler.py,
+but much faster: all test files are compiled in a pool of worker processes that
+import the compilers only once, processes are forked only for running the
+resulting wasm files.
+
+Usage (from the toplevel directory of the project):
+
+  scripts/run-batch-tests [--lang LANG ...] [--jobs N] [--run-wasm CMD] [DIR ...]
+"""
+from __future__ import annotations
+from typing import *
+from dataclasses import dataclass
+import argparse
+import concurrent.futures
+import importlib
+import os
+import sys
+import tempfile
+import time
+import traceback
+import shell
+import common.compilerSupport as compilerSupport
+import common.constants as constants
+import common.genericParser as genericParser
+import common.log as log
+import common.testsupport as testsupport
+import common.utils as utils
+import common.wasmBinary as wasmBinary
+
+@dataclass(frozen=True)
+class CompileJob:
+    lang: str
+    srcFile: str
+    output: str
+    extraArgs: Optional[str]
+
+@dataclass(frozen=True)
+class CompileResult:
+    exitcode: int
+    stderr: str
+    seconds: float
+
+def _parseExtraArgs(extraArgs: Optional[str]) -> compilerSupport.CompilerConfig:
+    p = argparse.ArgumentParser()
+    p.add_argument('--max-mem-size', type=int)
+    p.add_argument('--max-array-size', type=int)
+    args = p.parse_args((extraArgs or '').split())
+    return compilerSupport.CompilerConfig(
+        maxMemSize=args.max_mem_size or compilerSupport.CompilerConfig.defaultMaxMemSize,
+        maxArraySize=args.max_array_size or compilerSupport.CompilerConfig.defaultMaxArraySize)
+
+def _initWorker():
+    # Import all compilers once per worker
+    for lang in constants.ALL_LANGUAGES:
+        try:
+            importlib.import_module(f'compilers.lang_{lang}.{lang}_compiler')
+        except ImportError:
+            pass
+
+def compileJob(job: CompileJob) -> CompileResult:
+    """
+    Compiles a single test file, this function runs inside a worker process.
+    Exit codes are the same as for `src/main.py compile`.
+    """
+    t0 = time.perf_counter()
+    def result(exitcode: int, stderr: str) -> CompileResult:
+        return CompileResult(exitcode, stderr, time.perf_counter() - t0)
+    lang = job.lang
+    try:
+        astMod = importlib.import_module(f'lang_{lang}.{lang}_ast')
+        compilerMod = importlib.import_module(f'compilers.lang_{lang}.{lang}_compiler')
+        cfg = _parseExtraArgs(job.extraArgs)
+        ast = genericParser.parseFile(job.srcFile, astMod)
+        wasmMod = compilerMod.compileModule(ast, cfg)
+        wasmBinary.writeWasmFile(job.output, wasmMod)
+    except compilerSupport.CompileError as e:
+        return result(constants.COMPILE_ERROR_EXIT_CODE, f'Compile error: {e}')
+    except SystemExit as e:
+        code = e.code if isinstance(e.code, int) else 1
+        return result(code, '')
+    except Exception:
+        return result(1, traceback.format_exc())
+    return result(0, '')
+
+def runWasm(runWasmCmd: str, wasmFile: str, input: Optional[str]) -> shell.RunResult:
+    cmd = ['timeout', '10s', 'bash', runWasmCmd, wasmFile]
+    # Never let the wasm process read from our own stdin
+    res = shell.run(cmd, onError='ignore', captureStdout=True, captureStderr=True,
+                    input=input if input is not None else '')
+    if res.exitcode != 0:
+        res = shell.RunResult(res.stderr, res.stderr, constants.RUN_ERROR_EXIT_CODE)
+    return res
+
+@dataclass
+class Timings:
+    collect: float = 0
+    compileWall: float = 0
+    compileSum: float = 0
+    runWall: float = 0
+    runSum: float = 0
+    def report(self, n: int) -> str:
+        lines = [
+            f'Phase timings for {n} tests:',
+            f'  collect:  {self.collect:8.2f}s',
+            f'  compile:  {self.compileWall:8.2f}s wall, {self.compileSum:8.2f}s summed over files',
+            f'  run+check:{self.runWall:8.2f}s wall, {self.runSum:8.2f}s summed over files'
+        ]
+        return '\n'.join(lines)
+
+def runBatch(tests: list[tuple[str, str]], runWasmCmd: str, jobs: int,
+             tmpDir: str, timings: Timings) -> list[tuple[str, str, str]]:
+    """
+    Runs the compiler tests for the given (lang, file) pairs. Returns a list of failures
+    (lang, file, message).
+    """
+    compileJobs: list[CompileJob] = []
+    for i, (lang, srcFile) in enumerate(tests):
+        extraArgs = testsupport.readFileOpt(shell.removeExt(srcFile) + '.args')
+        compileJobs.append(CompileJob(lang, srcFile, shell.pjoin(tmpDir, f'{i}.wasm'), extraArgs))
+    t0 = time.perf_counter()
+    with concurrent.futures.ProcessPoolExecutor(jobs, initializer=_initWorker) as ex:
+        compileResults = list(ex.map(compileJob, compileJobs, chunksize=4))
+    timings.compileWall = time.perf_counter() - t0
+    timings.compileSum = sum(r.seconds for r in compileResults)
+    def check(job: CompileJob, cres: CompileResult) -> tuple[Optional[str], float]:
+        t = time.perf_counter()
+        results: list[shell.RunResult] = []
+        def run(_captureErr: bool, input: Optional[str], _extraArgs: Optional[str]) -> shell.RunResult:
+            if cres.exitcode != 0:
+                res = shell.RunResult('', cres.stderr, cres.exitcode)
+            else:
+                res = runWasm(runWasmCmd, job.output, input)
+            results.append(res)
+            return res
+        try:
+            testsupport.runFileTest(job.srcFile, run)
+            msg = None
+        except AssertionError as e:
+            msg = f'{e} {results}'
+        except Exception as e:
+            msg = f'{type(e).__name__}: {e}'
+        return (msg, time.perf_counter() - t)
+    t0 = time.perf_counter()
+    # Threads are enough here, they only wait for the wasm processes.
+    with concurrent.futures.ThreadPoolExecutor(jobs) as ex:
+        checkResults = list(ex.map(check, compileJobs, compileResults))
+    timings.runWall = time.perf_counter() - t0
+    timings.runSum = sum(s for (_, s) in checkResults)
+    failures: list[tuple[str, str, str]] = []
+    for job, (msg, _) in zip(compileJobs, checkResults):
+        if msg is not None:
+            failures.append((job.lang, job.srcFile, msg))
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description='Compiles and runs all test files in a batch')
+    parser.add_argument('--lang', action='append', choices=constants.ALL_LANGUAGES,
+                        help='Only run tests for this language (may be given several times)')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1,
+                        help='Number of parallel jobs (default: number of CPUs)')
+    parser.add_argument('--run-wasm', default='wasm-support/run_iwasm',
+                        help='Command to run wasm files')
+    parser.add_argument('--level', help='The loglevel (debug, info, warn)')
+    parser.add_argument('--log-file-level',
+                        help='The loglevel for minipy_batch.log (default: same as --level)')
+    parser.add_argument('dirs', nargs='*', default=['test_files'],
+                        help='Directories with test files (default: test_files)')
+    args = parser.parse_args()
+    fileLevel = log.resolveLevelName(args.log_file_level) if args.log_file_level else None
+    log.init(log.resolveLevelName(args.level or 'warn'), 'minipy_batch.log', fileLevel)
+    timings = Timings()
+    t0 = time.perf_counter()
+    tests = testsupport.collectTestFiles(args.dirs, args.lang)
+    timings.collect = time.perf_counter() - t0
+    with tempfile.TemporaryDirectory() as d:
+        failures = runBatch(tests, args.run_wasm, args.jobs, d, timings)
+    for (lang, f, msg) in failures:
+        print(f'FAILED [{lang}] {f}: {utils.shorten(msg, 500)}')
+    print(timings.report(len(tests)))
+    print(f'{len(tests) - len(failures)} passed, {len(failures)} failed')
+    sys.exit(1 if failures else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Building flat instruction lists with jumps, for interpreters that execute code with a
+program counter (see flatInterp and lang_fun/fun_bytecode).
+"""
+from typing import *
+
+class CodeBuilder[I]:
+    """
+    Builds a list of instructions of type I. Jumps first refer to labels, finish()
+    replaces them by absolute instruction indices. A jump is emitted via a function
+    mapping its target to the instruction, so the builder works for any instruction type.
+    """
+    def __init__(self, jump: Callable[[int], I]):
+        """
+        jump(target) must return an unconditional jump to target.
+        """
+        self.code: list[I] = []
+        self.__jump = jump
+        self.__labels: list[int] = []
+        self.__jumps: list[tuple[int, Callable[[int], I], int]] = []
+    def newLabel(self) -> int:
+        self.__labels.append(-1)
+        return len(self.__labels) - 1
+    def placeLabel(self, label: int):
+        self.__labels[label] = len(self.code)
+    def emit(self, instr: I):
+        self.code.append(instr)
+    def emitJump(self, mk: Callable[[int], I], label: int):
+        """
+        Emits the jump mk(target), where target is the index of the instruction at label.
+        """
+        self.__jumps.append((len(self.code), mk, label))
+        self.code.append(mk(label))
+    def emitIf(self, condJump: Callable[[int], I], thenBody: Callable[[], None],
+               elseBody: Callable[[], None]):
+        """
+        Emits a conditional. condJump(target) must jump to target if the condition is false,
+        thenBody and elseBody emit the code of the two branches.
+        """
+        lElse = self.newLabel()
+        lEnd = self.newLabel()
+        self.emitJump(condJump, lElse)
+        thenBody()
+        self.emitJump(self.__jump, lEnd)
+        self.placeLabel(lElse)
+        elseBody()
+        self.placeLabel(lEnd)
+    def emitWhile(self, condJump: Callable[[int], I], body: Callable[[], None],
+                  cond: Callable[[], None] = lambda: None):
+        """
+        Emits a loop. cond emits the code evaluating the condition before each iteration,
+        condJump(target) must jump to target if the condition is false.
+        """
+        lStart = self.newLabel()
+        lEnd = self.newLabel()
+        self.placeLabel(lStart)
+        cond()
+        self.emitJump(condJump, lEnd)
+        body()
+        self.emitJump(self.__jump, lStart)
+        self.placeLabel(lEnd)
+    def finish(self) -> list[I]:
+        code = list(self.code)
+        for (i, mk, label) in self.__jumps:
+            code[i] = mk(self.__labels[label])
+        return code
@@ -0,0 +1,119 @@
+"""
+A compile server that keeps one warm python process around. All heavy modules
+(lark, prettyprinter, the compilers and interpreters of all languages) are imported
+only once, when the server starts.
+
+The server listens on a unix socket. A client (see src/client.py) sends its
+commandline arguments and working directory, together with its stdin, stdout and stderr
+file descriptors. For every request, the server forks a child process that
+takes over these file descriptors and runs the same main function as the
+commandline interface. Hence, output, input and exit codes are exactly the same as
+with `python src/main.py ...`. Forking also makes sure that global state of
+one request does not leak into the next request.
+
+Protocol: the client sends one line of JSON `{"argv": [...], "cwd": "..."}`,
+with its file descriptors 0, 1, 2 attached as ancillary data. The server
+answers with the exit code as a decimal number and closes the connection.
+"""
+from typing import *
+import common.log as log
+import json
+import os
+import signal
+import socket
+import sys
+import traceback
+
+MAX_MSG_SIZE = 1024 * 1024
+
+def _recvRequest(conn: socket.socket) -> tuple[list[str], str, list[int]]:
+    (data, fds, _flags, _addr) = socket.recv_fds(conn, MAX_MSG_SIZE, 3)
+    while not data.endswith(b'\n'):
+        more = conn.recv(MAX_MSG_SIZE)
+        if not more:
+            break
+        data += more
+    if len(fds) != 3:
+        for fd in fds:
+            os.close(fd)
+        raise ValueError(f'Expected 3 file descriptors from client, got {len(fds)}')
+    req = json.loads(data.decode('utf-8'))
+    return (req['argv'], req['cwd'], fds)
+
+def _exitCode(e: SystemExit) -> int:
+    match e.code:
+        case None: return 0
+        case int(i): return i
+        case msg:
+            sys.stderr.write(f'{msg}\n')
+            return 1
+
+def _runChild(conn: socket.socket, argv: list[str], cwd: str, fds: list[int],
+              mainFun: Callable[[], None]) -> Never:
+    code = 1
+    try:
+        # Subprocesses of the child (e.g. iwasm) need the default handler, otherwise
+        # their exit code gets lost.
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        for (i, fd) in enumerate(fds):
+            os.dup2(fd, i)
+            os.close(fd)
+        os.chdir(cwd)
+        sys.argv = [sys.argv[0]] + argv
+        try:
+            mainFun()
+            code = 0
+        except SystemExit as e:
+            code = _exitCode(e)
+        except BaseException:
+            traceback.print_exc()
+            code = 1
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        try:
+            conn.sendall(str(code).encode('ascii'))
+        finally:
+            os._exit(code)
+
+def _handle(conn: socket.socket, mainFun: Callable[[], None]):
+    try:
+        (argv, cwd, fds) = _recvRequest(conn)
+    except (ValueError, KeyError, OSError) as e:
+        log.warn(f'Invalid request: {e}')
+        return
+    log.info(f'Request: argv={argv}, cwd={cwd}')
+    # Do not duplicate buffered output of the server in the child
+    sys.stdout.flush()
+    sys.stderr.flush()
+    pid = os.fork()
+    if pid == 0:
+        _runChild(conn, argv, cwd, fds, mainFun)
+    for fd in fds:
+        os.close(fd)
+
+def serve(socketPath: str, preload: Callable[[], None], mainFun: Callable[[], None]):
+    """
+    Runs the compile server on the unix socket socketPath until it gets killed.
+    preload is called once to import all modules needed, mainFun is called for every
+    request.
+    """
+    preload()
+    # Children are reaped automatically, their exit code is reported through the socket
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+    # Make sure the finally block below removes the socket
+    signal.signal(signal.SIGTERM, lambda _sig, _frame: sys.exit(0))
+    if os.path.exists(socketPath):
+        os.remove(socketPath)
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+        s.bind(socketPath)
+        s.listen()
+        log.info(f'Compile server listening on {socketPath}')
+        try:
+            while True:
+                conn, _ = s.accept()
+                with conn:
+                    _handle(conn, mainFun)
+        finally:
+            os.remove(socketPath)
@@ -5,8 +5,12 @@ import common.log as log
 import sys
 import traceback
 
+# Initial size of the memory (in pages of size 64kb). Programs needing more memory grow it
+# with memory.grow, up to the maximal memory size.
+INITIAL_MEM_SIZE = 1
+
 def wasmImports(maxMemSize: int) -> list[WasmImport]: return [
-    WasmImport("env", "memory", WasmImportMemory(maxMemSize, None)),
+    WasmImport("env", "memory", WasmImportMemory(min(INITIAL_MEM_SIZE, maxMemSize), maxMemSize)),
     WasmImport("env", "print", WasmImportFunc(WasmId('$print'), ['i32', 'i32'], None)),
     WasmImport("env", "print_err", WasmImportFunc(WasmId('$print_err'), ['i32', 'i32'], None)),
     WasmImport("env", "print_i32", WasmImportFunc(WasmId("$print_i32"), ['i32'], None)),
@@ -1,8 +1,12 @@
 from typing import Literal, cast
+import os
 
 COMPILE_ERROR_EXIT_CODE = 3
 RUN_ERROR_EXIT_CODE = 100
 
+# Unix socket of the compile server, see common/compileServer.py
+DEFAULT_SERVER_SOCKET = f'/tmp/minipy-server-{os.getuid()}.sock'
+
 type Language = Literal['var', 'loop', 'array', 'fun']
 ALL_LANGUAGES = ['var', 'loop', 'array', 'fun']
 
@@ -0,0 +1,59 @@
+"""
+A small execution engine for interpreters with structured control flow.
+
+The statements of a program are lowered into a flat list of instructions, loops and
+conditionals become jumps to absolute instruction indices. The run function executes
+such a list with a program counter, so the python stack does not grow with the number
+of statements executed. Only expressions are still evaluated recursively by the
+interpreter of the language.
+
+Instructions are closures, so the engine does not depend on the AST of a particular
+language. See loop_interp, var_interp and array_interp for how statements are lowered.
+"""
+from typing import *
+from dataclasses import dataclass
+from common.codeBuilder import CodeBuilder
+
+@dataclass(frozen=True)
+class Exec:
+    """Executes a statement without control flow."""
+    fun: Callable[[], None]
+
+@dataclass(frozen=True)
+class JumpIfFalse:
+    cond: Callable[[], Any]
+    target: int
+
+@dataclass(frozen=True)
+class Jump:
+    target: int
+
+type Instr = Exec | JumpIfFalse | Jump
+
+type Code = list[Instr]
+
+type Builder = CodeBuilder[Instr]
+
+def newBuilder() -> Builder:
+    return CodeBuilder(Jump)
+
+def jumpIfFalse(cond: Callable[[], Any]) -> Callable[[int], Instr]:
+    """
+    Returns the jump for CodeBuilder.emitIf and CodeBuilder.emitWhile on condition cond.
+    """
+    return lambda target: JumpIfFalse(cond, target)
+
+def run(code: Code):
+    pc = 0
+    n = len(code)
+    while pc < n:
+        instr = code[pc]
+        pc += 1
+        match instr:
+            case Exec(f):
+                f()
+            case JumpIfFalse(cond, target):
+                if not cond():
+                    pc = target
+            case Jump(target):
+                pc = target
@@ -5,26 +5,47 @@ from typing import *
 from dataclasses import dataclass
 from common.wasm import *
 import common.sexp as sexp
+import common.wasmBinary as wasmBinary
 import common.utils as utils
 from common.compilerSupport import CompilerConfig
 import common.compilerSupport as compilerSupport
+from common.artifactCache import ArtifactCache
+import common.artifactCache as artifactCache
+import functools
+import hashlib
+import os
 import shell
 
 type CompileFun = Callable[[Any, CompilerConfig], WasmModule]
 
-def compileToWat(compileFun: CompileFun, astMod: Any, cfg: CompilerConfig,
-                 input: str, output: str) -> WasmModule:
+def compileToWasmModule(compileFun: CompileFun, astMod: Any, cfg: CompilerConfig,
+                        input: str) -> WasmModule:
     ast = parser.parseFile(input, astMod)
     log.info(f'Compiling AST with {compileFun}')
     try:
-        wasmMod = compileFun(ast, cfg)
+        return compileFun(ast, cfg)
     except compilerSupport.CompileError as e:
         e.displayAndDie()
-    code = sexp.renderSExp(wasmMod.render())
-    utils.writeTextFile(output, code)
+
+def writeWat(wasmMod: WasmModule, output: str, prettyWat: bool = False):
+    if prettyWat:
+        code = sexp.renderSExp(wasmMod.render())
+        utils.writeTextFile(output, code)
+    else:
+        with open(output, 'w') as f:
+            sexp.writeSExp(wasmMod.render(), f)
     log.info(f'Wrote textual representation of wasm to {output}')
+
+def compileToWat(compileFun: CompileFun, astMod: Any, cfg: CompilerConfig,
+                 input: str, output: str, prettyWat: bool = False) -> WasmModule:
+    wasmMod = compileToWasmModule(compileFun, astMod, cfg, input)
+    writeWat(wasmMod, output, prettyWat)
     return wasmMod
 
+def writeWasm(wasmMod: WasmModule, output: str):
+    wasmBinary.writeWasmFile(output, wasmMod)
+    log.info(f'Wrote binary representation of wasm to {output}')
+
 def wat2wasm(wat2wasmCmd: str, input: str, output: str):
     cmd = [wat2wasmCmd, '--output=' + output, input]
     log.info(f'Converting textual format of wasm to binary format, cmd: {cmd}')
@@ -37,10 +58,17 @@ def wat2wasm(wat2wasmCmd: str, input: str, output: str):
 class Args:
     input: str
     output: str
-    wat2wasm: str = 'wat2wasm'
+    wat2wasm: Optional[str] = None # external wat2wasm tool, None means builtin encoder
     maxMemSize: Optional[int] = None
     maxArraySize: Optional[int] = None
     maxRegisters: Optional[int] = None
+    prettyWat: bool = False # use the (slow) pretty layout for .wat files
+    cacheDir: Optional[str] = None # directory of the compilation cache, None disables the cache
+    cacheMaxSize: int = artifactCache.DEFAULT_MAX_SIZE
+
+def mkConfig(args: Args) -> CompilerConfig:
+    return CompilerConfig(maxMemSize=args.maxMemSize or CompilerConfig.defaultMaxMemSize,
+                          maxArraySize=args.maxArraySize or CompilerConfig.defaultMaxArraySize)
 
 def compileMain(args: Args, compileFun: CompileFun, astMod: Any) -> WasmModule:
     output = args.output
@@ -48,13 +76,61 @@ def compileMain(args: Args, compileFun: CompileFun, astMod: Any) -> WasmModule:
     outputWat = outputBase + '.wat'
     if outputExt not in ['.wat', '.wasm', '.as']:
         utils.abort(f'Extension of output file must be .wat or .wasm or .as')
-    cfg = CompilerConfig(maxMemSize=args.maxMemSize or CompilerConfig.defaultMaxMemSize,
-                         maxArraySize=args.maxArraySize or CompilerConfig.defaultMaxArraySize)
-    wasmMod = compileToWat(compileFun, astMod, cfg, args.input, outputWat)
+    cfg = mkConfig(args)
     if outputExt == '.wat':
-        return wasmMod
+        return compileToWat(compileFun, astMod, cfg, args.input, outputWat, args.prettyWat)
     outputBin = outputBase + '.wasm'
-    wat2wasm(args.wat2wasm, outputWat, outputBin)
+    if args.wat2wasm is not None:
+        wasmMod = compileToWat(compileFun, astMod, cfg, args.input, outputWat, args.prettyWat)
+        wat2wasm(args.wat2wasm, outputWat, outputBin)
+    else:
+        wasmMod = compileToWasmModule(compileFun, astMod, cfg, args.input)
+        writeWasm(wasmMod, outputBin)
     return wasmMod
 
+@functools.cache
+def compilerVersionStamp() -> str:
+    """
+    Returns a hash of all files of the compiler (python sources, grammars, ASDL
+    definitions, ...). Cached artifacts produced by a different version of the compiler
+    are never used.
+    """
+    return hashDir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def hashDir(srcDir: str) -> str:
+    """
+    Returns a hash of the names and contents of all files below srcDir, ignoring
+    compiled python files and log files.
+    """
+    h = hashlib.md5()
+    for root, dirs, files in os.walk(srcDir):
+        dirs[:] = sorted(d for d in dirs if d != '__pycache__')
+        for file in sorted(files):
+            if file.endswith(('.pyc', '.log')):
+                continue
+            p = os.path.join(root, file)
+            h.update(os.path.relpath(p, srcDir).encode('utf-8'))
+            with open(p, 'rb') as f:
+                h.update(f.read())
+    return h.hexdigest()
 
+def compileMainCached(args: Args, compileFun: CompileFun, astMod: Any):
+    """
+    Like compileMain, but looks up the output in the compilation cache first (if enabled
+    via args.cacheDir). There is no WasmModule on a cache hit, so this function
+    does not return anything.
+    """
+    if args.cacheDir is None:
+        compileMain(args, compileFun, astMod)
+        return
+    outputBase, outputExt = shell.splitExt(args.output)
+    artifact = outputBase + ('.wat' if outputExt == '.wat' else '.wasm')
+    cfg = mkConfig(args)
+    key = artifactCache.mkKey('compile', compilerVersionStamp(), compileFun.__module__,
+                              utils.md5(args.input), str(cfg.maxMemSize), str(cfg.maxArraySize),
+                              outputExt, str(args.prettyWat), str(args.wat2wasm))
+    cache = ArtifactCache(args.cacheDir, args.cacheMaxSize)
+    if cache.get(key, artifact):
+        return
+    compileMain(args, compileFun, astMod)
+    cache.put(key, artifact)
@@ -11,12 +11,19 @@ import sys
 @dataclass(frozen=True)
 class Args:
     filename: str
+    bytecode: bool = False # only for lang_fun
+    flat: bool = False # only for lang_var, lang_loop and lang_array
 
-def interpMain(args: Args, interpFun: Callable[[Any], None], astMod: Any):
+def interpMain(args: Args, interpFun: Callable[..., None], astMod: Any):
     ast = parser.parseFile(args.filename, astMod)
     log.info(f'Interpreting AST with {interpFun} from file {inspect.getmodule(interpFun)}')
     try:
-        interpFun(ast)
+        if args.bytecode:
+            interpFun(ast, bytecode=True)
+        elif args.flat:
+            interpFun(ast, flat=True)
+        else:
+            interpFun(ast)
     except compilerSupport.CompileError as e:
         e.displayAndDie()
     except Exception:
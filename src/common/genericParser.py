@@ -196,7 +196,7 @@ def parseFile(filename: str, m: Any) -> Any:
         module = ast.parse(src, filename)
         w = ModWrapper(m, lang)
         x = transModule(module, w, lang)
-        log.debug(f'AST: {pprint.pformat(x)}')
+        log.debugLazy(lambda: f'AST: {pprint.pformat(x)}')
         return x
 
 ParserArgs = p.ParserArgs
@@ -1,16 +1,20 @@
 import logging
 import sys
+from typing import *
 import common.utils as utils
 import lark
 
-def _setupLogging(consoleLevel: int, logfile: str|None):
+def _setupLogging(consoleLevel: int, logfile: str|None, fileLevel: int):
     log = logging.getLogger('minipy')
-    _setupLoggingForLogger(log, consoleLevel, logfile)
-    _setupLoggingForLogger(lark.logger, consoleLevel, logfile)
+    _setupLoggingForLogger(log, consoleLevel, logfile, fileLevel)
+    _setupLoggingForLogger(lark.logger, consoleLevel, logfile, fileLevel)
     return log
 
-def _setupLoggingForLogger(log: logging.Logger, consoleLevel: int, logfile: str|None):
-    log.setLevel(logging.DEBUG)
+def _setupLoggingForLogger(log: logging.Logger, consoleLevel: int, logfile: str|None,
+                           fileLevel: int):
+    # The level of the logger is the lowest level of its handlers. Thus, messages
+    # below this level are dropped before they are formatted.
+    log.setLevel(min(consoleLevel, fileLevel) if logfile is not None else consoleLevel)
     fmt = logging.Formatter('[%(asctime)s %(levelname)s %(filename)s:%(lineno)d] %(message)s',
                             datefmt='%Y-%m-%dT%H:%M:%S')
     consoleH = logging.StreamHandler()
@@ -19,12 +23,12 @@ def _setupLoggingForLogger(log: logging.Logger, consoleLevel: int, logfile: str|
     log.addHandler(consoleH)
     if logfile is not None:
         fileH = logging.FileHandler(filename=logfile, mode='w', encoding='utf-8')
-        fileH.setLevel(logging.DEBUG)
+        fileH.setLevel(fileLevel)
         fileH.setFormatter(fmt)
         log.addHandler(fileH)
     return log
 
-_log = _setupLogging(logging.WARNING, None)
+_log = _setupLogging(logging.WARNING, None, logging.WARNING)
 
 def resolveLevelName(s: str) -> int:
     s = s.lower()
@@ -40,21 +44,46 @@ def removeAllHandlers(log: logging.Logger):
     for h in log.handlers[:]:
         log.removeHandler(h)
 
-def init(level: int, filename: str):
+def init(level: int, filename: str, fileLevel: int|None=None):
+    """
+    Logs to the console with the given level and to filename with fileLevel. By default,
+    the logfile uses the console level. Pass fileLevel=logging.DEBUG to get the full debug
+    trace in the logfile only; this slows down parsing and compilation.
+    """
     global _log
+    if fileLevel is None:
+        fileLevel = level
     if _log:
         removeAllHandlers(_log)
     removeAllHandlers(lark.logger)
-    _log = _setupLogging(level, filename)
+    _log = _setupLogging(level, filename, fileLevel)
 
 STACKLEVEL=2
 
+def isEnabled(level: int) -> bool:
+    return _log.isEnabledFor(level)
+
+def isDebugEnabled() -> bool:
+    return _log.isEnabledFor(logging.DEBUG)
+
 def debug(s: str):
     _log.debug(s, stacklevel=STACKLEVEL)
 
 def info(s: str):
     _log.info(s, stacklevel=STACKLEVEL)
 
+def debugLazy(f: Callable[[], str]):
+    """
+    Logs the result of f at debug level. f is only called if debug logging is enabled,
+    use this function for messages that are expensive to build.
+    """
+    if _log.isEnabledFor(logging.DEBUG):
+        _log.debug(f(), stacklevel=STACKLEVEL)
+
+def infoLazy(f: Callable[[], str]):
+    if _log.isEnabledFor(logging.INFO):
+        _log.info(f(), stacklevel=STACKLEVEL)
+
 def warn(s: str):
     _log.warning(s, stacklevel=STACKLEVEL)
 
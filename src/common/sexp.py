@@ -3,6 +3,7 @@ from dataclasses import dataclass
 import common.pretty as pretty
 from typing import *
 import json
+import io
 
 type RenderResult = pretty.Doc
 
@@ -56,9 +57,106 @@ class SExpBlock:
 type SExp = SExpNum | SExpStr | SExpId | SExpSeq | SExpBlock
 
 def renderSExp(s: SExp) -> str:
+    """
+    Renders s with the layout algorithm of the prettyprinter library. The output looks
+    nice but rendering is slow for large inputs.
+    """
     d = s.render()
     return pretty.renderDoc(d)
 
+# Sequences are written on a single line if this is possible within this width.
+MAX_FLAT_WIDTH = 80
+INDENT = '  '
+
+def renderSExpFast(s: SExp) -> str:
+    """
+    Renders s with writeSExp.
+    """
+    out = io.StringIO()
+    writeSExp(s, out)
+    return out.getvalue()
+
+def writeSExp(s: SExp, out: TextIO):
+    """
+    Writes s to out. In contrast to renderSExp, the layout uses fixed indentation
+    and never backtracks, so the running time is linear in the size of s.
+    """
+    _writeSExp(s, out, 0)
+    out.write('\n')
+
+def _atomStr(s: SExpNum | SExpStr | SExpId) -> str:
+    match s:
+        case SExpNum(val): return str(val)
+        case SExpStr(val): return json.dumps(val)
+        case SExpId(id): return id
+
+def _flatStr(s: SExp, budget: int) -> Optional[str]:
+    """
+    Returns the single-line rendering of s if it contains no block and fits
+    into budget characters. Otherwise returns None. The running time is bounded by
+    budget, not by the size of s.
+    """
+    match s:
+        case SExpSeq(sexps):
+            parts: list[str] = []
+            budget -= 2
+            for x in sexps:
+                if budget < 0:
+                    return None
+                p = _flatStr(x, budget)
+                if p is None:
+                    return None
+                parts.append(p)
+                budget -= len(p) + 1
+            if budget < -1:
+                return None
+            return '(' + ' '.join(parts) + ')'
+        case SExpBlock():
+            return None
+        case _:
+            a = _atomStr(s)
+            return a if len(a) <= budget else None
+
+def _isLabel(s: SExp) -> bool:
+    return isinstance(s, SExpId) and s.id.startswith('$')
+
+def _writeSExp(s: SExp, out: TextIO, level: int):
+    match s:
+        case SExpSeq(sexps):
+            flat = _flatStr(s, MAX_FLAT_WIDTH)
+            if flat is not None:
+                out.write(flat)
+                return
+            out.write('(')
+            j = 0
+            first = sexps[0] if sexps else None
+            if isinstance(first, (SExpNum, SExpStr, SExpId)):
+                out.write(_atomStr(first))
+                j = 1
+                while j < len(sexps) and _isLabel(sexps[j]):
+                    out.write(' ' + _atomStr(cast(SExpId, sexps[j])))
+                    j += 1
+            for x in sexps[j:]:
+                out.write('\n' + INDENT * (level + 1))
+                _writeSExp(x, out, level + 1)
+            out.write(')')
+        case SExpBlock(content):
+            for i, item in enumerate(content):
+                if i > 0:
+                    out.write('\n' + INDENT * level)
+                out.write(item.start)
+                j = 0
+                # labels stay on the line of the block start
+                while j < len(item.sexps) and _isLabel(item.sexps[j]):
+                    out.write(' ' + _atomStr(cast(SExpId, item.sexps[j])))
+                    j += 1
+                for x in item.sexps[j:]:
+                    out.write('\n' + INDENT * (level + 1))
+                    _writeSExp(x, out, level + 1)
+            out.write('\n' + INDENT * level + 'end')
+        case _:
+            out.write(_atomStr(s))
+
 def mkSeq(*es: SExp) -> SExpSeq:
     return SExpSeq(list(es))
 
@@ -66,7 +66,7 @@ class Symtab[K, T]:
         return self.__vars.items()
     def info(self, var: K) -> VarInfo[T]:
         if var not in self.__vars:
-            log.debug(f"Symtab: {pprint.pformat(self.__vars)}")
+            log.debugLazy(lambda: f"Symtab: {pprint.pformat(self.__vars)}")
             raise CompileError.typeError(f'Unknown variable: {var}')
         info = self.__vars[var]
         if not info.definitelyAssigned:
@@ -8,15 +8,31 @@ type WasmValtype = Literal['i32', 'i64', 'f32', 'f64']
 def renderValtype(t: WasmValtype) -> SExp:
     return SExpId(t)
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, eq=False)
 class WasmId:
+    """
+    Wasm identifiers are interned, see Ident in the generated AST modules.
+    """
     id: str
-    def __post_init__(self):
-        if not self.id or self.id[0] != '$':
-            raise ValueError(f'Invalid wasm identifier: {self.id}')
+    def __new__(cls, id: str) -> WasmId:
+        x = _wasmIdTable.get(id)
+        if x is None:
+            if not id or id[0] != '$':
+                raise ValueError(f'Invalid wasm identifier: {id}')
+            x = object.__new__(cls)
+            _wasmIdTable[id] = x
+        return x
+    def __eq__(self, other: object) -> bool:
+        return self is other or (isinstance(other, WasmId) and self.id == other.id)
+    def __hash__(self) -> int:
+        return hash(self.id)
+    def __reduce__(self) -> tuple[type[WasmId], tuple[str]]:
+        return (WasmId, (self.id,))
     def render(self) -> SExp:
         return SExpId(self.id)
 
+_wasmIdTable: dict[str, WasmId] = {}
+
 @dataclass(frozen=True)
 class WasmModule:
     """
@@ -113,10 +129,29 @@ class WasmGlobal:
 
 @dataclass(frozen=True)
 class WasmData:
-    start: int
-    content: str
+    """
+    Data segment. An active segment (start is not None) is copied to address start when
+    the module is instantiated, e.g. (data (i32.const 0) "foo"). A passive segment is only
+    copied by memory.init, it must have an id, e.g. (data $foo "foo").
+    """
+    start: Optional[int]
+    content: str | bytes
+    id: Optional[WasmId] = None
+    def __post_init__(self):
+        if self.start is None and self.id is None:
+            raise ValueError('Passive data segment without id')
+    def contentBytes(self) -> bytes:
+        return self.content.encode('utf-8') if isinstance(self.content, str) else self.content
     def render(self) -> SExp:
-        return mkNamedSeq('data', SExpId(f'(i32.const {self.start})'), SExpStr(self.content))
+        args: list[SExp] = []
+        if self.id is not None:
+            args.append(self.id.render())
+        if self.start is not None:
+            args.append(SExpId(f'(i32.const {self.start})'))
+        match self.content:
+            case str(): args.append(SExpStr(self.content))
+            case bytes(): args.append(SExpId('"' + ''.join(f'\\{b:02x}' for b in self.content) + '"'))
+        return mkNamedSeq('data', *args)
 
 @dataclass(frozen=True)
 class WasmFuncTable:
@@ -165,7 +200,7 @@ class WasmInstrNumBinOp:
     Binary operators on numbers, e.g. i32.add
     """
     ty: WasmValtype
-    op: Literal['add', 'sub', 'mul', 'shr_u', 'shl', 'xor']
+    op: Literal['add', 'sub', 'mul', 'shr_u', 'shl', 'xor', 'and', 'or']
     def render(self) -> SExp:
         return SExpId(f'{self.ty}.{self.op}')
 
@@ -232,6 +267,50 @@ class WasmInstrMem:
     def render(self) -> SExp:
         return SExpId(f'{self.ty}.{self.op}')
 
+@dataclass(frozen=True)
+class WasmInstrMemSize:
+    """
+    memory.size: pushes the current size of the memory in pages of 64kB
+    """
+    def render(self) -> SExp:
+        return SExpId('memory.size')
+
+@dataclass(frozen=True)
+class WasmInstrMemGrow:
+    """
+    memory.grow: pops a number of pages, grows the memory by this number of pages and pushes
+    the old size. Pushes -1 if the memory cannot grow.
+    """
+    def render(self) -> SExp:
+        return SExpId('memory.grow')
+
+@dataclass(frozen=True)
+class WasmInstrMemFill:
+    """
+    memory.fill: pops address, byte value, and number of bytes, sets the bytes to the value
+    """
+    def render(self) -> SExp:
+        return SExpId('memory.fill')
+
+@dataclass(frozen=True)
+class WasmInstrMemCopy:
+    """
+    memory.copy: pops destination, source, and number of bytes, copies the bytes. The
+    regions may overlap.
+    """
+    def render(self) -> SExp:
+        return SExpId('memory.copy')
+
+@dataclass(frozen=True)
+class WasmInstrMemInit:
+    """
+    memory.init $data: pops destination, offset into the passive data segment, and number
+    of bytes, copies the bytes from the data segment to memory.
+    """
+    data: WasmId
+    def render(self) -> SExp:
+        return mkSeq(SExpId('memory.init'), self.data.render())
+
 @dataclass(frozen=True)
 class WasmInstrBranch:
     """
@@ -298,7 +377,9 @@ class WasmInstrTrap:
 type WasmInstr = WasmInstrConst | WasmInstrNumBinOp | WasmInstrIntRelOp | WasmInstrConvOp \
                | WasmInstrCall | WasmInstrCallIndirect | WasmInstrVarLocal | WasmInstrVarGlobal \
                | WasmInstrBranch | WasmInstrIf | WasmInstrLoop | WasmInstrBlock | WasmInstrMem \
-               | WasmInstrComment | WasmInstrTrap | WasmInstrDrop
+               | WasmInstrComment | WasmInstrTrap | WasmInstrDrop \
+               | WasmInstrMemFill | WasmInstrMemCopy | WasmInstrMemInit \
+               | WasmInstrMemSize | WasmInstrMemGrow
 
 # instructions used for loop and for compiling to assembly
 type WasmInstrL = WasmInstrConst | WasmInstrNumBinOp | WasmInstrIntRelOp \
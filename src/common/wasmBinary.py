@@ -0,0 +1,362 @@
+"""
+This module encodes a WasmModule directly into the binary format of Wasm,
+without going through the textual representation and the external wat2wasm tool.
+
+See https://webassembly.github.io/spec/core/binary/index.html for the specification
+of the binary format.
+"""
+from __future__ import annotations
+from typing import *
+from common.wasm import *
+import struct
+
+MAGIC = b'\x00asm'
+VERSION = b'\x01\x00\x00\x00'
+
+SECTION_TYPE = 1
+SECTION_IMPORT = 2
+SECTION_FUNC = 3
+SECTION_TABLE = 4
+SECTION_MEMORY = 5
+SECTION_GLOBAL = 6
+SECTION_EXPORT = 7
+SECTION_ELEM = 9
+SECTION_CODE = 10
+SECTION_DATA = 11
+SECTION_DATA_COUNT = 12
+
+VALTYPES: dict[WasmValtype, int] = {'i32': 0x7f, 'i64': 0x7e, 'f32': 0x7d, 'f64': 0x7c}
+FUNCREF = 0x70
+EMPTY_BLOCKTYPE = 0x40
+
+NUM_BIN_OPS: dict[tuple[WasmValtype, str], int] = {
+    ('i32', 'add'): 0x6a, ('i32', 'sub'): 0x6b, ('i32', 'mul'): 0x6c,
+    ('i32', 'div_s'): 0x6d, ('i32', 'div_u'): 0x6e, ('i32', 'rem_s'): 0x6f,
+    ('i32', 'rem_u'): 0x70, ('i32', 'and'): 0x71, ('i32', 'or'): 0x72,
+    ('i32', 'xor'): 0x73, ('i32', 'shl'): 0x74, ('i32', 'shr_s'): 0x75,
+    ('i32', 'shr_u'): 0x76,
+    ('i64', 'add'): 0x7c, ('i64', 'sub'): 0x7d, ('i64', 'mul'): 0x7e,
+    ('i64', 'div_s'): 0x7f, ('i64', 'div_u'): 0x80, ('i64', 'rem_s'): 0x81,
+    ('i64', 'rem_u'): 0x82, ('i64', 'and'): 0x83, ('i64', 'or'): 0x84,
+    ('i64', 'xor'): 0x85, ('i64', 'shl'): 0x86, ('i64', 'shr_s'): 0x87,
+    ('i64', 'shr_u'): 0x88,
+    ('f32', 'add'): 0x92, ('f32', 'sub'): 0x93, ('f32', 'mul'): 0x94,
+    ('f64', 'add'): 0xa0, ('f64', 'sub'): 0xa1, ('f64', 'mul'): 0xa2
+}
+
+INT_REL_OPS: dict[tuple[str, str], int] = {
+    ('i32', 'eq'): 0x46, ('i32', 'ne'): 0x47, ('i32', 'lt_s'): 0x48, ('i32', 'lt_u'): 0x49,
+    ('i32', 'gt_s'): 0x4a, ('i32', 'gt_u'): 0x4b, ('i32', 'le_s'): 0x4c, ('i32', 'le_u'): 0x4d,
+    ('i32', 'ge_s'): 0x4e, ('i32', 'ge_u'): 0x4f,
+    ('i64', 'eq'): 0x51, ('i64', 'ne'): 0x52, ('i64', 'lt_s'): 0x53, ('i64', 'lt_u'): 0x54,
+    ('i64', 'gt_s'): 0x55, ('i64', 'gt_u'): 0x56, ('i64', 'le_s'): 0x57, ('i64', 'le_u'): 0x58,
+    ('i64', 'ge_s'): 0x59, ('i64', 'ge_u'): 0x5a
+}
+
+CONV_OPS: dict[str, int] = {
+    'i32.wrap_i64': 0xa7,
+    'i64.extend_i32_s': 0xac,
+    'i64.extend_i32_u': 0xad
+}
+
+# opcode and natural alignment (as exponent of 2)
+MEM_OPS: dict[tuple[WasmValtype, str], tuple[int, int]] = {
+    ('i32', 'load'): (0x28, 2), ('i64', 'load'): (0x29, 3),
+    ('f32', 'load'): (0x2a, 2), ('f64', 'load'): (0x2b, 3),
+    ('i32', 'store'): (0x36, 2), ('i64', 'store'): (0x37, 3),
+    ('f32', 'store'): (0x38, 2), ('f64', 'store'): (0x39, 3)
+}
+
+VAR_LOCAL_OPS = {'get': 0x20, 'set': 0x21, 'tee': 0x22}
+VAR_GLOBAL_OPS = {'get': 0x23, 'set': 0x24}
+
+# Bulk memory instructions, encoded as 0xfc followed by the number
+MISC_PREFIX = 0xfc
+MEMORY_INIT = 8
+MEMORY_COPY = 10
+MEMORY_FILL = 11
+
+def uleb128(n: int) -> bytes:
+    """
+    Unsigned LEB128 encoding of n.
+    """
+    if n < 0:
+        raise ValueError(f'Cannot encode negative number {n} as unsigned LEB128')
+    out = bytearray()
+    while True:
+        b = n & 0x7f
+        n >>= 7
+        if n == 0:
+            out.append(b)
+            return bytes(out)
+        out.append(b | 0x80)
+
+def sleb128(n: int) -> bytes:
+    """
+    Signed LEB128 encoding of n.
+    """
+    out = bytearray()
+    while True:
+        b = n & 0x7f
+        n >>= 7
+        if (n == 0 and b & 0x40 == 0) or (n == -1 and b & 0x40 != 0):
+            out.append(b)
+            return bytes(out)
+        out.append(b | 0x80)
+
+def toSigned(n: int, bits: int) -> int:
+    """
+    Interprets n as a two's complement number with the given number of bits.
+    Constants in the text format may also be given as unsigned numbers.
+    """
+    n = n & ((1 << bits) - 1)
+    if n >= (1 << (bits - 1)):
+        n -= (1 << bits)
+    return n
+
+def encodeName(s: str) -> bytes:
+    b = s.encode('utf-8')
+    return uleb128(len(b)) + b
+
+def encodeVec(items: list[bytes]) -> bytes:
+    return uleb128(len(items)) + b''.join(items)
+
+def encodeSection(id: int, items: list[bytes]) -> bytes:
+    content = encodeVec(items)
+    return bytes([id]) + uleb128(len(content)) + content
+
+def encodeFuncType(params: list[WasmValtype], result: Optional[WasmValtype]) -> bytes:
+    results = [] if result is None else [result]
+    return bytes([0x60]) + \
+        encodeVec([bytes([VALTYPES[t]]) for t in params]) + \
+        encodeVec([bytes([VALTYPES[t]]) for t in results])
+
+def encodeBlockType(result: Optional[WasmValtype]) -> int:
+    return EMPTY_BLOCKTYPE if result is None else VALTYPES[result]
+
+class ModuleEncoder:
+    """
+    Encodes a single WasmModule. Symbolic identifiers ($foo) are resolved to
+    indices while encoding.
+    """
+    def __init__(self, m: WasmModule):
+        self.module = m
+        self.types: list[bytes] = []
+        self.typeIdx: dict[bytes, int] = {}
+        self.funcIdx: dict[WasmId, int] = {}
+        self.globalIdx: dict[WasmId, int] = {}
+        self.dataIdx: dict[WasmId, int] = {}
+    def typeIndex(self, params: list[WasmValtype], result: Optional[WasmValtype]) -> int:
+        t = encodeFuncType(params, result)
+        i = self.typeIdx.get(t)
+        if i is None:
+            i = len(self.types)
+            self.types.append(t)
+            self.typeIdx[t] = i
+        return i
+    def encode(self) -> bytes:
+        m = self.module
+        imports: list[bytes] = []
+        for imp in m.imports:
+            prefix = encodeName(imp.module) + encodeName(imp.name)
+            match imp.desc:
+                case WasmImportFunc(id, params, result):
+                    self.funcIdx[id] = len(self.funcIdx)
+                    imports.append(prefix + bytes([0x00]) + uleb128(self.typeIndex(params, result)))
+                case WasmImportMemory(min, max):
+                    imports.append(prefix + bytes([0x02]) + encodeLimits(min, max))
+        funcs: list[bytes] = []
+        for f in m.funcs:
+            self.funcIdx[f.id] = len(self.funcIdx)
+            funcs.append(uleb128(self.typeIndex([t for (_, t) in f.params], f.result)))
+        for g in m.globals:
+            self.globalIdx[g.id] = len(self.globalIdx)
+        for (i, d) in enumerate(m.data):
+            if d.id is not None:
+                self.dataIdx[d.id] = i
+        tableElems = m.funcTable.elems
+        table = bytes([FUNCREF]) + encodeLimits(len(tableElems), len(tableElems))
+        globals = [bytes([VALTYPES[g.ty], 1 if g.mutable else 0]) + self.encodeConstExpr(g.init)
+                   for g in m.globals]
+        exports = [encodeName(e.name) + bytes([0x00]) + uleb128(self.funcIdx[e.desc.id])
+                   for e in m.exports]
+        elems: list[bytes] = []
+        if tableElems:
+            elems.append(bytes([0x00]) +
+                         self.encodeConstExpr([WasmInstrConst('i32', 0)]) +
+                         encodeVec([uleb128(self.funcIdx[i]) for i in tableElems]))
+        code = [self.encodeFunc(f) for f in m.funcs]
+        data = [self.encodeData(d) for d in m.data]
+        out = bytearray(MAGIC + VERSION)
+        # The type section must come first but is only complete after all other
+        # sections have been encoded, because call_indirect may add new types.
+        sections = [encodeSection(SECTION_IMPORT, imports),
+                    encodeSection(SECTION_FUNC, funcs),
+                    encodeSection(SECTION_TABLE, [table]),
+                    encodeSection(SECTION_GLOBAL, globals),
+                    encodeSection(SECTION_EXPORT, exports)]
+        if elems:
+            sections.append(encodeSection(SECTION_ELEM, elems))
+        if self.dataIdx:
+            # memory.init refers to data segments, so validation needs the data count
+            # before the code section.
+            content = uleb128(len(data))
+            sections.append(bytes([SECTION_DATA_COUNT]) + uleb128(len(content)) + content)
+        sections.append(encodeSection(SECTION_CODE, code))
+        if data:
+            sections.append(encodeSection(SECTION_DATA, data))
+        out += encodeSection(SECTION_TYPE, self.types)
+        for s in sections:
+            out += s
+        return bytes(out)
+    def encodeData(self, d: WasmData) -> bytes:
+        content = d.contentBytes()
+        vec = uleb128(len(content)) + content
+        if d.start is None:
+            return bytes([0x01]) + vec # passive
+        return bytes([0x00]) + self.encodeConstExpr([WasmInstrConst('i32', d.start)]) + vec
+    def encodeConstExpr(self, instrs: list[WasmInstr]) -> bytes:
+        out = bytearray()
+        FuncEncoder(self, {}, out).instrs(instrs)
+        out.append(0x0b)
+        return bytes(out)
+    def encodeFunc(self, f: WasmFunc) -> bytes:
+        localIdx: dict[WasmId, int] = {}
+        for (i, _) in f.params + f.locals:
+            localIdx[i] = len(localIdx)
+        # consecutive locals of the same type are grouped together
+        groups: list[tuple[int, WasmValtype]] = []
+        for (_, t) in f.locals:
+            if groups and groups[-1][1] == t:
+                groups[-1] = (groups[-1][0] + 1, t)
+            else:
+                groups.append((1, t))
+        out = bytearray(encodeVec([uleb128(n) + bytes([VALTYPES[t]]) for (n, t) in groups]))
+        FuncEncoder(self, localIdx, out).instrs(f.instrs)
+        out.append(0x0b)
+        return uleb128(len(out)) + bytes(out)
+
+def encodeLimits(min: int, max: Optional[int]) -> bytes:
+    if max is None:
+        return bytes([0x00]) + uleb128(min)
+    else:
+        return bytes([0x01]) + uleb128(min) + uleb128(max)
+
+class FuncEncoder:
+    """
+    Encodes the instructions of a single function body into the given bytearray.
+    """
+    def __init__(self, mod: ModuleEncoder, localIdx: dict[WasmId, int], out: bytearray):
+        self.mod = mod
+        self.localIdx = localIdx
+        self.out = out
+        # Labels of the enclosing structured instructions, innermost last.
+        # An if has no label, we use None in this case.
+        self.labels: list[Optional[WasmId]] = []
+    def labelDepth(self, target: WasmId) -> int:
+        for depth, l in enumerate(reversed(self.labels)):
+            if l == target:
+                return depth
+        raise ValueError(f'Unknown branch target: {target.id}')
+    def block(self, opcode: int, label: Optional[WasmId], result: Optional[WasmValtype],
+              body: list[WasmInstr]):
+        self.out.append(opcode)
+        self.out.append(encodeBlockType(result))
+        self.labels.append(label)
+        self.instrs(body)
+        self.labels.pop()
+        self.out.append(0x0b)
+    def instrs(self, instrs: list[WasmInstr]):
+        for i in instrs:
+            self.instr(i)
+    def instr(self, i: WasmInstr):
+        out = self.out
+        match i:
+            case WasmInstrConst('i32', val):
+                out.append(0x41)
+                out += sleb128(toSigned(int(val), 32))
+            case WasmInstrConst('i64', val):
+                out.append(0x42)
+                out += sleb128(toSigned(int(val), 64))
+            case WasmInstrConst('f32', val):
+                out.append(0x43)
+                out += struct.pack('<f', val)
+            case WasmInstrConst('f64', val):
+                out.append(0x44)
+                out += struct.pack('<d', val)
+            case WasmInstrDrop():
+                out.append(0x1a)
+            case WasmInstrNumBinOp(ty, op):
+                out.append(NUM_BIN_OPS[(ty, op)])
+            case WasmInstrIntRelOp(ty, op):
+                out.append(INT_REL_OPS[(ty, op)])
+            case WasmInstrConvOp(op):
+                out.append(CONV_OPS[op])
+            case WasmInstrCall(id):
+                out.append(0x10)
+                out += uleb128(self.mod.funcIdx[id])
+            case WasmInstrCallIndirect(params, result):
+                out.append(0x11)
+                out += uleb128(self.mod.typeIndex(params, result))
+                out.append(0x00) # table index
+            case WasmInstrVarLocal(op, id):
+                out.append(VAR_LOCAL_OPS[op])
+                out += uleb128(self.localIdx[id])
+            case WasmInstrVarGlobal(op, id):
+                out.append(VAR_GLOBAL_OPS[op])
+                out += uleb128(self.mod.globalIdx[id])
+            case WasmInstrMem(ty, op):
+                (opcode, align) = MEM_OPS[(ty, op)]
+                out.append(opcode)
+                out += uleb128(align)
+                out += uleb128(0) # offset
+            case WasmInstrBranch(target, conditional):
+                out.append(0x0d if conditional else 0x0c)
+                out += uleb128(self.labelDepth(target))
+            case WasmInstrIf(resultType, thenInstrs, elseInstrs):
+                out.append(0x04)
+                out.append(encodeBlockType(resultType))
+                self.labels.append(None)
+                self.instrs(thenInstrs)
+                if elseInstrs or resultType is not None:
+                    out.append(0x05)
+                    self.instrs(elseInstrs)
+                self.labels.pop()
+                out.append(0x0b)
+            case WasmInstrLoop(label, body):
+                self.block(0x03, label, None, body)
+            case WasmInstrBlock(label, result, body):
+                self.block(0x02, label, result, body)
+            case WasmInstrMemSize():
+                out += bytes([0x3f, 0x00])
+            case WasmInstrMemGrow():
+                out += bytes([0x40, 0x00])
+            case WasmInstrMemFill():
+                out.append(MISC_PREFIX)
+                out += uleb128(MEMORY_FILL)
+                out.append(0x00) # memory index
+            case WasmInstrMemCopy():
+                out.append(MISC_PREFIX)
+                out += uleb128(MEMORY_COPY)
+                out += bytes([0x00, 0x00]) # memory indices
+            case WasmInstrMemInit(data):
+                out.append(MISC_PREFIX)
+                out += uleb128(MEMORY_INIT)
+                out += uleb128(self.mod.dataIdx[data])
+                out.append(0x00) # memory index
+            case WasmInstrComment():
+                pass
+            case WasmInstrTrap():
+                out.append(0x00)
+            case _:
+                raise ValueError(f'cannot encode {i}')
+
+def encodeModule(m: WasmModule) -> bytes:
+    """
+    Returns the binary representation of the given module.
+    """
+    return ModuleEncoder(m).encode()
+
+def writeWasmFile(path: str, m: WasmModule):
+    with open(path, 'wb') as f:
+        f.write(encodeModule(m))
@@ -3,7 +3,7 @@ import assembly.tac_ast as tac
 import common.log as log
 from common.prioQueue import PrioQueue
 
-def chooseColor(x: tac.ident, forbidden: dict[tac.ident, set[int]]) -> int:
+def chooseColor[V](x: V, forbidden: dict[V, set[int]]) -> int:
     """
     Returns the lowest possible color for variable x that is not forbidden for x.
     """
@@ -16,29 +16,29 @@ def colorInterfGraph(g: InterfGraph, secondaryOrder: dict[tac.ident, int]={},
                      maxRegs: int=MAX_REGISTERS) -> RegisterMap:
     """
     Given an interference graph, computes a register map mapping a TAC variable
-    to a TACspill variable. You have to implement the "simple graph coloring algorithm"
-    from slide 58 here.
+    to a TACspill variable. Implements the "simple graph coloring algorithm"
+    from slide 58. Internally, the algorithm works on the integer vertex ids of g.
 
     - Parameter maxRegs is the maximum number of registers we are allowed to use.
     - Parameter secondaryOrder is used by the tests to get deterministic results even
       if two variables have the same number of forbidden colors.
     """
     log.debug(f"Coloring interference graph with maxRegs={maxRegs}")
-    colors: dict[tac.ident, int] = {}
-    forbidden: dict[tac.ident, set[int]] = {v: set() for v in g.vertices}
-    q = PrioQueue(secondaryOrder)
-    
-    for v in g.vertices:
-        q.push(v)
-    
+    n = g.numVertices
+    colors: dict[int, int] = {}
+    forbidden: dict[int, set[int]] = {i: set() for i in range(n)}
+    q = PrioQueue({g.vertexId(x): o for x, o in secondaryOrder.items() if g.hasVertex(x)})
+
+    for i in range(n):
+      q.push(i)
+
     while not q.isEmpty():
-      v = q.pop()
-      
-      color = chooseColor(v, forbidden)
-      colors[v] = color
-      for v2 in g.succs(v):
-        forbidden[v2].add(color)
-        q.incPrio(v2)
-    
-    m = RegisterAllocMap(colors, maxRegs)
+      i = q.pop()
+      color = chooseColor(i, forbidden)
+      colors[i] = color
+      for j in g.adjIds(i):
+        forbidden[j].add(color)
+        q.incPrio(j)
+
+    m = RegisterAllocMap({g.vars[i]: c for i, c in colors.items()}, maxRegs)
     return m
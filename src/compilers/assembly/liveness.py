@@ -1,5 +1,6 @@
+from typing import *
 from assembly.common import *
-from assembly.graph import Graph
+from collections import deque
 import assembly.tac_ast as tac
 
 def instrDef(instr: tac.instr) -> set[tac.ident]:
@@ -54,88 +55,186 @@ def instrUsePrim(prim: tac.prim) -> set[tac.ident]:
 # (index of basic block, index of instruction inside the basic block)
 type InstrId = tuple[int, int]
 
+class VarNumbering:
+    """
+    A dense numbering of TAC variables. A set of variables is represented as a bitset
+    (a python int): the variable with number i is in the set iff bit i is set.
+    """
+    def __init__(self):
+        self.__ids: dict[tac.ident, int] = {}
+        self.vars: list[tac.ident] = []
+    def number(self, x: tac.ident) -> int:
+        i = self.__ids.get(x)
+        if i is None:
+            i = len(self.vars)
+            self.__ids[x] = i
+            self.vars.append(x)
+        return i
+    def toBits(self, xs: Iterable[tac.ident]) -> int:
+        bits = 0
+        for x in xs:
+            bits |= 1 << self.number(x)
+        return bits
+    def toSet(self, bits: int) -> set[tac.ident]:
+        return set(self.vars[i] for i in iterBits(bits))
+
+def iterBits(bits: int) -> Iterator[int]:
+    """
+    Yields the indices of all bits set in bits.
+    """
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+class LiveSets(Mapping[InstrId, set[tac.ident]]):
+    """
+    Maps instructions to sets of live variables. The sets are stored as bitsets and
+    converted to sets of variables on access.
+    """
+    def __init__(self, vars: VarNumbering):
+        self.vars = vars
+        self.bits: dict[InstrId, int] = {}
+    def __getitem__(self, key: InstrId) -> set[tac.ident]:
+        return self.vars.toSet(self.bits[key])
+    def __setitem__(self, key: InstrId, value: set[tac.ident]):
+        self.bits[key] = self.vars.toBits(value)
+    def __iter__(self) -> Iterator[InstrId]:
+        return iter(self.bits)
+    def __len__(self) -> int:
+        return len(self.bits)
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+def postorder(g: ControlFlowGraph) -> list[int]:
+    """
+    Returns the vertices of g in postorder, starting the depth-first search at
+    the first block.
+    """
+    visited: set[int] = set()
+    order: list[int] = []
+    for root in g.vertices:
+        if root in visited:
+            continue
+        visited.add(root)
+        stack: list[tuple[int, Iterator[int]]] = [(root, iter(g.succs(root)))]
+        while stack:
+            (v, succs) = stack[-1]
+            for w in succs:
+                if w not in visited:
+                    visited.add(w)
+                    stack.append((w, iter(g.succs(w))))
+                    break
+            else:
+                stack.pop()
+                order.append(v)
+    return order
+
 class InterfGraphBuilder:
     def __init__(self):
+        self.vars = VarNumbering()
         # self.before holds, for each instruction I, to set of variables live before I.
-        self.before: dict[InstrId, set[tac.ident]] = {}
+        self.before = LiveSets(self.vars)
         # self.after holds, for each instruction I, to set of variables live after I.
-        self.after: dict[InstrId, set[tac.ident]] = {}
+        self.after = LiveSets(self.vars)
+        # For each basic block, the bitsets (def, use) of its instructions
+        self.__defUse: dict[int, list[tuple[int, int]]] = {}
+
+    def __instrBits(self, bb: BasicBlock) -> list[tuple[int, int]]:
+        l = self.__defUse.get(bb.index)
+        if l is None:
+            l = [(self.vars.toBits(instrDef(i)), self.vars.toBits(instrUse(i))) for i in bb.instrs]
+            self.__defUse[bb.index] = l
+        return l
+
+    def liveStartBits(self, bb: BasicBlock, live: int) -> int:
+        """
+        Same as liveStart, but with bitsets.
+        """
+        before = self.before.bits
+        after = self.after.bits
+        defUse = self.__instrBits(bb)
+        for i in range(len(defUse) - 1, -1, -1):
+            (d, u) = defUse[i]
+            after[(bb.index, i)] = live
+            live = (live & ~d) | u
+            before[(bb.index, i)] = live
+        return live
 
     def liveStart(self, bb: BasicBlock, s: set[tac.ident]) -> set[tac.ident]:
         """
         Given a set of variables s and a basic block bb, liveStart computes
         the set of variables live at the beginning of bb, assuming that s
-        are the variables live at the end of the block.
-
-        Essentially, you have to implement the subalgorithm "Computing L_start" from
-        slide 46 here. You should update self.after and self.before while traversing
-        the instructions of the basic block in reverse.
+        are the variables live at the end of the block. It updates self.after
+        and self.before while traversing the instructions of the basic block in reverse.
         """
-        n = len(bb.instrs) - 1
+        return self.vars.toSet(self.liveStartBits(bb, self.vars.toBits(s)))
 
-        if len(bb.instrs) == 0:
-            return set()
-        
-        for i in range(n, -1, -1):
-            instr = bb.instrs[i]
-            if i == n:
-                self.after[(bb.index,i)] = s
-            else:
-                self.after[(bb.index,i)] = self.before[(bb.index,i+1)]
-                
-            self.before[(bb.index, i)] = self.after[(bb.index, i)].difference(instrDef(instr)).union(instrUse(instr))
-        return self.before[(bb.index, 0)]
+    def __blockSummary(self, bb: BasicBlock) -> tuple[int, int]:
+        """
+        Returns bitsets (gen, kill) such that the variables live at the start
+        of bb are gen | (out & ~kill), where out are the variables live at the end of bb.
+        """
+        gen = 0
+        kill = 0
+        for (d, u) in reversed(self.__instrBits(bb)):
+            gen = (gen & ~d) | u
+            kill |= d
+        return (gen, kill)
 
     def liveness(self, g: ControlFlowGraph):
         """
         This method computes liveness information and fills the sets self.before and
         self.after.
 
-        You have to implement the algorithm for computing liveness in a CFG from
-        slide 46 here.
+        It uses a worklist: initially, all blocks are in the worklist, in postorder (that
+        is, reverse postorder for the backward liveness problem). Whenever the
+        live-in set of a block changes, its predecessors are added to the worklist again.
+        The live sets of the individual instructions are computed once at the end.
         """
-        
-        insets: dict[int, set[tac.ident]] = {v: set() for v in g.vertices}
-        insets_before: dict[int,set[tac.ident]] = {}
-        
-        while insets != insets_before:
-            insets_before = insets.copy()
-            for vertex in g.vertices: 
-                out: set[tac.ident] = set()
-                
-                for bs in g.succs(vertex):
-                    out = out.union(insets[bs])
-                
-                insets[vertex] = self.liveStart(g.getData(vertex), out)
-        
+        succs = {v: g.succs(v) for v in g.vertices}
+        summaries = {v: self.__blockSummary(g.getData(v)) for v in g.vertices}
+        liveIn = {v: 0 for v in g.vertices}
+        order = postorder(g)
+        worklist = deque(order)
+        queued = set(order)
+        while worklist:
+            v = worklist.popleft()
+            queued.discard(v)
+            out = 0
+            for w in succs[v]:
+                out |= liveIn[w]
+            (gen, kill) = summaries[v]
+            new = gen | (out & ~kill)
+            if new != liveIn[v]:
+                liveIn[v] = new
+                for p in g.preds(v):
+                    if p not in queued:
+                        queued.add(p)
+                        worklist.append(p)
+        for v in g.vertices:
+            out = 0
+            for w in succs[v]:
+                out |= liveIn[w]
+            self.liveStartBits(g.getData(v), out)
 
     def __addEdgesForInstr(self, instrId: InstrId, instr: tac.instr, interfG: InterfGraph):
         """
         Given an instruction and its ID, adds the edges resulting from the instruction
         to the interference graph.
-
-        You should implement the algorithm specified on the slide
-        "Computing the interference graph" (slide 50) here.
         """
+        # The ids of the interference graph are the numbers of self.vars
         for x in instrDef(instr):
-            for y in self.after[instrId]:
-                if x == y:
-                    continue
-                match instr:
-                    case tac.Assign(ident, right):
-                        match right:
-                            case tac.Prim(p):
-                                match p:
-                                    case tac.Name(var):
-                                        if x == ident and y == var:
-                                            continue
-                                    case _:
-                                        pass
-                            case _:
-                                pass
-                    case _:
-                        pass
-                interfG.addEdge(x,y)
+            xi = self.vars.number(x)
+            live = self.after.bits[instrId] & ~(1 << xi)
+            match instr:
+                case tac.Assign(_, tac.Prim(tac.Name(y))):
+                    # No conflict between x and y for a move x = y
+                    live &= ~(1 << self.vars.number(y))
+                case _:
+                    pass
+            for i in iterBits(live):
+                interfG.addEdgeIds(xi, i)
 
     def build(self, g: ControlFlowGraph) -> InterfGraph:
         """
@@ -148,22 +247,11 @@ class InterfGraphBuilder:
         - Use __addEdgesForInstr to fill the edges of the interference graph.
         """
         self.liveness(g)
-        
-        interfGraph: InterfGraph = Graph(kind="undirected")
-        
+        interfGraph = InterfGraph(self.vars.vars)
         for vertex in g.vertices:
             block: BasicBlock = g.getData(vertex)
-            for instr in block.instrs:
-                vars = instrUse(instr).union(instrDef(instr))
-                for var in vars:
-                    if not interfGraph.hasVertex(var):
-                        interfGraph.addVertex(var, None)
-        
-        for vertex in g.vertices:
-            block:BasicBlock = g.getData(vertex)
-            for i,instr in enumerate(block.instrs):
-                self.__addEdgesForInstr((block.index,i),instr,interfGraph)
-        
+            for i, instr in enumerate(block.instrs):
+                self.__addEdgesForInstr((block.index, i), instr, interfGraph)
         return interfGraph
 
 def buildInterfGraph(g: ControlFlowGraph) -> InterfGraph:
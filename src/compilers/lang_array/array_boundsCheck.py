@@ -0,0 +1,412 @@
+"""
+Bounds-check elimination for the array compiler.
+
+The analysis runs over the array_astAtom IR and determines, for every Subscript and
+SubscriptAssign, whether the check index >= 0 and the check index < len(array) are needed.
+It is a forward analysis over the structured statements. The facts are
+
+- nonNeg: variables known to be >= 0,
+- constVal: variables with a known constant value,
+- constLen: array variables with a known length,
+- lenOf: variables holding the length of some array variable,
+- below: pairs (i, a) with 0 <= i < len(a), i is a variable or a constant,
+- atMost: pairs (i, a) with i <= len(a).
+
+Assigning to a variable kills all facts mentioning the variable. Arrays never change their
+length, so writing to an array element kills nothing. For a while loop, the facts at the
+head of the loop are the facts before the loop without the facts about variables assigned
+in the body. Induction variables x incremented by x = x + c (0 <= c <= MAX_STEP) stay
+non-negative if x is non-negative and bounded before the loop. Likewise, x = y + c is only
+non-negative if y is non-negative and bounded, otherwise y + c might wrap around. If the
+loop condition is x != len(a) or x < len(a) and x is incremented by one, x <= len(a) is an
+invariant of the loop.
+"""
+
+from lang_array.array_astAtom import *
+from typing import *
+from dataclasses import dataclass
+
+type IndexKey = ident | int
+
+# Adding at most MAX_STEP to a non-negative variable bounded by MAX_BOUND cannot make it
+# negative by overflow in any feasible number of iterations.
+MAX_STEP = 2 ** 16
+MAX_BOUND = 2 ** 32
+
+@dataclass(frozen=True)
+class Checks:
+    lower: bool # check index >= 0
+    upper: bool # check index < len(array)
+
+ALL_CHECKS = Checks(True, True)
+
+class BoundsChecks:
+    """
+    The result of the analysis: the checks needed for each Subscript and SubscriptAssign.
+    """
+    def __init__(self):
+        self.__checks: dict[int, Checks] = {}
+    def set(self, node: Subscript | SubscriptAssign, c: Checks):
+        self.__checks[id(node)] = c
+    def get(self, node: Subscript | SubscriptAssign) -> Checks:
+        return self.__checks.get(id(node), ALL_CHECKS)
+    def counts(self) -> tuple[int, int]:
+        """
+        Returns the number of checks needed and the number of checks eliminated.
+        """
+        needed = sum(int(c.lower) + int(c.upper) for c in self.__checks.values())
+        return (needed, 2 * len(self.__checks) - needed)
+
+class Facts:
+    def __init__(self):
+        self.nonNeg: set[ident] = set()
+        self.constVal: dict[ident, int] = {}
+        self.constLen: dict[ident, int] = {}
+        self.lenOf: dict[ident, ident] = {}
+        self.below: set[tuple[IndexKey, ident]] = set()
+        self.atMost: set[tuple[IndexKey, ident]] = set()
+    def copy(self) -> 'Facts':
+        f = Facts()
+        f.nonNeg = set(self.nonNeg)
+        f.constVal = dict(self.constVal)
+        f.constLen = dict(self.constLen)
+        f.lenOf = dict(self.lenOf)
+        f.below = set(self.below)
+        f.atMost = set(self.atMost)
+        return f
+    def meet(self, other: 'Facts') -> 'Facts':
+        """
+        Returns the facts that hold in self and in other.
+        """
+        def meetDict[K, V](d1: dict[K, V], d2: dict[K, V]) -> dict[K, V]:
+            return {k: v for (k, v) in d1.items() if d2.get(k) == v}
+        f = Facts()
+        f.nonNeg = self.nonNeg & other.nonNeg
+        f.constVal = meetDict(self.constVal, other.constVal)
+        f.constLen = meetDict(self.constLen, other.constLen)
+        f.lenOf = meetDict(self.lenOf, other.lenOf)
+        f.below = self.below & other.below
+        f.atMost = self.atMost & other.atMost
+        return f
+    def kill(self, x: ident):
+        self.nonNeg.discard(x)
+        self.constVal.pop(x, None)
+        self.constLen.pop(x, None)
+        self.lenOf = {n: a for (n, a) in self.lenOf.items() if n != x and a != x}
+        self.below = {(i, a) for (i, a) in self.below if i != x and a != x}
+        self.atMost = {(i, a) for (i, a) in self.atMost if i != x and a != x}
+    def isNonNeg(self, i: IndexKey) -> bool:
+        match i:
+            case int(): return i >= 0
+            case Ident(): return i in self.nonNeg or self.constVal.get(i, -1) >= 0
+    def isBounded(self, i: IndexKey) -> bool:
+        """
+        Is i <= MAX_BOUND? Lengths of arrays are always bounded.
+        """
+        v = i if isinstance(i, int) else self.constVal.get(i)
+        if v is not None:
+            return v <= MAX_BOUND
+        return i in self.lenOf or any(i == j for (j, _) in self.below | self.atMost)
+    def isBelow(self, i: IndexKey, a: ident) -> bool:
+        """
+        Is 0 <= i < len(a)?
+        """
+        if (i, a) in self.below:
+            return True
+        n = self.constLen.get(a)
+        if n is None:
+            return False
+        v = i if isinstance(i, int) else self.constVal.get(i)
+        if v is not None:
+            return 0 <= v < n
+        # i < len(b) <= len(a)
+        return any(i == j and self.constLen.get(b, n + 1) <= n for (j, b) in self.below)
+    def isAtMost(self, i: IndexKey, a: ident) -> bool:
+        """
+        Is i <= len(a)?
+        """
+        if (i, a) in self.atMost or self.isBelow(i, a):
+            return True
+        v = i if isinstance(i, int) else self.constVal.get(i)
+        return v is not None and (v <= 0 or v <= self.constLen.get(a, -1))
+
+def _indexKey(e: atomExp) -> Optional[IndexKey]:
+    match e:
+        case IntConst(k): return k
+        case Name(x): return x
+        case _: return None
+
+def _arrayVar(e: atomExp) -> Optional[ident]:
+    match e:
+        case Name(a): return a
+        case _: return None
+
+def _lenArg(e: exp, facts: Facts) -> Optional[ident]:
+    """
+    Returns a if e is len(a) or a variable holding len(a).
+    """
+    match e:
+        case Call(Ident('len'), [AtomExp(Name(a))]):
+            return a
+        case AtomExp(Name(n)):
+            return facts.lenOf.get(n)
+        case _:
+            return None
+
+def _nameOf(e: exp) -> Optional[ident]:
+    match e:
+        case AtomExp(Name(x)): return x
+        case _: return None
+
+def _negate(op: binaryop) -> Optional[binaryop]:
+    match op:
+        case Less(): return GreaterEq()
+        case GreaterEq(): return Less()
+        case LessEq(): return Greater()
+        case Greater(): return LessEq()
+        case Eq(): return NotEq()
+        case NotEq(): return Eq()
+        case _: return None
+
+def _mirror(op: binaryop) -> Optional[binaryop]:
+    """
+    Returns op' such that l op r is equivalent to r op' l.
+    """
+    match op:
+        case Less(): return Greater()
+        case Greater(): return Less()
+        case LessEq(): return GreaterEq()
+        case GreaterEq(): return LessEq()
+        case Eq() | NotEq(): return op
+        case _: return None
+
+def _relFacts(x: ident, op: binaryop, right: exp, facts: Facts):
+    """
+    Adds the facts implied by x op right.
+    """
+    a = _lenArg(right, facts)
+    match op:
+        case Less() if a is not None:
+            if facts.isNonNeg(x):
+                facts.below.add((x, a))
+            facts.atMost.add((x, a))
+        case LessEq() if a is not None:
+            facts.atMost.add((x, a))
+        case NotEq() if a is not None:
+            if facts.isNonNeg(x) and facts.isAtMost(x, a):
+                facts.below.add((x, a))
+        case GreaterEq():
+            match right:
+                case AtomExp(IntConst(k)) if k >= 0: facts.nonNeg.add(x)
+                case _: pass
+        case Greater():
+            match right:
+                case AtomExp(IntConst(k)) if k >= -1: facts.nonNeg.add(x)
+                case _: pass
+        case _:
+            pass
+
+def condFacts(cond: exp, positive: bool, facts: Facts):
+    """
+    Adds the facts implied by cond evaluating to positive.
+    """
+    match cond:
+        case UnOp(Not(), sub):
+            condFacts(sub, not positive, facts)
+        case BinOp(l, And(), r) if positive:
+            condFacts(l, True, facts)
+            condFacts(r, True, facts)
+        case BinOp(l, Or(), r) if not positive:
+            condFacts(l, False, facts)
+            condFacts(r, False, facts)
+        case BinOp(l, op, r):
+            op2 = op if positive else _negate(op)
+            if op2 is None:
+                return
+            x = _nameOf(l)
+            if x is not None:
+                _relFacts(x, op2, r, facts)
+            y = _nameOf(r)
+            op3 = _mirror(op2)
+            if y is not None and op3 is not None:
+                _relFacts(y, op3, l, facts)
+        case _:
+            pass
+
+def _assignedVars(stmts: list[stmt], acc: dict[ident, list[tuple[exp, bool]]], nested: bool):
+    """
+    Collects the right-hand sides of all assignments in stmts. The flag is True for
+    assignments inside a nested loop.
+    """
+    for s in stmts:
+        match s:
+            case Assign(x, e):
+                acc.setdefault(x, []).append((e, nested))
+            case IfStmt(_, thenBody, elseBody):
+                _assignedVars(thenBody, acc, nested)
+                _assignedVars(elseBody, acc, nested)
+            case WhileStmt(_, body):
+                _assignedVars(body, acc, True)
+            case _:
+                pass
+
+def _increment(x: ident, e: exp) -> Optional[int]:
+    """
+    Returns c if e is x + c or c + x.
+    """
+    match e:
+        case BinOp(AtomExp(Name(y)), Add(), AtomExp(IntConst(c))) if x == y:
+            return c
+        case BinOp(AtomExp(IntConst(c)), Add(), AtomExp(Name(y))) if x == y:
+            return c
+        case _:
+            return None
+
+class Analysis:
+    def __init__(self):
+        self.checks = BoundsChecks()
+
+    def access(self, node: Subscript | SubscriptAssign, array: atomExp, index: atomExp,
+               facts: Facts):
+        a = _arrayVar(array)
+        i = _indexKey(index)
+        if a is None or i is None:
+            self.checks.set(node, ALL_CHECKS)
+            return
+        c = Checks(not facts.isNonNeg(i), not facts.isBelow(i, a))
+        self.checks.set(node, c)
+        # If the access succeeds, the index is in range
+        if isinstance(i, Ident):
+            facts.nonNeg.add(i)
+        facts.below.add((i, a))
+
+    def exp(self, e: exp, facts: Facts):
+        match e:
+            case AtomExp(_) | ArrayInitDyn() | ArrayInitStatic():
+                pass
+            case Call(_, args):
+                for arg in args:
+                    self.exp(arg, facts)
+            case UnOp(_, arg):
+                self.exp(arg, facts)
+            case BinOp(l, And() | Or(), r):
+                self.exp(l, facts)
+                # The right operand is not always evaluated
+                self.exp(r, facts.copy())
+            case BinOp(l, _, r):
+                self.exp(l, facts)
+                self.exp(r, facts)
+            case Subscript(array, index):
+                self.access(e, array, index, facts)
+
+    def assign(self, x: ident, e: exp, facts: Facts):
+        self.exp(e, facts)
+        nonNeg = False
+        constVal: Optional[int] = None
+        constLen: Optional[int] = None
+        lenOf: Optional[ident] = None
+        match e:
+            case AtomExp(IntConst(k)):
+                constVal = k
+            case AtomExp(Name(y)):
+                nonNeg = y in facts.nonNeg
+                constVal = facts.constVal.get(y)
+                constLen = facts.constLen.get(y)
+                lenOf = facts.lenOf.get(y)
+            case Call(Ident('len'), [AtomExp(Name(a))]):
+                nonNeg = True
+                lenOf = a
+            case ArrayInitStatic(elems):
+                constLen = len(elems)
+            case ArrayInitDyn(IntConst(k), _):
+                constLen = k
+            case ArrayInitDyn(Name(n), _):
+                constLen = facts.constVal.get(n)
+            case BinOp(AtomExp(Name(y)), Add(), AtomExp(IntConst(c))) | \
+                 BinOp(AtomExp(IntConst(c)), Add(), AtomExp(Name(y))):
+                nonNeg = facts.isNonNeg(y) and facts.isBounded(y) and 0 <= c <= MAX_STEP
+            case _:
+                pass
+        facts.kill(x)
+        if constVal is not None:
+            facts.constVal[x] = constVal
+        if nonNeg or (constVal is not None and constVal >= 0):
+            facts.nonNeg.add(x)
+        if constLen is not None:
+            facts.constLen[x] = constLen
+        if lenOf is not None and lenOf != x:
+            facts.lenOf[x] = lenOf
+
+    def loopHead(self, cond: exp, body: list[stmt], facts: Facts) -> Facts:
+        """
+        Returns the facts that hold at the head of the loop.
+        """
+        assigned: dict[ident, list[tuple[exp, bool]]] = {}
+        _assignedVars(body, assigned, False)
+        head = facts.copy()
+        for x in assigned:
+            head.kill(x)
+        for (x, rhss) in assigned.items():
+            incs = [_increment(x, e) for (e, _) in rhss]
+            if any(c is None or not 0 <= c <= MAX_STEP for c in incs) or \
+                    not facts.isNonNeg(x) or not facts.isBounded(x):
+                continue
+            head.nonNeg.add(x)
+            if len(rhss) != 1 or incs[0] != 1 or rhss[0][1]:
+                continue
+            # x is incremented by one in each iteration, x <= len(a) is an invariant if
+            # it holds before the loop and the loop only runs for x != len(a) or x < len(a).
+            a: Optional[ident]
+            match cond:
+                case BinOp(l, NotEq() | Less(), r) if _nameOf(l) == x:
+                    a = _lenArg(r, head)
+                case BinOp(l, NotEq() | Greater(), r) if _nameOf(r) == x:
+                    a = _lenArg(l, head)
+                case _:
+                    a = None
+            if a is not None and a not in assigned and facts.isAtMost(x, a):
+                head.atMost.add((x, a))
+        return head
+
+    def stmt(self, s: stmt, facts: Facts) -> Facts:
+        match s:
+            case StmtExp(e):
+                self.exp(e, facts)
+                return facts
+            case Assign(x, e):
+                self.assign(x, e, facts)
+                return facts
+            case IfStmt(cond, thenBody, elseBody):
+                self.exp(cond, facts)
+                thenFacts = facts.copy()
+                condFacts(cond, True, thenFacts)
+                elseFacts = facts
+                condFacts(cond, False, elseFacts)
+                thenFacts = self.stmts(thenBody, thenFacts)
+                elseFacts = self.stmts(elseBody, elseFacts)
+                return thenFacts.meet(elseFacts)
+            case WhileStmt(cond, body):
+                head = self.loopHead(cond, body, facts)
+                self.exp(cond, head)
+                bodyFacts = head.copy()
+                condFacts(cond, True, bodyFacts)
+                self.stmts(body, bodyFacts)
+                condFacts(cond, False, head)
+                return head
+            case SubscriptAssign(left, index, right):
+                self.access(s, left, index, facts)
+                self.exp(right, facts)
+                return facts
+
+    def stmts(self, stmts: list[stmt], facts: Facts) -> Facts:
+        for s in stmts:
+            facts = self.stmt(s, facts)
+        return facts
+
+def analyzeStmts(stmts: list[stmt]) -> BoundsChecks:
+    """
+    Determines the bounds checks needed for the array accesses in stmts.
+    """
+    a = Analysis()
+    a.stmts(stmts, Facts())
+    return a.checks
@@ -3,17 +3,25 @@ import lang_array.array_ast as plainAst
 from common.wasm import *
 import lang_array.array_tychecker as array_tychecker
 import lang_array.array_transform as array_transform
+import compilers.lang_array.array_boundsCheck as array_boundsCheck
+import compilers.lang_array.array_gc as array_gc
+from compilers.lang_array.array_gc import Gc
 from lang_array.array_compilerSupport import *
 from common.compilerSupport import *
 
 config: CompilerConfig
+boundsChecks: array_boundsCheck.BoundsChecks
+# Passive data segments with the elements of constant static arrays
+staticData: dict[bytes, WasmId]
 
 def compileModule(m: plainAst.mod, cfg: CompilerConfig) -> WasmModule:
-    global config
+    global config, boundsChecks, staticData
     config = cfg
+    staticData = {}
     vars = array_tychecker.tycheckModule(m)
     ctx = array_transform.Ctx()
     stmts = array_transform.transStmts(m.stmts, ctx)
+    boundsChecks = array_boundsCheck.analyzeStmts(stmts)
     instrs = compileStmts(stmts)
     idMain = WasmId("$main")
     
@@ -21,14 +29,18 @@ def compileModule(m: plainAst.mod, cfg: CompilerConfig) -> WasmModule:
     freshLocals: list[tuple[WasmId, WasmValtype]] = [(identToWasmId(id), "i64" if type(ty) == Int else "i32") for id,ty in ctx.freshVars.items()]
     locals += freshLocals
     locals += Locals.decls()
+    #array variables are mirrored in globals, the roots of the garbage collector
+    allVars = list(vars.types()) + list(ctx.freshVars.items())
+    roots = [Gc.rootId(id.name) for id,ty in allVars if isinstance(ty, Array)] + [Gc.tmpRoot]
     
     return WasmModule(
         imports=wasmImports(cfg.maxMemSize),
         exports=[WasmExport("main", WasmExportFunc(idMain))],
-        globals=Globals.decls(),
-        data=Errors.data(),
+        globals=Globals.decls() + array_gc.globalDecls(roots),
+        data=Errors.data() + [WasmData(None, b, id) for (b, id) in staticData.items()],
         funcTable=WasmFuncTable([]),
-        funcs=[WasmFunc(idMain, [], None, locals,instrs)])
+        funcs=[WasmFunc(idMain, [], None, locals,instrs)] + Errors.funcs() \
+            + array_gc.funcs(roots, cfg.maxMemSize))
     
 def compileStmts(stmts: list[stmt]) -> list[WasmInstr]:
     res: list[WasmInstr] = []
@@ -49,7 +61,7 @@ def compileStmt(stmt: stmt) -> list[WasmInstr]:
         case WhileStmt(cond, body):
             return compileWhile(cond, body)
         case SubscriptAssign(left,index,right):
-            return compileSubscriptAssign(left,index,right)
+            return compileSubscriptAssign(left,index,right,boundsChecks.get(stmt))
         
 
 def compileWhile(cond: exp, body: list[stmt]) -> list[WasmInstr]:
@@ -89,43 +101,90 @@ def compileExp(exp: exp) -> list[WasmInstr]:
         case ArrayInitStatic(elemInit):
             return compileArrayInitStatic(elemInit)
         case Subscript(array, index):
-            return compileSubscript(array, index)
+            return compileSubscript(array, index, boundsChecks.get(exp))
         
+#bytes of a constant element in memory, None if the element is not constant
+def constElemBytes(elem: atomExp) -> Optional[bytes]:
+    match elem:
+        case IntConst(value):
+            return (value & (2**64 - 1)).to_bytes(8, "little")
+        case BoolConst(value):
+            return (1 if value else 0).to_bytes(4, "little")
+        case Name():
+            return None
+
 def compileArrayInitDyn(len: atomExp, elemInit: atomExp) -> list[WasmInstr]:
     res: list[WasmInstr] = []
     elementSize = 8 if asTy(elemInit.ty) == Int() else 4
     dtype: WasmValtype = "i64" if asTy(elemInit.ty) == Int() else "i32"
 
-    whileBody: list[WasmInstr] = [
-        WasmInstrVarLocal("get",Locals.tmp_i32),
-        WasmInstrVarGlobal("get", Globals.freePtr),
-        WasmInstrIntRelOp("i32","lt_u"),
-        WasmInstrIf(None,[],[
-            WasmInstrBranch(identToWasmId(Ident("loop_exit")),False)
-            ]),
-        WasmInstrVarLocal("get",Locals.tmp_i32)
-    ]
-    whileBody += compileAtomicExp(elemInit)
-    whileBody += [
-        WasmInstrMem(dtype,"store"),
-        WasmInstrVarLocal("get",Locals.tmp_i32),
-        WasmInstrConst("i32", elementSize),
-        WasmInstrNumBinOp("i32", "add"),
-        WasmInstrVarLocal("set",Locals.tmp_i32),
-        WasmInstrBranch(identToWasmId(Ident("loop_start")), False)
-    ]
-
     res += compileInitArray(len, asTy(elemInit.ty))
+    #the elements start at the address after the header
     res += [
         WasmInstrVarLocal("tee", Locals.tmp_i32),
         WasmInstrVarLocal("get", Locals.tmp_i32),
         WasmInstrConst("i32",4),
         WasmInstrNumBinOp("i32","add"),
-        WasmInstrVarLocal("set", Locals.tmp_i32),
-        WasmInstrBlock(identToWasmId(Ident("loop_exit")),None,[
-            WasmInstrLoop(identToWasmId(Ident("loop_start")),whileBody)
-        ])
+        WasmInstrVarLocal("set", Locals.initDst),
+    ]
+    res += compileLength(len)
+    res += [
+        WasmInstrConst("i32", elementSize),
+        WasmInstrNumBinOp("i32","mul"),
+        WasmInstrVarLocal("set", Locals.initSize),
     ]
+
+    elemBytes = constElemBytes(elemInit)
+    if elemBytes is not None and elemBytes == bytes([elemBytes[0]]) * elementSize:
+        #all bytes of the element are equal (e.g. 0 or -1), a single fill suffices
+        res += [
+            WasmInstrVarLocal("get", Locals.initDst),
+            WasmInstrConst("i32", elemBytes[0]),
+            WasmInstrVarLocal("get", Locals.initSize),
+            WasmInstrMemFill()
+        ]
+    else:
+        #store the first element, then double the initialized prefix with memory.copy
+        #until the array is full. This needs O(log n) iterations.
+        copyBody: list[WasmInstr] = [
+            WasmInstrVarLocal("get", Locals.initDone),
+            WasmInstrVarLocal("get", Locals.initSize),
+            WasmInstrIntRelOp("i32","ge_u"),
+            WasmInstrBranch(WasmId("$init_exit"), True),
+            #memory.copy(dst + done, dst, min(done, size - done))
+            WasmInstrVarLocal("get", Locals.initDst),
+            WasmInstrVarLocal("get", Locals.initDone),
+            WasmInstrNumBinOp("i32","add"),
+            WasmInstrVarLocal("get", Locals.initDst),
+            WasmInstrVarLocal("get", Locals.initSize),
+            WasmInstrVarLocal("get", Locals.initDone),
+            WasmInstrNumBinOp("i32","sub"),
+            WasmInstrVarLocal("tee", Locals.tmp_i32),
+            WasmInstrVarLocal("get", Locals.initDone),
+            WasmInstrIntRelOp("i32","lt_u"),
+            WasmInstrIf("i32",
+                        [WasmInstrVarLocal("get", Locals.tmp_i32)],
+                        [WasmInstrVarLocal("get", Locals.initDone)]),
+            WasmInstrMemCopy(),
+            WasmInstrVarLocal("get", Locals.initDone),
+            WasmInstrVarLocal("get", Locals.initDone),
+            WasmInstrNumBinOp("i32","add"),
+            WasmInstrVarLocal("set", Locals.initDone),
+            WasmInstrBranch(WasmId("$init_start"), False)
+        ]
+        res += [
+            WasmInstrVarLocal("get", Locals.initSize),
+            WasmInstrIf(None, [
+                WasmInstrVarLocal("get", Locals.initDst)
+            ] + compileAtomicExp(elemInit) + [
+                WasmInstrMem(dtype,"store"),
+                WasmInstrConst("i32", elementSize),
+                WasmInstrVarLocal("set", Locals.initDone),
+                WasmInstrBlock(WasmId("$init_exit"),None,[
+                    WasmInstrLoop(WasmId("$init_start"),copyBody)
+                ])
+            ], [])
+        ]
     
     return res
 
@@ -135,6 +194,22 @@ def compileArrayInitStatic(elemInit: list[atomExp]) -> list[WasmInstr]:
     dtype = "i64" if asTy(elemInit[0].ty) == Int() else "i32"
     
     res += compileInitArray(IntConst(len(elemInit)), asTy(elemInit[0].ty))
+
+    elemBytes = [constElemBytes(elem) for elem in elemInit]
+    if all(b is not None for b in elemBytes):
+        #constant elements are copied from a passive data segment
+        content = b"".join(b for b in elemBytes if b is not None)
+        dataId = staticData.setdefault(content, WasmId(f"$@array_data_{len(staticData)}"))
+        res += [
+            WasmInstrVarLocal("tee", Locals.tmp_i32),
+            WasmInstrConst("i32",4),
+            WasmInstrNumBinOp("i32","add"),
+            WasmInstrConst("i32",0),
+            WasmInstrConst("i32",len(content)),
+            WasmInstrMemInit(dataId),
+            WasmInstrVarLocal("get", Locals.tmp_i32)
+        ]
+        return res
     for index, elem in enumerate(elemInit):
         offset = 4 + elementSize * index
         res += [
@@ -146,9 +221,10 @@ def compileArrayInitStatic(elemInit: list[atomExp]) -> list[WasmInstr]:
         res += compileAtomicExp(elem) + [WasmInstrMem(dtype,"store")]
     return res
         
-def compileSubscript(array: atomExp, index: atomExp) -> list[WasmInstr]:
+def compileSubscript(array: atomExp, index: atomExp,
+                     checks: array_boundsCheck.Checks) -> list[WasmInstr]:
     res: List[WasmInstr] = []
-    res += arrayOffsetInstrs(array, index)
+    res += arrayOffsetInstrs(array, index, checks)
     
     match array.ty:
         case Array(elemTy): 
@@ -161,9 +237,10 @@ def compileSubscript(array: atomExp, index: atomExp) -> list[WasmInstr]:
         
     return res
 
-def compileSubscriptAssign(left: atomExp, index: atomExp, right: exp) -> list[WasmInstr]:
+def compileSubscriptAssign(left: atomExp, index: atomExp, right: exp,
+                           checks: array_boundsCheck.Checks) -> list[WasmInstr]:
     res: List[WasmInstr] = []
-    res += arrayOffsetInstrs(left, index)
+    res += arrayOffsetInstrs(left, index, checks)
     
     res += compileExp(right)
     
@@ -179,7 +256,8 @@ def compileSubscriptAssign(left: atomExp, index: atomExp, right: exp) -> list[Wa
     
     return res
  
-def arrayOffsetInstrs(array: atomExp, index: atomExp) -> list[WasmInstr]:
+def arrayOffsetInstrs(array: atomExp, index: atomExp,
+                      checks: array_boundsCheck.Checks) -> list[WasmInstr]:
     res: List[WasmInstr] = []
     elementSize = 8
     match array.ty:
@@ -188,22 +266,25 @@ def arrayOffsetInstrs(array: atomExp, index: atomExp) -> list[WasmInstr]:
         case _:
             raise ValueError
     
-    #check index < 0
-    res += compileAtomicExp(index)
-    res += [
-        WasmInstrConst("i64",0),
-        WasmInstrIntRelOp("i64","lt_s"),
-        WasmInstrIf(None,Errors.outputError(Errors.arrayIndexOutOfBounds) + [WasmInstrTrap()],[])
-    ]
-    
-    res += compileAtomicExp(array)
-    res += arrayLenInstrs()
-    #error if length <= index
-    res += compileAtomicExp(index)
-    res += [
-        WasmInstrIntRelOp("i64","le_s"),
-        WasmInstrIf(None, Errors.outputError(Errors.arrayIndexOutOfBounds) + [WasmInstrTrap()],[])
-    ]
+    #checks not proved redundant by the bounds-check analysis
+    if checks.upper:
+        #error if length <= index. As unsigned numbers, a negative index is larger than any
+        #length, so a single unsigned comparison also checks index < 0.
+        res += compileAtomicExp(array)
+        res += arrayLenInstrs()
+        res += compileAtomicExp(index)
+        res += [
+            WasmInstrIntRelOp("i64","le_u"),
+            WasmInstrIf(None, Errors.raiseError(Errors.arrayIndexOutOfBounds),[])
+        ]
+    elif checks.lower:
+        #error if index < 0
+        res += compileAtomicExp(index)
+        res += [
+            WasmInstrConst("i64",0),
+            WasmInstrIntRelOp("i64","lt_s"),
+            WasmInstrIf(None, Errors.raiseError(Errors.arrayIndexOutOfBounds),[])
+        ]
     
     res += compileAtomicExp(array)
     res += compileAtomicExp(index)
@@ -225,14 +306,20 @@ def compileInitArray(len: atomExp, elemInitType: ty) -> list[WasmInstr]:
     res: list[WasmInstr] = []
     
     elementSize = 8 if elemInitType == Int() else 4
-    headerVal = 1 if elemInitType == Int() or elemInitType == Bool() else 3
+    match elemInitType:
+        case Int():
+            headerVal = array_gc.header('int')
+        case Bool():
+            headerVal = array_gc.header('bool')
+        case _:
+            headerVal = array_gc.header('array')
     
     #check length > 0
     res += compileLength(len)
     res += [
         WasmInstrConst("i32",0),
         WasmInstrIntRelOp("i32","lt_s"),
-        WasmInstrIf(None,Errors.outputError(Errors.arraySize) + [WasmInstrTrap()],[])
+        WasmInstrIf(None, Errors.raiseError(Errors.arraySize),[])
     ]
     
     #check length < max
@@ -242,37 +329,29 @@ def compileInitArray(len: atomExp, elemInitType: ty) -> list[WasmInstr]:
         WasmInstrNumBinOp("i32","mul"),
         WasmInstrConst("i32", config.maxArraySize),
         WasmInstrIntRelOp("i32","gt_s"),
-        WasmInstrIf(None, Errors.outputError(Errors.arraySize) + [WasmInstrTrap()],[])
+        WasmInstrIf(None, Errors.raiseError(Errors.arraySize),[])
     ]
     
-    res += [WasmInstrVarGlobal("get", Globals.freePtr)]
+    #size in bytes
+    res += compileLength(len)
+    res += [
+        WasmInstrConst("i32", elementSize),
+        WasmInstrNumBinOp("i32","mul"),
+        WasmInstrConst("i32",4),
+        WasmInstrNumBinOp("i32","add")
+    ]
             
     #compute header value
     res += compileLength(len)
     res += [
-        WasmInstrConst("i32", 4),
+        WasmInstrConst("i32", array_gc.HEADER_LEN_SHIFT),
         WasmInstrNumBinOp("i32","shl"),
         WasmInstrConst("i32",headerVal),
         WasmInstrNumBinOp("i32","xor")
     ]
     
-    #store header
-    res += [
-        WasmInstrMem("i32", "store")
-    ]
-    
-    #move free pointer and return array address
-    res += [WasmInstrVarGlobal("get", Globals.freePtr)]
-    res += compileLength(len)
-    res += [
-        WasmInstrConst("i32", elementSize),
-        WasmInstrNumBinOp("i32","mul"),
-        WasmInstrConst("i32",4),
-        WasmInstrNumBinOp("i32","add"),
-        WasmInstrVarGlobal("get",Globals.freePtr),
-        WasmInstrNumBinOp("i32","add"),
-        WasmInstrVarGlobal("set",Globals.freePtr)
-    ]
+    #allocate, store the header and return the array address
+    res += [WasmInstrCall(Gc.alloc)]
     
     return res
 
@@ -368,10 +447,22 @@ def compileBinOp(left: exp, op: binaryop, right: exp) -> list[WasmInstr]:
         case Or():
             return compileExp(left) + [WasmInstrIf("i32",[WasmInstrConst("i32",1)], compileExp(right))]
         
+    if isinstance(tyOfExp(left), Array):
+        #the right operand may allocate, so the left array must be reachable for the collector
+        expressions = compileExp(left) + [
+            WasmInstrVarLocal("tee", Locals.tmp_i32),
+            WasmInstrVarLocal("get", Locals.tmp_i32),
+            WasmInstrVarGlobal("set", Gc.tmpRoot)
+        ] + compileExp(right)
     return expressions + instr
     
 
 def compileAssign(var: ident, right: exp) -> list[WasmInstr]:
+    if isinstance(tyOfExp(right), Array):
+        return compileExp(right) + [
+            WasmInstrVarLocal("tee", identToWasmId(var)),
+            WasmInstrVarGlobal("set", Gc.rootId(var.name))
+        ]
     return compileExp(right) + [WasmInstrVarLocal("set", identToWasmId(var))]
 
 
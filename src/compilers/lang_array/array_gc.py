@@ -0,0 +1,528 @@
+"""
+Allocation and garbage collection for the heap of the array language.
+
+The heap starts at Globals.heapStart and ends at the free pointer. It consists of blocks:
+
+- An array: a header followed by the elements. Bits 0-3 of the header are flags (see
+  HEADER_*), the remaining bits hold the length of the array.
+- A free block: a header holding the size of the block in bytes (a multiple of 4, so bit 0
+  is never set). Free blocks of at least 8 bytes store the address of the next free block
+  after the header and are part of the free list. Free blocks of 4 bytes only fill gaps.
+
+Arrays are allocated at the free pointer as long as the memory has room. Otherwise, the
+allocator searches the free list (first fit). If no free block is large enough, it runs
+a mark-sweep collection, searches the free list again, and finally grows the memory.
+
+The collector is non-moving because the compiled code keeps addresses into arrays on the
+operand stack. The roots are global variables that mirror the array-typed local variables
+of main. Marking recurses up to MARK_DEPTH_LIMIT nested arrays; deeper arrays are marked by
+rescanning the heap for marked arrays whose elements may not be marked yet.
+"""
+from common.wasm import *
+from lang_array.array_compilerSupport import *
+
+HEADER_ARRAY = 1    # the block is an array
+HEADER_POINTERS = 2 # the elements are addresses of arrays
+HEADER_WIDE = 4     # the elements are 8 bytes wide (otherwise 4 bytes)
+HEADER_MARK = 8     # the array is reachable (only set during a collection)
+HEADER_LEN_SHIFT = 4
+
+MARK_DEPTH_LIMIT = 64
+PAGE_SHIFT = 16 # pages are 64kB
+
+class Gc:
+    """
+    Class giving access to the names of the functions and globals of the collector.
+    """
+    alloc = WasmId('$@alloc')
+    allocSlow = WasmId('$@alloc_slow')
+    allocFree = WasmId('$@alloc_free')
+    allocGrow = WasmId('$@alloc_grow')
+    collect = WasmId('$@gc')
+    mark = WasmId('$@gc_mark')
+    markChildren = WasmId('$@gc_mark_children')
+    rescan = WasmId('$@gc_rescan')
+    sweep = WasmId('$@gc_sweep')
+    addFree = WasmId('$@gc_add_free')
+    blockSize = WasmId('$@gc_block_size')
+    freeList = WasmId('$@free_list')
+    markOverflow = WasmId('$@mark_overflow')
+    # holds the left operand of a binary operator while the right operand allocates
+    tmpRoot = WasmId('$@root_tmp')
+    @staticmethod
+    def rootId(var: str) -> WasmId:
+        return WasmId(f'$@root_{var}')
+
+def header(elemTy: Literal['int', 'bool', 'array']) -> int:
+    """
+    Returns the flags of the header for an array with the given element type.
+    """
+    match elemTy:
+        case 'int':
+            return HEADER_ARRAY | HEADER_WIDE
+        case 'bool':
+            return HEADER_ARRAY
+        case 'array':
+            return HEADER_ARRAY | HEADER_POINTERS
+
+def _get(x: WasmId) -> WasmInstr:
+    return WasmInstrVarLocal('get', x)
+
+def _set(x: WasmId) -> WasmInstr:
+    return WasmInstrVarLocal('set', x)
+
+def _tee(x: WasmId) -> WasmInstr:
+    return WasmInstrVarLocal('tee', x)
+
+def _const(n: int) -> WasmInstr:
+    return WasmInstrConst('i32', n)
+
+def _op(op: Literal['add', 'sub', 'mul', 'shr_u', 'shl', 'xor', 'and', 'or']) -> WasmInstr:
+    return WasmInstrNumBinOp('i32', op)
+
+def _rel(op: Literal['eq', 'ne', 'lt_s', 'lt_u', 'gt_s', 'gt_u', 'le_s', 'le_u',
+                     'ge_s', 'ge_u']) -> WasmInstr:
+    return WasmInstrIntRelOp('i32', op)
+
+def _isZero() -> list[WasmInstr]:
+    return [_const(0), _rel('eq')]
+
+def _memEnd() -> list[WasmInstr]:
+    return [WasmInstrMemSize(), _const(PAGE_SHIFT), _op('shl')]
+
+def _bump(size: WasmId) -> list[WasmInstr]:
+    """
+    Pushes the free pointer and moves it by size bytes.
+    """
+    return [
+        WasmInstrVarGlobal('get', Globals.freePtr),
+        WasmInstrVarGlobal('get', Globals.freePtr),
+        _get(size),
+        _op('add'),
+        WasmInstrVarGlobal('set', Globals.freePtr)
+    ]
+
+def _forEachBlock(p: WasmId, h: WasmId, body: list[WasmInstr]) -> list[WasmInstr]:
+    """
+    Runs body for each block of the heap, with p holding its address and h its header.
+    """
+    exit = WasmId('$heap_exit')
+    start = WasmId('$heap_start')
+    return [
+        _const(Globals.heapStart),
+        _set(p),
+        WasmInstrBlock(exit, None, [WasmInstrLoop(start, [
+            _get(p),
+            WasmInstrVarGlobal('get', Globals.freePtr),
+            _rel('ge_u'),
+            WasmInstrBranch(exit, True),
+            _get(p),
+            WasmInstrMem('i32', 'load'),
+            _set(h)
+        ] + body + [
+            _get(p),
+            _get(h),
+            WasmInstrCall(Gc.blockSize),
+            _op('add'),
+            _set(p),
+            WasmInstrBranch(start, False)
+        ])])
+    ]
+
+def _allocFunc() -> WasmFunc:
+    size = WasmId('$size')
+    hdr = WasmId('$header')
+    p = WasmId('$p')
+    return WasmFunc(Gc.alloc, [(size, 'i32'), (hdr, 'i32')], 'i32', [(p, 'i32')], [
+        WasmInstrVarGlobal('get', Globals.freePtr),
+        _get(size),
+        _op('add')
+    ] + _memEnd() + [
+        _rel('le_u'),
+        WasmInstrIf('i32', _bump(size), [_get(size), WasmInstrCall(Gc.allocSlow)]),
+        _tee(p),
+        _get(hdr),
+        WasmInstrMem('i32', 'store'),
+        _get(p)
+    ])
+
+def _allocSlowFunc() -> WasmFunc:
+    size = WasmId('$size')
+    p = WasmId('$p')
+    return WasmFunc(Gc.allocSlow, [(size, 'i32')], 'i32', [(p, 'i32')], [
+        _get(size),
+        WasmInstrCall(Gc.allocFree),
+        _tee(p)
+    ] + _isZero() + [
+        WasmInstrIf('i32', [
+            WasmInstrCall(Gc.collect),
+            _get(size),
+            WasmInstrCall(Gc.allocFree),
+            _tee(p)
+        ] + _isZero() + [
+            WasmInstrIf('i32', [_get(size), WasmInstrCall(Gc.allocGrow)], [_get(p)])
+        ], [_get(p)])
+    ])
+
+def _allocFreeFunc() -> WasmFunc:
+    """
+    Removes the first block with at least size bytes from the free list and returns its
+    address, or 0 if there is no such block. The rest of the block stays free.
+    """
+    size = WasmId('$size')
+    prev = WasmId('$prev')
+    cur = WasmId('$cur')
+    next = WasmId('$next')
+    blockSize = WasmId('$block_size')
+    rest = WasmId('$rest')
+    link = WasmId('$link')
+    p = WasmId('$p')
+    exit = WasmId('$free_exit')
+    start = WasmId('$free_start')
+    found: list[WasmInstr] = [
+        _get(cur),
+        _const(4),
+        _op('add'),
+        WasmInstrMem('i32', 'load'),
+        _set(next),
+        _get(blockSize),
+        _get(size),
+        _op('sub'),
+        _tee(rest),
+        _const(8),
+        _rel('ge_u'),
+        WasmInstrIf(None, [
+            # the rest is a new free block replacing the current one in the list
+            _get(cur),
+            _get(size),
+            _op('add'),
+            _tee(link),
+            _get(rest),
+            WasmInstrMem('i32', 'store'),
+            _get(link),
+            _const(4),
+            _op('add'),
+            _get(next),
+            WasmInstrMem('i32', 'store')
+        ], [
+            _get(next),
+            _set(link),
+            _get(rest),
+            WasmInstrIf(None, [
+                _get(cur),
+                _get(size),
+                _op('add'),
+                _get(rest),
+                WasmInstrMem('i32', 'store')
+            ], [])
+        ]),
+        _get(prev),
+        WasmInstrIf(None, [
+            _get(prev),
+            _const(4),
+            _op('add'),
+            _get(link),
+            WasmInstrMem('i32', 'store')
+        ], [
+            _get(link),
+            WasmInstrVarGlobal('set', Gc.freeList)
+        ]),
+        _get(cur),
+        _set(p),
+        WasmInstrBranch(exit, False)
+    ]
+    return WasmFunc(Gc.allocFree, [(size, 'i32')], 'i32',
+                    [(x, 'i32') for x in [prev, cur, next, blockSize, rest, link, p]], [
+        WasmInstrVarGlobal('get', Gc.freeList),
+        _set(cur),
+        WasmInstrBlock(exit, None, [WasmInstrLoop(start, [
+            _get(cur)
+        ] + _isZero() + [
+            WasmInstrBranch(exit, True),
+            _get(cur),
+            WasmInstrMem('i32', 'load'),
+            _tee(blockSize),
+            _get(size),
+            _rel('ge_u'),
+            WasmInstrIf(None, found, []),
+            _get(cur),
+            _set(prev),
+            _get(cur),
+            _const(4),
+            _op('add'),
+            WasmInstrMem('i32', 'load'),
+            _set(cur),
+            WasmInstrBranch(start, False)
+        ])]),
+        _get(p)
+    ])
+
+def _allocGrowFunc(maxMemSize: int) -> WasmFunc:
+    """
+    Allocates at the free pointer, growing the memory if needed. The memory at least doubles
+    (up to maxMemSize pages), so that growing is rare.
+    """
+    size = WasmId('$size')
+    missing = WasmId('$missing')
+    needed = WasmId('$needed')
+    avail = WasmId('$avail')
+    pages = WasmId('$pages')
+    outOfMem = Errors.raiseError(Errors.outOfMemory)
+    return WasmFunc(Gc.allocGrow, [(size, 'i32')], 'i32',
+                    [(x, 'i32') for x in [missing, needed, avail, pages]], [
+        WasmInstrVarGlobal('get', Globals.freePtr),
+        _get(size),
+        _op('add')
+    ] + _memEnd() + [
+        _op('sub'),
+        _tee(missing),
+        _const(0),
+        _rel('gt_s'),
+        WasmInstrIf(None, [
+            _get(missing),
+            _const((1 << PAGE_SHIFT) - 1),
+            _op('add'),
+            _const(PAGE_SHIFT),
+            _op('shr_u'),
+            _set(needed),
+            _const(maxMemSize),
+            WasmInstrMemSize(),
+            _op('sub'),
+            _tee(avail),
+            _get(needed),
+            _rel('lt_s'),
+            WasmInstrIf(None, outOfMem, []),
+            # pages = max(needed, min(memory.size, avail))
+            WasmInstrMemSize(),
+            _tee(pages),
+            _get(avail),
+            _rel('gt_u'),
+            WasmInstrIf(None, [_get(avail), _set(pages)], []),
+            _get(pages),
+            _get(needed),
+            _rel('lt_u'),
+            WasmInstrIf(None, [_get(needed), _set(pages)], []),
+            _get(pages),
+            WasmInstrMemGrow(),
+            _const(-1),
+            _rel('eq'),
+            WasmInstrIf(None, outOfMem, [])
+        ], [])
+    ] + _bump(size))
+
+def _collectFunc(roots: list[WasmId]) -> WasmFunc:
+    exit = WasmId('$rescan_exit')
+    start = WasmId('$rescan_start')
+    res: list[WasmInstr] = [_const(0), WasmInstrVarGlobal('set', Gc.markOverflow)]
+    for r in roots:
+        res += [WasmInstrVarGlobal('get', r), _const(0), WasmInstrCall(Gc.mark)]
+    res += [
+        WasmInstrBlock(exit, None, [WasmInstrLoop(start, [
+            WasmInstrVarGlobal('get', Gc.markOverflow)
+        ] + _isZero() + [
+            WasmInstrBranch(exit, True),
+            _const(0),
+            WasmInstrVarGlobal('set', Gc.markOverflow),
+            WasmInstrCall(Gc.rescan),
+            WasmInstrBranch(start, False)
+        ])]),
+        WasmInstrCall(Gc.sweep)
+    ]
+    return WasmFunc(Gc.collect, [], None, [], res)
+
+def _markFunc() -> WasmFunc:
+    ptr = WasmId('$ptr')
+    depth = WasmId('$depth')
+    h = WasmId('$h')
+    return WasmFunc(Gc.mark, [(ptr, 'i32'), (depth, 'i32')], None, [(h, 'i32')], [
+        _get(ptr),
+        WasmInstrIf(None, [
+            _get(ptr),
+            WasmInstrMem('i32', 'load'),
+            _tee(h),
+            _const(HEADER_MARK),
+            _op('and')
+        ] + _isZero() + [
+            WasmInstrIf(None, [
+                _get(ptr),
+                _get(h),
+                _const(HEADER_MARK),
+                _op('or'),
+                WasmInstrMem('i32', 'store'),
+                _get(h),
+                _const(HEADER_POINTERS),
+                _op('and'),
+                WasmInstrIf(None, [
+                    _get(depth),
+                    _const(MARK_DEPTH_LIMIT),
+                    _rel('ge_u'),
+                    WasmInstrIf(None, [
+                        # the children are marked when rescanning the heap
+                        _const(1),
+                        WasmInstrVarGlobal('set', Gc.markOverflow)
+                    ], [
+                        _get(ptr),
+                        _get(depth),
+                        WasmInstrCall(Gc.markChildren)
+                    ])
+                ], [])
+            ], [])
+        ], [])
+    ])
+
+def _markChildrenFunc() -> WasmFunc:
+    ptr = WasmId('$ptr')
+    depth = WasmId('$depth')
+    n = WasmId('$n')
+    i = WasmId('$i')
+    exit = WasmId('$children_exit')
+    start = WasmId('$children_start')
+    return WasmFunc(Gc.markChildren, [(ptr, 'i32'), (depth, 'i32')], None,
+                    [(n, 'i32'), (i, 'i32')], [
+        _get(ptr),
+        WasmInstrMem('i32', 'load'),
+        _const(HEADER_LEN_SHIFT),
+        _op('shr_u'),
+        _set(n),
+        WasmInstrBlock(exit, None, [WasmInstrLoop(start, [
+            _get(i),
+            _get(n),
+            _rel('ge_u'),
+            WasmInstrBranch(exit, True),
+            _get(ptr),
+            _const(4),
+            _op('add'),
+            _get(i),
+            _const(2),
+            _op('shl'),
+            _op('add'),
+            WasmInstrMem('i32', 'load'),
+            _get(depth),
+            _const(1),
+            _op('add'),
+            WasmInstrCall(Gc.mark),
+            _get(i),
+            _const(1),
+            _op('add'),
+            _set(i),
+            WasmInstrBranch(start, False)
+        ])])
+    ])
+
+def _rescanFunc() -> WasmFunc:
+    p = WasmId('$p')
+    h = WasmId('$h')
+    flags = HEADER_ARRAY | HEADER_POINTERS | HEADER_MARK
+    return WasmFunc(Gc.rescan, [], None, [(p, 'i32'), (h, 'i32')], _forEachBlock(p, h, [
+        _get(h),
+        _const(flags),
+        _op('and'),
+        _const(flags),
+        _rel('eq'),
+        WasmInstrIf(None, [_get(p), _const(0), WasmInstrCall(Gc.markChildren)], [])
+    ]))
+
+def _sweepFunc() -> WasmFunc:
+    """
+    Clears the marks of live arrays and rebuilds the free list from the runs of unmarked
+    arrays and free blocks. A run at the end of the heap moves the free pointer back.
+    """
+    p = WasmId('$p')
+    h = WasmId('$h')
+    run = WasmId('$run') # start of the current run of dead blocks, 0 if there is none
+    live = HEADER_ARRAY | HEADER_MARK
+    return WasmFunc(Gc.sweep, [], None, [(p, 'i32'), (h, 'i32'), (run, 'i32')], [
+        _const(0),
+        WasmInstrVarGlobal('set', Gc.freeList)
+    ] + _forEachBlock(p, h, [
+        _get(h),
+        _const(live),
+        _op('and'),
+        _const(live),
+        _rel('eq'),
+        WasmInstrIf(None, [
+            _get(p),
+            _get(h),
+            _const(~HEADER_MARK),
+            _op('and'),
+            WasmInstrMem('i32', 'store'),
+            _get(run),
+            WasmInstrIf(None, [
+                _get(run),
+                _get(p),
+                _get(run),
+                _op('sub'),
+                WasmInstrCall(Gc.addFree),
+                _const(0),
+                _set(run)
+            ], [])
+        ], [
+            _get(run)
+        ] + _isZero() + [
+            WasmInstrIf(None, [_get(p), _set(run)], [])
+        ])
+    ]) + [
+        _get(run),
+        WasmInstrIf(None, [_get(run), WasmInstrVarGlobal('set', Globals.freePtr)], [])
+    ])
+
+def _addFreeFunc() -> WasmFunc:
+    start = WasmId('$start')
+    size = WasmId('$size')
+    return WasmFunc(Gc.addFree, [(start, 'i32'), (size, 'i32')], None, [], [
+        _get(start),
+        _get(size),
+        WasmInstrMem('i32', 'store'),
+        _get(size),
+        _const(8),
+        _rel('ge_u'),
+        WasmInstrIf(None, [
+            _get(start),
+            _const(4),
+            _op('add'),
+            WasmInstrVarGlobal('get', Gc.freeList),
+            WasmInstrMem('i32', 'store'),
+            _get(start),
+            WasmInstrVarGlobal('set', Gc.freeList)
+        ], [])
+    ])
+
+def _blockSizeFunc() -> WasmFunc:
+    h = WasmId('$h')
+    return WasmFunc(Gc.blockSize, [(h, 'i32')], 'i32', [], [
+        _get(h),
+        _const(HEADER_ARRAY),
+        _op('and'),
+        WasmInstrIf('i32', [
+            # 4 + (length << (2 + wide))
+            _get(h),
+            _const(HEADER_LEN_SHIFT),
+            _op('shr_u'),
+            _get(h),
+            _const(2),
+            _op('shr_u'),
+            _const(1),
+            _op('and'),
+            _const(2),
+            _op('add'),
+            _op('shl'),
+            _const(4),
+            _op('add')
+        ], [_get(h)])
+    ])
+
+def globalDecls(roots: list[WasmId]) -> list[WasmGlobal]:
+    """
+    Returns the globals of the collector, including the given root globals.
+    """
+    return [WasmGlobal(x, 'i32', True, [_const(0)])
+            for x in [Gc.freeList, Gc.markOverflow] + roots]
+
+def funcs(roots: list[WasmId], maxMemSize: int) -> list[WasmFunc]:
+    """
+    Returns the allocator and collector functions. maxMemSize is the maximal number of pages
+    of the memory.
+    """
+    return [_allocFunc(), _allocSlowFunc(), _allocFreeFunc(), _allocGrowFunc(maxMemSize),
+            _collectFunc(roots), _markFunc(), _markChildrenFunc(), _rescanFunc(),
+            _sweepFunc(), _addFreeFunc(), _blockSizeFunc()]
@@ -1,96 +1,114 @@
-# AUTOMATICALLY GENERATED (2024-03-13 15:00:04)
+# AUTOMATICALLY GENERATED (2026-10-18 03:18:29)
 from __future__ import annotations
 from dataclasses import dataclass
 
 type optional[T] = T | None
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True, eq=False)
 class Ident:
+    """
+    Identifiers are interned: Ident(name) always returns the same object for the same name.
+    Thus, comparing identifiers is mostly an identity check.
+    """
     name: str
+    def __new__(cls, name: str) -> Ident:
+        x = _identTable.get(name)
+        if x is None:
+            x = object.__new__(cls)
+            _identTable[name] = x
+        return x
+    def __eq__(self, other: object) -> bool:
+        return self is other or (isinstance(other, Ident) and self.name == other.name)
+    def __hash__(self) -> int:
+        return hash(self.name)
+    def __reduce__(self) -> tuple[type[Ident], tuple[str]]:
+        return (Ident, (self.name,))
+
+_identTable: dict[str, Ident] = {}
 
 type ident = Ident
 type string = str
 
-@dataclass
+@dataclass(slots=True)
 class USub:
     pass
 
-@dataclass
+@dataclass(slots=True)
 class Not:
     pass
 
 type unaryop = USub | Not
 
-@dataclass
+@dataclass(slots=True)
 class Add:
     pass
 
-@dataclass
+@dataclass(slots=True)
 class Sub:
     pass
 
-@dataclass
+@dataclass(slots=True)
 class Mul:
     pass
 
-@dataclass
+@dataclass(slots=True)
 class Less:
     pass
 
-@dataclass
+@dataclass(slots=True)
 class LessEq:
     pass
 
-@dataclass
+@dataclass(slots=True)
 class Greater:
     pass
 
-@dataclass
+@dataclass(slots=True)
 class GreaterEq:
     pass
 
-@dataclass
+@dataclass(slots=True)
 class Eq:
     pass
 
-@dataclass
+@dataclass(slots=True)
 class NotEq:
     pass
 
-@dataclass
+@dataclass(slots=True)
 class Is:
     pass
 
-@dataclass
+@dataclass(slots=True)
 class And:
     pass
 
-@dataclass
+@dataclass(slots=True)
 class Or:
     pass
 
 type binaryop = Add | Sub | Mul | Less | LessEq | Greater | GreaterEq | Eq | NotEq | Is | And | Or
 
-@dataclass
+@dataclass(slots=True)
 class Int:
     pass
 
-@dataclass
+@dataclass(slots=True)
 class Bool:
     pass
 
-@dataclass
+@dataclass(slots=True)
 class Array:
     elemTy: ty
 
 type ty = Int | Bool | Array
 
-@dataclass
+@dataclass(slots=True)
 class NotVoid:
     ty: ty
 
-@dataclass
+@dataclass(slots=True)
 class Void:
     pass
 
-type resultTy = NotVoid | Void
\ No newline at end of file
+type resultTy = NotVoid | Void
@@ -8,7 +8,8 @@ class Errors:
     """
     arraySize = 'ArraySizeError'
     arrayIndexOutOfBounds = 'IndexError'
-    allErrors = [arraySize, arrayIndexOutOfBounds]
+    outOfMemory = 'MemoryError'
+    allErrors = [arraySize, arrayIndexOutOfBounds, outOfMemory]
     @staticmethod
     def data() -> list[WasmData]:
         """
@@ -37,12 +38,31 @@ class Errors:
         return [WasmInstrConst('i32', start),
                 WasmInstrConst('i32', len(s)),
                 WasmInstrCall(WasmId('$print_err'))]
+    @staticmethod
+    def funcId(s: str) -> WasmId:
+        return WasmId(f'$@error_{s}')
+    @staticmethod
+    def funcs() -> list[WasmFunc]:
+        """
+        Returns one function per error message. The function outputs the message and traps.
+        Sharing these functions keeps the code for the error checks small.
+        """
+        return [WasmFunc(Errors.funcId(e), [], None, [], Errors.outputError(e) + [WasmInstrTrap()])
+                for e in Errors.allErrors]
+    @staticmethod
+    def raiseError(s: str) -> list[WasmInstr]:
+        """
+        Returns a list of Wasm instructions for calling the error function for message s.
+        The call never returns.
+        """
+        return [WasmInstrCall(Errors.funcId(s)), WasmInstrTrap()]
 
 class Globals:
     """
     Class giving access to the names of global variables.
     """
     freePtr = WasmId('$@free_ptr')
+    heapStart = 100 # must be 4-byte aligned
     @staticmethod
     def decls() -> list[WasmGlobal]:
         """
@@ -51,10 +71,10 @@ class Globals:
         errsLen = 0
         for e in Errors.allErrors:
             errsLen += len(e)
-        offset = 100 # must be 4-byte aligned
+        offset = Globals.heapStart
         if errsLen > offset:
             utils.abort(f'Offset for free_ptr is {offset}, but error messages take {errsLen} bytes')
-        return [WasmGlobal(Globals.freePtr, 'i32', True, [WasmInstrConst('i32', 100)])]
+        return [WasmGlobal(Globals.freePtr, 'i32', True, [WasmInstrConst('i32', offset)])]
 
 class Locals:
     """
@@ -62,10 +82,17 @@ class Locals:
     """
     tmp_i32 = WasmId('$@tmp_i32')
     tmp_i64 = WasmId('$@tmp_i64')
+    # used for initializing the elements of an array
+    initDst = WasmId('$@init_dst')
+    initSize = WasmId('$@init_size')
+    initDone = WasmId('$@init_done')
     @staticmethod
     def decls() -> list[tuple[WasmId, WasmValtype]]:
         """
         Returns a list of local variable declarations to be used in a function definition.
         """
         return [(Locals.tmp_i32, 'i32'),
-                (Locals.tmp_i64, 'i64')]
+                (Locals.tmp_i64, 'i64'),
+                (Locals.initDst, 'i32'),
+                (Locals.initSize, 'i32'),
+                (Locals.initDone, 'i32')]
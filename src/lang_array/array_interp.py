@@ -1,6 +1,7 @@
 from lang_array.array_ast import *
 import lang_array.array_tychecker as array_tychecker
 import common.utils as utils
+import common.flatInterp as flatInterp
 import common.log as log
 from typing import *
 
@@ -145,10 +146,35 @@ def interpStmts(stmts: list[stmt], env: Env, store: Store) -> None:
     if len(stmts) > 0:
         interpStmt(stmts[0], env, store, stmts[1:])
 
-def interpModule(m: mod):
+def lowerStmts(stmts: list[stmt], env: Env, store: Store, b: flatInterp.Builder) -> None:
+    for s in stmts:
+        lowerStmt(s, env, store, b)
+
+def lowerStmt(s: stmt, env: Env, store: Store, b: flatInterp.Builder) -> None:
+    match s:
+        case IfStmt(cond, thenBody, elseBody):
+            b.emitIf(flatInterp.jumpIfFalse(lambda: asBool(interpExp(cond, env, store))),
+                     lambda: lowerStmts(thenBody, env, store, b),
+                     lambda: lowerStmts(elseBody, env, store, b))
+        case WhileStmt(cond, body):
+            b.emitWhile(flatInterp.jumpIfFalse(lambda: asBool(interpExp(cond, env, store))),
+                        lambda: lowerStmts(body, env, store, b))
+        case _:
+            b.emit(flatInterp.Exec(lambda: interpStmt(s, env, store, [])))
+
+def interpModule(m: mod, flat: bool = False):
+    """
+    Interprets m. With flat=True, the statements are first lowered to flat code,
+    which is then executed without recursion (see common.flatInterp).
+    """
     utils.assertType(m, Module)
     array_tychecker.tycheckModule(m)
     env: Env = {}
     store = Store()
-    interpStmts(m.stmts, env, store)
-    log.debug(f'After executing program.\nEnv: {env}\nStore: {store}')
+    if flat:
+        b = flatInterp.newBuilder()
+        lowerStmts(m.stmts, env, store, b)
+        flatInterp.run(b.finish())
+    else:
+        interpStmts(m.stmts, env, store)
+    log.debugLazy(lambda: f'After executing program.\nEnv: {env}\nStore: {store}')
@@ -196,6 +196,6 @@ def tycheckModule(m: mod) -> Symtab:
     log.info(f'Typechecking array program')
     st: Symtab = symtab.Symtab()
     tycheckStmts(m.stmts, st)
-    log.debug(f'Symtab after typechecking: {st}')
-    log.debug(f'AST after typechecking: {pprint.pformat(m)}')
+    log.debugLazy(lambda: f'Symtab after typechecking: {st}')
+    log.debugLazy(lambda: f'AST after typechecking: {pprint.pformat(m)}')
     return st
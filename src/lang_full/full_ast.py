@@ -1,187 +1,205 @@
-# AUTOMATICALLY GENERATED (2024-07-23 16:01:08)
+# AUTOMATICALLY GENERATED (2026-10-18 03:18:31)
 from __future__ import annotations
 from dataclasses import dataclass
 
 type optional[T] = T | None
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True, eq=False)
 class Ident:
+    """
+    Identifiers are interned: Ident(name) always returns the same object for the same name.
+    Thus, comparing identifiers is mostly an identity check.
+    """
     name: str
+    def __new__(cls, name: str) -> Ident:
+        x = _identTable.get(name)
+        if x is None:
+            x = object.__new__(cls)
+            _identTable[name] = x
+        return x
+    def __eq__(self, other: object) -> bool:
+        return self is other or (isinstance(other, Ident) and self.name == other.name)
+    def __hash__(self) -> int:
+        return hash(self.name)
+    def __reduce__(self) -> tuple[type[Ident], tuple[str]]:
+        return (Ident, (self.name,))
+
+_identTable: dict[str, Ident] = {}
 
 type ident = Ident
 type string = str
 
-@dataclass
+@dataclass(slots=True)
 class USub:
     pass
 
-@dataclass
+@dataclass(slots=True)
 class Not:
     pass
 
 type unaryop = USub | Not
 
-@dataclass
+@dataclass(slots=True)
 class Add:
     pass
 
-@dataclass
+@dataclass(slots=True)
 class Sub:
     pass
 
-@dataclass
+@dataclass(slots=True)
 class Mul:
     pass
 
-@dataclass
+@dataclass(slots=True)
 class Less:
     pass
 
-@dataclass
+@dataclass(slots=True)
 class LessEq:
     pass
 
-@dataclass
+@dataclass(slots=True)
 class Greater:
     pass
 
-@dataclass
+@dataclass(slots=True)
 class GreaterEq:
     pass
 
-@dataclass
+@dataclass(slots=True)
 class Eq:
     pass
 
-@dataclass
+@dataclass(slots=True)
 class NotEq:
     pass
 
-@dataclass
+@dataclass(slots=True)
 class Is:
     pass
 
-@dataclass
+@dataclass(slots=True)
 class And:
     pass
 
-@dataclass
+@dataclass(slots=True)
 class Or:
     pass
 
 type binaryop = Add | Sub | Mul | Less | LessEq | Greater | GreaterEq | Eq | NotEq | Is | And | Or
 
-@dataclass
+@dataclass(slots=True)
 class Int:
     pass
 
-@dataclass
+@dataclass(slots=True)
 class Bool:
     pass
 
-@dataclass
+@dataclass(slots=True)
 class Array:
     elemTy: ty
 
-@dataclass
+@dataclass(slots=True)
 class Fun:
     params: list[ty]
     result: resultTy
 
-@dataclass
+@dataclass(slots=True)
 class Class:
     name: ident
 
-@dataclass
+@dataclass(slots=True)
 class Interface:
     name: ident
 
 type ty = Int | Bool | Array | Fun | Class | Interface
 
-@dataclass
+@dataclass(slots=True)
 class NotVoid:
     ty: ty
 
-@dataclass
+@dataclass(slots=True)
 class Void:
     pass
 
 type resultTy = NotVoid | Void
 
-@dataclass
+@dataclass(slots=True)
 class Var:
     pass
 
-@dataclass
+@dataclass(slots=True)
 class UserFun:
     pass
 
-@dataclass
+@dataclass(slots=True)
 class BuiltinFun:
     pass
 
 type scope = Var | UserFun | BuiltinFun
 
-@dataclass
+@dataclass(slots=True)
 class FunParam:
     var: ident
     ty: ty
 
 type funParam = FunParam
 
-@dataclass
+@dataclass(slots=True)
 class IntConst:
     value: int
     ty: optional[resultTy] = None
 
-@dataclass
+@dataclass(slots=True)
 class BoolConst:
     value: bool
     ty: optional[resultTy] = None
 
-@dataclass
+@dataclass(slots=True)
 class Name:
     var: ident
     scope: optional[scope] = None
     ty: optional[resultTy] = None
 
-@dataclass
+@dataclass(slots=True)
 class Call:
     fun: exp
     args: list[exp]
     ty: optional[resultTy] = None
 
-@dataclass
+@dataclass(slots=True)
 class UnOp:
     op: unaryop
     arg: exp
     ty: optional[resultTy] = None
 
-@dataclass
+@dataclass(slots=True)
 class BinOp:
     left: exp
     op: binaryop
     right: exp
     ty: optional[resultTy] = None
 
-@dataclass
+@dataclass(slots=True)
 class ArrayInitDyn:
     len: exp
     elemInit: exp
     ty: optional[resultTy] = None
 
-@dataclass
+@dataclass(slots=True)
 class ArrayInitStatic:
     elemInit: list[exp]
     ty: optional[resultTy] = None
 
-@dataclass
+@dataclass(slots=True)
 class Subscript:
     array: exp
     index: exp
     ty: optional[resultTy] = None
 
-@dataclass
+@dataclass(slots=True)
 class Closure:
     params: list[funParam]
     body: exp
@@ -189,39 +207,39 @@ class Closure:
 
 type exp = IntConst | BoolConst | Name | Call | UnOp | BinOp | ArrayInitDyn | ArrayInitStatic | Subscript | Closure
 
-@dataclass
+@dataclass(slots=True)
 class StmtExp:
     exp: exp
 
-@dataclass
+@dataclass(slots=True)
 class Assign:
     var: ident
     right: exp
 
-@dataclass
+@dataclass(slots=True)
 class IfStmt:
     cond: exp
     thenBody: list[stmt]
     elseBody: list[stmt]
 
-@dataclass
+@dataclass(slots=True)
 class WhileStmt:
     cond: exp
     body: list[stmt]
 
-@dataclass
+@dataclass(slots=True)
 class SubscriptAssign:
     left: exp
     index: exp
     right: exp
 
-@dataclass
+@dataclass(slots=True)
 class Return:
     result: optional[exp] = None
 
 type stmt = StmtExp | Assign | IfStmt | WhileStmt | SubscriptAssign | Return
 
-@dataclass
+@dataclass(slots=True)
 class FunDef:
     name: ident
     params: list[funParam]
@@ -230,14 +248,14 @@ class FunDef:
 
 type fun = FunDef
 
-@dataclass
+@dataclass(slots=True)
 class FieldDecl:
     ty: ty
     name: ident
 
 type fieldDecl = FieldDecl
 
-@dataclass
+@dataclass(slots=True)
 class MethodSig:
     name: ident
     params: list[funParam]
@@ -245,14 +263,14 @@ class MethodSig:
 
 type methodSig = MethodSig
 
-@dataclass
+@dataclass(slots=True)
 class MethodDecl:
     sig: methodSig
     body: list[stmt]
 
 type methodDecl = MethodDecl
 
-@dataclass
+@dataclass(slots=True)
 class ClassDecl:
     name: ident
     extends: optional[ident]
@@ -262,18 +280,18 @@ class ClassDecl:
 
 type classDecl = ClassDecl
 
-@dataclass
+@dataclass(slots=True)
 class InterfaceDecl:
     name: ident
     methods: list[methodSig]
 
 type interfaceDecl = InterfaceDecl
 
-@dataclass
+@dataclass(slots=True)
 class Module:
     interfaces: list[interfaceDecl]
     classes: list[classDecl]
     funs: list[fun]
     stmts: list[stmt]
 
-type mod = Module
\ No newline at end of file
+type mod = Module
@@ -1,56 +1,56 @@
-# AUTOMATICALLY GENERATED (2024-02-28 12:34:07)
+# AUTOMATICALLY GENERATED (2026-10-18 03:18:30)
 from __future__ import annotations
 from dataclasses import dataclass
 
 from lang_fun.fun_astCommon import *
 
-@dataclass
+@dataclass(slots=True)
 class IntConst:
     value: int
     ty: optional[resultTy] = None
 
-@dataclass
+@dataclass(slots=True)
 class BoolConst:
     value: bool
     ty: optional[resultTy] = None
 
-@dataclass
+@dataclass(slots=True)
 class Name:
     var: ident
     scope: optional[scope] = None
     ty: optional[resultTy] = None
 
-@dataclass
+@dataclass(slots=True)
 class Call:
     fun: exp
     args: list[exp]
     ty: optional[resultTy] = None
 
-@dataclass
+@dataclass(slots=True)
 class UnOp:
     op: unaryop
     arg: exp
     ty: optional[resultTy] = None
 
-@dataclass
+@dataclass(slots=True)
 class BinOp:
     left: exp
     op: binaryop
     right: exp
     ty: optional[resultTy] = None
 
-@dataclass
+@dataclass(slots=True)
 class ArrayInitDyn:
     len: exp
     elemInit: exp
     ty: optional[resultTy] = None
 
-@dataclass
+@dataclass(slots=True)
 class ArrayInitStatic:
     elemInit: list[exp]
     ty: optional[resultTy] = None
 
-@dataclass
+@dataclass(slots=True)
 class Subscript:
     array: exp
     index: exp
@@ -58,39 +58,39 @@ class Subscript:
 
 type exp = IntConst | BoolConst | Name | Call | UnOp | BinOp | ArrayInitDyn | ArrayInitStatic | Subscript
 
-@dataclass
+@dataclass(slots=True)
 class StmtExp:
     exp: exp
 
-@dataclass
+@dataclass(slots=True)
 class Assign:
     var: ident
     right: exp
 
-@dataclass
+@dataclass(slots=True)
 class IfStmt:
     cond: exp
     thenBody: list[stmt]
     elseBody: list[stmt]
 
-@dataclass
+@dataclass(slots=True)
 class WhileStmt:
     cond: exp
     body: list[stmt]
 
-@dataclass
+@dataclass(slots=True)
 class SubscriptAssign:
     left: exp
     index: exp
     right: exp
 
-@dataclass
+@dataclass(slots=True)
 class Return:
     result: optional[exp] = None
 
 type stmt = StmtExp | Assign | IfStmt | WhileStmt | SubscriptAssign | Return
 
-@dataclass
+@dataclass(slots=True)
 class FunDef:
     name: ident
     params: list[funParam]
@@ -99,9 +99,9 @@ class FunDef:
 
 type fun = FunDef
 
-@dataclass
+@dataclass(slots=True)
 class Module:
     funs: list[fun]
     stmts: list[stmt]
 
-type mod = Module
\ No newline at end of file
+type mod = Module
@@ -1,40 +1,40 @@
-# AUTOMATICALLY GENERATED (2024-02-28 14:03:04)
+# AUTOMATICALLY GENERATED (2026-10-18 03:18:30)
 from __future__ import annotations
 from dataclasses import dataclass
 
 from lang_fun.fun_astCommon import *
 
-@dataclass
+@dataclass(slots=True)
 class IntConst:
     value: int
     ty: ty
 
-@dataclass
+@dataclass(slots=True)
 class BoolConst:
     value: bool
     ty: ty
 
-@dataclass
+@dataclass(slots=True)
 class VarName:
     var: ident
     ty: ty
 
-@dataclass
+@dataclass(slots=True)
 class FunName:
     fun: ident
     ty: ty
 
 type atomExp = IntConst | BoolConst | VarName | FunName
 
-@dataclass
+@dataclass(slots=True)
 class CallTargetBuiltin:
     var: ident
 
-@dataclass
+@dataclass(slots=True)
 class CallTargetDirect:
     var: ident
 
-@dataclass
+@dataclass(slots=True)
 class CallTargetIndirect:
     var: ident
     params: list[ty]
@@ -42,42 +42,42 @@ class CallTargetIndirect:
 
 type callTarget = CallTargetBuiltin | CallTargetDirect | CallTargetIndirect
 
-@dataclass
+@dataclass(slots=True)
 class AtomExp:
     e: atomExp
     ty: resultTy
 
-@dataclass
+@dataclass(slots=True)
 class Call:
     fun: callTarget
     args: list[exp]
     ty: resultTy
 
-@dataclass
+@dataclass(slots=True)
 class UnOp:
     op: unaryop
     arg: exp
     ty: resultTy
 
-@dataclass
+@dataclass(slots=True)
 class BinOp:
     left: exp
     op: binaryop
     right: exp
     ty: resultTy
 
-@dataclass
+@dataclass(slots=True)
 class ArrayInitDyn:
     len: atomExp
     elemInit: atomExp
     ty: resultTy
 
-@dataclass
+@dataclass(slots=True)
 class ArrayInitStatic:
     elemInit: list[atomExp]
     ty: resultTy
 
-@dataclass
+@dataclass(slots=True)
 class Subscript:
     array: atomExp
     index: atomExp
@@ -85,39 +85,39 @@ class Subscript:
 
 type exp = AtomExp | Call | UnOp | BinOp | ArrayInitDyn | ArrayInitStatic | Subscript
 
-@dataclass
+@dataclass(slots=True)
 class StmtExp:
     exp: exp
 
-@dataclass
+@dataclass(slots=True)
 class Assign:
     var: ident
     right: exp
 
-@dataclass
+@dataclass(slots=True)
 class IfStmt:
     cond: exp
     thenBody: list[stmt]
     elseBody: list[stmt]
 
-@dataclass
+@dataclass(slots=True)
 class WhileStmt:
     cond: exp
     body: list[stmt]
 
-@dataclass
+@dataclass(slots=True)
 class SubscriptAssign:
     left: atomExp
     index: atomExp
     right: exp
 
-@dataclass
+@dataclass(slots=True)
 class Return:
     result: optional[exp] = None
 
 type stmt = StmtExp | Assign | IfStmt | WhileStmt | SubscriptAssign | Return
 
-@dataclass
+@dataclass(slots=True)
 class FunDef:
     name: ident
     params: list[funParam]
@@ -126,9 +126,9 @@ class FunDef:
 
 type fun = FunDef
 
-@dataclass
+@dataclass(slots=True)
 class Module:
     funs: list[fun]
     stmts: list[stmt]
 
-type mod = Module
\ No newline at end of file
+type mod = Module
@@ -0,0 +1,293 @@
+"""
+Bytecode interpreter for lang_fun.
+
+The AST is first lowered into flat lists of instructions for a stack machine (one list
+per function, plus one for the toplevel statements). Control flow is expressed by jumps to
+absolute instruction indices. The resulting code is then executed by a single dispatch loop
+with an explicit operand stack and an explicit stack of call frames. Hence, the running
+time does not depend on the nesting depth of loops and function calls, and there is
+no recursion on the python side.
+
+The observable behavior is the same as for the tree-walking interpreter in fun_interp.
+"""
+from __future__ import annotations
+from lang_fun.fun_ast import *
+from lang_fun.fun_interp import Env, ReturnException, Store, TyValue, asAddress, asFunDef, asInt
+import common.utils as utils
+import common.log as log
+from common.codeBuilder import CodeBuilder
+from dataclasses import dataclass
+from typing import *
+import operator
+
+@dataclass(frozen=True)
+class Const:
+    value: Optional[TyValue]
+
+@dataclass(frozen=True)
+class Load:
+    var: Ident
+
+@dataclass(frozen=True)
+class StoreVar:
+    var: Ident
+
+@dataclass(frozen=True)
+class Pop:
+    pass
+
+@dataclass(frozen=True)
+class UnaryOp:
+    op: Callable[[Any], Any]
+
+@dataclass(frozen=True)
+class BinaryOp:
+    op: Callable[[Any, Any], Any]
+
+@dataclass(frozen=True)
+class Jump:
+    target: int
+
+@dataclass(frozen=True)
+class JumpIfFalse:
+    target: int
+
+@dataclass(frozen=True)
+class CallFun:
+    nargs: int
+
+@dataclass(frozen=True)
+class Ret:
+    pass
+
+@dataclass(frozen=True)
+class Print:
+    pass
+
+@dataclass(frozen=True)
+class InputInt:
+    pass
+
+@dataclass(frozen=True)
+class Len:
+    pass
+
+@dataclass(frozen=True)
+class NewArrayDyn:
+    pass
+
+@dataclass(frozen=True)
+class NewArrayStatic:
+    size: int
+
+@dataclass(frozen=True)
+class GetElem:
+    pass
+
+@dataclass(frozen=True)
+class SetElem:
+    pass
+
+type Instr = Const | Load | StoreVar | Pop | UnaryOp | BinaryOp | Jump | JumpIfFalse | CallFun | Ret \
+    | Print | InputInt | Len | NewArrayDyn | NewArrayStatic | GetElem | SetElem
+
+type Code = list[Instr]
+
+type Builder = CodeBuilder[Instr]
+
+UNARY_OPS: dict[type, Callable[[Any], Any]] = {
+    USub: operator.neg,
+    Not: operator.not_
+}
+
+BINARY_OPS: dict[type, Callable[[Any, Any], Any]] = {
+    Add: operator.add,
+    Sub: operator.sub,
+    Mul: operator.mul,
+    Less: operator.lt,
+    LessEq: operator.le,
+    Greater: operator.gt,
+    GreaterEq: operator.ge,
+    Eq: operator.eq,
+    NotEq: operator.ne,
+    Is: operator.eq # compare Address values by ==
+}
+
+def compileExp(e: exp, b: Builder):
+    match e:
+        case IntConst(value) | BoolConst(value):
+            b.emit(Const(value))
+        case Name(x):
+            b.emit(Load(x))
+        case Call(Name(Ident('input_int')), []):
+            b.emit(InputInt())
+        case Call(Name(Ident('print')), [arg]):
+            compileExp(arg, b)
+            b.emit(Print())
+        case Call(Name(Ident('len')), [arg]):
+            compileExp(arg, b)
+            b.emit(Len())
+        case Call(fun, args):
+            compileExp(fun, b)
+            for a in args:
+                compileExp(a, b)
+            b.emit(CallFun(len(args)))
+        case UnOp(op, sub):
+            compileExp(sub, b)
+            b.emit(UnaryOp(UNARY_OPS[type(op)]))
+        case BinOp(left, And(), right):
+            compileExp(left, b)
+            b.emitIf(JumpIfFalse, lambda: compileExp(right, b), lambda: b.emit(Const(False)))
+        case BinOp(left, Or(), right):
+            compileExp(left, b)
+            b.emitIf(JumpIfFalse, lambda: b.emit(Const(True)), lambda: compileExp(right, b))
+        case BinOp(left, op, right):
+            compileExp(left, b)
+            compileExp(right, b)
+            b.emit(BinaryOp(BINARY_OPS[type(op)]))
+        case ArrayInitDyn(lenExp, initExp):
+            compileExp(lenExp, b)
+            compileExp(initExp, b)
+            b.emit(NewArrayDyn())
+        case ArrayInitStatic(es):
+            for x in es:
+                compileExp(x, b)
+            b.emit(NewArrayStatic(len(es)))
+        case Subscript(arrayExp, indexExp):
+            compileExp(arrayExp, b)
+            compileExp(indexExp, b)
+            b.emit(GetElem())
+
+def compileStmts(stmts: list[stmt], b: Builder):
+    for s in stmts:
+        compileStmt(s, b)
+
+def compileStmt(s: stmt, b: Builder):
+    match s:
+        case StmtExp(e):
+            compileExp(e, b)
+            b.emit(Pop())
+        case Assign(x, e):
+            compileExp(e, b)
+            b.emit(StoreVar(x))
+        case IfStmt(cond, thenBody, elseBody):
+            compileExp(cond, b)
+            b.emitIf(JumpIfFalse, lambda: compileStmts(thenBody, b),
+                     lambda: compileStmts(elseBody, b))
+        case WhileStmt(cond, body):
+            b.emitWhile(JumpIfFalse, lambda: compileStmts(body, b),
+                        lambda: compileExp(cond, b))
+        case SubscriptAssign(leftExp, idxExp, rightExp):
+            # Same evaluation order as the tree-walking interpreter
+            compileExp(idxExp, b)
+            compileExp(rightExp, b)
+            compileExp(leftExp, b)
+            b.emit(SetElem())
+        case Return(e):
+            if e is not None:
+                compileExp(e, b)
+            else:
+                b.emit(Const(None))
+            b.emit(Ret())
+
+@dataclass(frozen=True)
+class Program:
+    funs: dict[Ident, Code]
+    main: Code
+
+def compileFun(f: FunDef) -> Code:
+    b: Builder = CodeBuilder(Jump)
+    compileStmts(f.body, b)
+    # Falling off the end of a function returns None
+    b.emit(Const(None))
+    b.emit(Ret())
+    return b.finish()
+
+def compileModule(m: Module) -> Program:
+    funs = {f.name: compileFun(f) for f in m.funs}
+    b: Builder = CodeBuilder(Jump)
+    compileStmts(m.stmts, b)
+    return Program(funs, b.finish())
+
+def showCode(code: Code) -> str:
+    return '\n'.join(f'{i:4}: {instr}' for (i, instr) in enumerate(code))
+
+def run(prog: Program, env: Env, store: Store):
+    """
+    Runs the toplevel code of prog with the given (global) environment.
+    """
+    funEnv = store.funEnv
+    code = prog.main
+    pc = 0
+    stack: list[Any] = []
+    # Saved (code, pc, env) of the callers
+    frames: list[tuple[Code, int, Env]] = []
+    while pc < len(code):
+        instr = code[pc]
+        pc += 1
+        match instr:
+            case Load(x):
+                stack.append(env[x] if x in env else funEnv[x])
+            case Const(v):
+                stack.append(v)
+            case StoreVar(x):
+                env[x] = stack.pop()
+            case BinaryOp(op):
+                r = stack.pop()
+                stack[-1] = op(stack[-1], r)
+            case JumpIfFalse(target):
+                if not stack.pop():
+                    pc = target
+            case Jump(target):
+                pc = target
+            case Pop():
+                stack.pop()
+            case UnaryOp(op):
+                stack[-1] = op(stack[-1])
+            case GetElem():
+                i = asInt(stack.pop())
+                a = asAddress(stack.pop())
+                stack.append(store.resolve(a)[i])
+            case SetElem():
+                a = asAddress(stack.pop())
+                v = stack.pop()
+                i = asInt(stack.pop())
+                store.storeValue(a, i, v)
+            case CallFun(n):
+                args = stack[len(stack) - n:]
+                del stack[len(stack) - n:]
+                f = asFunDef(stack.pop())
+                frames.append((code, pc, env))
+                env = dict(zip([p.var for p in f.params], args))
+                code = prog.funs[f.name]
+                pc = 0
+            case Ret():
+                if not frames:
+                    raise ReturnException(stack.pop())
+                (code, pc, env) = frames.pop()
+            case Print():
+                print(asInt(stack.pop()))
+                stack.append(None)
+            case InputInt():
+                stack.append(int(utils.inputInt('Enter some int: ')))
+            case Len():
+                stack.append(len(store.resolve(asAddress(stack.pop()))))
+            case NewArrayDyn():
+                v = stack.pop()
+                n = asInt(stack.pop())
+                stack.append(store.alloc(n * [v]))
+            case NewArrayStatic(n):
+                l = stack[len(stack) - n:]
+                del stack[len(stack) - n:]
+                stack.append(store.alloc(l))
+
+def interpModule(m: Module, env: Env, store: Store):
+    """
+    Compiles m to bytecode and runs it. m must be type checked already, store.funEnv
+    must contain the function definitions of m.
+    """
+    prog = compileModule(m)
+    for (name, code) in prog.funs.items():
+        log.debugLazy(lambda: f'Bytecode for function {name.name}:\n{showCode(code)}')
+    log.debugLazy(lambda: f'Bytecode for toplevel statements:\n{showCode(prog.main)}')
+    run(prog, env, store)
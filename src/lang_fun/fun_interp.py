@@ -172,12 +172,21 @@ def interpStmts(stmts: list[stmt], env: Env, store: Store) -> None:
     if len(stmts) > 0:
         interpStmt(stmts[0], env, store, stmts[1:])
 
-def interpModule(m: mod):
+def interpModule(m: mod, bytecode: bool = False):
+    """
+    Interprets m. With bytecode=True, m is first compiled to bytecode, which is
+    then executed without recursion (see fun_bytecode).
+    """
     utils.assertType(m, Module)
     fun_tychecker.tycheckModule(m)
     env: Env = {}
     store = Store()
     for f in m.funs:
         store.funEnv[f.name] = f
-    interpStmts(m.stmts, env, store)
-    log.debug(f'After executing program.\nEnv: {env}\nStore: {store}')
+    if bytecode:
+        # imported here because fun_bytecode depends on this module
+        import lang_fun.fun_bytecode as fun_bytecode
+        fun_bytecode.interpModule(m, env, store)
+    else:
+        interpStmts(m.stmts, env, store)
+    log.debugLazy(lambda: f'After executing program.\nEnv: {env}\nStore: {store}')
@@ -337,6 +337,6 @@ def tycheckModule(m: mod) -> TycheckResult:
     t = tycheckStmts(m.stmts, st)
     if t is not None:
         raise CompileError.typeError(f'Return is only allowed inside a function')
-    log.debug(f'Symtab after typechecking: {st}')
-    log.debug(f'AST after typechecking: {pprint.pformat(m)}')
+    log.debugLazy(lambda: f'Symtab after typechecking: {st}')
+    log.debugLazy(lambda: f'AST after typechecking: {pprint.pformat(m)}')
     return TycheckResult(funLocalsDict, localsFromSymtab(st, []))
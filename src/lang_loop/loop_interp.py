@@ -1,6 +1,7 @@
 from lang_loop.loop_ast import *
 import lang_loop.loop_tychecker as loop_tychecker
 import common.utils as utils
+import common.flatInterp as flatInterp
 from typing import *
 
 type Environ = dict[Ident, TyValue]
@@ -82,7 +83,33 @@ def interpStmts(stmts: list[stmt], env: Environ) -> None:
     if len(stmts) > 0:
         interpStmt(stmts[0], env, stmts[1:])
 
-def interpModule(m: mod):
+def lowerStmts(stmts: list[stmt], env: Environ, b: flatInterp.Builder) -> None:
+    for s in stmts:
+        lowerStmt(s, env, b)
+
+def lowerStmt(s: stmt, env: Environ, b: flatInterp.Builder) -> None:
+    match s:
+        case IfStmt(cond, thenBody, elseBody):
+            b.emitIf(flatInterp.jumpIfFalse(lambda: interpExp(cond, env)),
+                     lambda: lowerStmts(thenBody, env, b),
+                     lambda: lowerStmts(elseBody, env, b))
+        case WhileStmt(cond, body):
+            b.emitWhile(flatInterp.jumpIfFalse(lambda: interpExp(cond, env)),
+                        lambda: lowerStmts(body, env, b))
+        case _:
+            b.emit(flatInterp.Exec(lambda: interpStmt(s, env, [])))
+
+def interpModule(m: mod, flat: bool = False):
+    """
+    Interprets m. With flat=True, the statements are first lowered to flat code,
+    which is then executed without recursion (see common.flatInterp).
+    """
     utils.assertType(m, Module)
     loop_tychecker.tycheckModule(m)
-    interpStmts(m.stmts, {})
+    env: Environ = {}
+    if flat:
+        b = flatInterp.newBuilder()
+        lowerStmts(m.stmts, env, b)
+        flatInterp.run(b.finish())
+    else:
+        interpStmts(m.stmts, env)
@@ -1,55 +1,73 @@
-# AUTOMATICALLY GENERATED (2024-03-13 15:00:03)
+# AUTOMATICALLY GENERATED (2026-10-18 03:18:29)
 from __future__ import annotations
 from dataclasses import dataclass
 
 type optional[T] = T | None
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True, eq=False)
 class Ident:
+    """
+    Identifiers are interned: Ident(name) always returns the same object for the same name.
+    Thus, comparing identifiers is mostly an identity check.
+    """
     name: str
+    def __new__(cls, name: str) -> Ident:
+        x = _identTable.get(name)
+        if x is None:
+            x = object.__new__(cls)
+            _identTable[name] = x
+        return x
+    def __eq__(self, other: object) -> bool:
+        return self is other or (isinstance(other, Ident) and self.name == other.name)
+    def __hash__(self) -> int:
+        return hash(self.name)
+    def __reduce__(self) -> tuple[type[Ident], tuple[str]]:
+        return (Ident, (self.name,))
+
+_identTable: dict[str, Ident] = {}
 
 type ident = Ident
 type string = str
 
-@dataclass
+@dataclass(slots=True)
 class USub:
     pass
 
 type unaryop = USub
 
-@dataclass
+@dataclass(slots=True)
 class Add:
     pass
 
-@dataclass
+@dataclass(slots=True)
 class Sub:
     pass
 
-@dataclass
+@dataclass(slots=True)
 class Mul:
     pass
 
 type binaryop = Add | Sub | Mul
 
-@dataclass
+@dataclass(slots=True)
 class IntConst:
     value: int
 
-@dataclass
+@dataclass(slots=True)
 class Name:
     name: ident
 
-@dataclass
+@dataclass(slots=True)
 class Call:
     name: ident
     args: list[exp]
 
-@dataclass
+@dataclass(slots=True)
 class UnOp:
     op: unaryop
     arg: exp
 
-@dataclass
+@dataclass(slots=True)
 class BinOp:
     left: exp
     op: binaryop
@@ -57,18 +75,18 @@ class BinOp:
 
 type exp = IntConst | Name | Call | UnOp | BinOp
 
-@dataclass
+@dataclass(slots=True)
 class StmtExp:
     exp: exp
 
-@dataclass
+@dataclass(slots=True)
 class Assign:
     var: ident
     right: exp
 
 type stmt = StmtExp | Assign
 
-@dataclass
+@dataclass(slots=True)
 class Module:
     stmts: list[stmt]
 
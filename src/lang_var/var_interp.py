@@ -1,6 +1,7 @@
 from lang_var.var_ast import *
 import lang_var.var_tychecker as var_tychecker
 import common.utils as utils
+import common.flatInterp as flatInterp
 from typing import *
 
 type Env = dict[Ident, TyValue]
@@ -49,7 +50,25 @@ def interpStmts(stmts: list[stmt], env: Env) -> None:
     for stmt in stmts:
         interpStmt(stmt, env)
 
-def interpModule(m: mod):
+def lowerStmts(stmts: list[stmt], env: Env, b: flatInterp.Builder) -> None:
+    for s in stmts:
+        lowerStmt(s, env, b)
+
+def lowerStmt(s: stmt, env: Env, b: flatInterp.Builder) -> None:
+    b.emit(flatInterp.Exec(lambda: interpStmt(s, env)))
+
+def interpModule(m: mod, flat: bool = False):
+    """
+    Interprets m. With flat=True, the statements are first lowered to flat code
+    (see common.flatInterp). lang_var has no control flow, so this mode exists mainly
+    for uniformity with the other languages.
+    """
     utils.assertType(m, Module)
     var_tychecker.tycheckModule(m)
-    interpStmts(m.stmts, {})
+    env: Env = {}
+    if flat:
+        b = flatInterp.newBuilder()
+        lowerStmts(m.stmts, env, b)
+        flatInterp.run(b.finish())
+    else:
+        interpStmts(m.stmts, env)
@@ -6,9 +6,11 @@ import common.genericParser as genericParser
 import common.utils as utils
 import common.log as log
 import common.constants as constants
+import common.compileServer as compileServer
 import parsers.lang_simple.simple_parser as simple_parser
 import assembly.compiler as tac_comp
 import assembly.tacInterp as tac_interp
+import assembly.tacSpillToMips as tac_spill_to_mips
 import importlib
 import shell
 import sys
@@ -22,6 +24,8 @@ def parseArgs():
     parser.add_argument('--lang', choices=['simple', 'var', 'loop', 'array', 'fun', 'tinyJson'],
                         help='The language (guessed from path of input file if not given)')
     parser.add_argument('--level', help='The loglevel (debug, info, warn)')
+    parser.add_argument('--log-file-level',
+                        help='The loglevel for minipy.log (default: same as --level)')
     subparsers = parser.add_subparsers(help='Commands', dest='cmd')
 
     helpCompiler = f'''Compiles the given input file. Depending on the extension of the output file,
@@ -31,14 +35,21 @@ Exit code {constants.COMPILE_ERROR_EXIT_CODE} for compile error (source program
 exit codes signal a bug in the compiler itself.'''
     cp = subparsers.add_parser('compile', help=helpCompiler)
     def addCompilerArgs(p: argparse.ArgumentParser):
-        p.add_argument('--wat2wasm', default='wat2wasm',
-                           help='Path to the wat2wasm tool')
+        p.add_argument('--wat2wasm', default=None,
+                           help='Path to the wat2wasm tool. If not given, the .wasm file is ' \
+                               'produced by the builtin binary encoder')
         p.add_argument('--output', default=DEFAULT_OUTPUT,
                        help=f'Output file (.wat or .wasm). Default: {DEFAULT_OUTPUT}')
+        p.add_argument('--pretty-wat', action='store_true',
+                       help='Use a nicer but much slower layout for .wat files')
         p.add_argument('--max-mem-size', type=int,
                        help="Max memory size in number of 64kB pages")
         p.add_argument('--max-array-size', type=int,
                        help="Max size of an array in bytes")
+        p.add_argument('--cache-dir',
+                       help='Directory for caching compilation results (default: no caching)')
+        p.add_argument('--cache-max-size', type=int, default=100,
+                       help='Max size of the compilation cache in MB (default: 100)')
         p.add_argument('input', help='Input file .py')
     addCompilerArgs(cp)
     run = subparsers.add_parser('run', help='Compiles the given program and runs it with iwasm. Also see the ' \
@@ -49,6 +60,12 @@ exit codes signal a bug in the compiler itself.'''
 
     interp = subparsers.add_parser('interp', help='Runs the given file through our own interpeter')
     interp.add_argument('--level', help='The loglevel (debug, info, warn)')
+    interp.add_argument('--bytecode', action='store_true',
+                        help='Compile to bytecode before interpreting (only works for lang_fun)')
+    interp.add_argument('--flat', action='store_true',
+                        help='Lower the program to flat code before interpreting. Faster, and '\
+                            'no recursion limit for long-running loops (only works for lang_var, '\
+                            'lang_loop and lang_array)')
     interp.add_argument('input', help='Input file .py')
 
     tacInterp = subparsers.add_parser('tacInterp',
@@ -66,6 +83,10 @@ exit codes signal a bug in the compiler itself.'''
     assembly.add_argument('--level', help='The loglevel (debug, info, warn)')
     assembly.add_argument('--max-registers', type=int,
                           help="Max number of registers used")
+    assembly.add_argument('--selector', choices=list(tac_spill_to_mips.ASSIGN_SELECTORS),
+                          default=tac_spill_to_mips.DEFAULT_ASSIGN_SELECTOR,
+                          help='Instruction selector for assignments. "table" uses the builtin ' \
+                              f'pattern table (default: {tac_spill_to_mips.DEFAULT_ASSIGN_SELECTOR})')
     assembly.add_argument('input', help='Input file .py')
     assembly.add_argument('output', default='out.as', help='Output file .as (default: out.as)')
 
@@ -75,14 +96,22 @@ exit codes signal a bug in the compiler itself.'''
 
     p = subparsers.add_parser('parse', help='Parse the given file')
     p.add_argument('--level', help='The loglevel (debug, info, warn)')
-    p.add_argument('--alg', choices=['earley', 'lalr'], default='lalr',
-                   help='Parsing algorithm (default: lalr)')
+    p.add_argument('--alg', choices=['earley', 'lalr', 'll1'],
+                   help='Parsing algorithm (default: ll1 for language simple, lalr otherwise)')
     p.add_argument('--grammar', type=str, metavar='FILE',
                    help='Optional .lark grammar')
     p.add_argument('--png', type=str, metavar='FILE',
                    help='Optional .png for for parse tree visualization')
+    p.add_argument('--iterative', action='store_true',
+                   help='tinyJson only: use the iterative parser for large inputs')
     p.add_argument('input', help='Input file .py')
 
+    serve = subparsers.add_parser('serve',
+                                  help='Runs a compile server that keeps a warm process around. ' \
+                                      'Use src/client.py to send commands to the server.')
+    serve.add_argument('--socket', default=constants.DEFAULT_SERVER_SOCKET,
+                       help=f'Unix socket to listen on. Default: {constants.DEFAULT_SERVER_SOCKET}')
+
     args = parser.parse_args()
     if args.cmd is None:
         utils.abort(f'No command given')
@@ -90,7 +119,9 @@ exit codes signal a bug in the compiler itself.'''
         utils.abort('Language simple only available when parsing')
     return args
 
-def importModule(lang: str, kind: Literal['compile', 'interp', 'ast', 'parse']):
+type ModuleKind = Literal['compile', 'interp', 'ast', 'parse']
+
+def importModule(lang: str, kind: ModuleKind):
     if lang == 'simple':
         return None
     match kind:
@@ -105,6 +136,26 @@ def importModule(lang: str, kind: Literal['compile', 'interp', 'ast', 'parse']):
     m = importlib.import_module(modName)
     return m
 
+def defaultParseAlg(lang: str) -> Literal['ll1', 'lalr']:
+    # The grammar of language simple is LL(1) after removing left recursion
+    return 'll1' if lang == 'simple' else 'lalr'
+
+def preloadModules():
+    """
+    Imports all modules that might be needed for some command.
+    """
+    kinds: list[ModuleKind] = ['compile', 'interp', 'ast', 'parse']
+    for lang in constants.ALL_LANGUAGES:
+        for kind in kinds:
+            try:
+                importModule(lang, kind)
+            except ImportError:
+                pass # not all languages support all commands
+    try:
+        importlib.import_module('parsers.tinyJson.tinyJson_parser')
+    except ImportError:
+        pass
+
 def getFun(mod: Any, fun: str):
     try:
         return getattr(mod, fun)
@@ -136,8 +187,28 @@ def runWithPython(srcFile: str):
 
 def main():
     args = parseArgs()
+    initLog(args)
+    if args.cmd == 'serve':
+        compileServer.serve(args.socket, preloadModules, serveRequest)
+        return
+    runCommand(args)
+
+def serveRequest():
+    """
+    Runs the command of a single request inside the compile server.
+    """
+    args = parseArgs()
+    if args.cmd == 'serve':
+        utils.abort('Cannot start a compile server from inside the compile server')
+    initLog(args)
+    runCommand(args)
+
+def initLog(args: argparse.Namespace):
     level = log.resolveLevelName(args.level or 'warn')
-    log.init(level, 'minipy.log')
+    fileLevel = log.resolveLevelName(args.log_file_level) if args.log_file_level else None
+    log.init(level, 'minipy.log', fileLevel)
+
+def runCommand(args: argparse.Namespace):
     if args.lang:
         lang = args.lang
     else:
@@ -159,27 +230,35 @@ def main():
             compilerMod = importModule(lang, 'compile')
             compileFun = getFun(compilerMod, 'compileModule')
             compileArgs = genericCompiler.Args(args.input, args.output, args.wat2wasm,
-                                                args.max_mem_size, args.max_array_size)
-            genericCompiler.compileMain(compileArgs, compileFun, ast)
+                                                args.max_mem_size, args.max_array_size,
+                                                prettyWat=args.pretty_wat,
+                                                cacheDir=args.cache_dir,
+                                                cacheMaxSize=args.cache_max_size * 1024 * 1024)
+            genericCompiler.compileMainCached(compileArgs, compileFun, ast)
             if args.cmd == "run":
                 runWasm(args.run_wasm, args.output)
         case "interp":
             ast = importModule(lang, 'ast')
             interpMod = importModule(lang, 'interp')
             interpFun = getFun(interpMod, 'interpModule')
-            interpArgs = genericInterp.Args(args.input)
+            if args.bytecode and lang != 'fun':
+                utils.abort('--bytecode only works for lang_fun')
+            if args.flat and lang not in ['var', 'loop', 'array']:
+                utils.abort('--flat only works for lang_var, lang_loop and lang_array')
+            interpArgs = genericInterp.Args(args.input, args.bytecode, args.flat)
             genericInterp.interpMain(interpArgs, interpFun, ast)
         case "pyrun":
             runWithPython(args.input)
         case "parse":
             parserArgs = genericParser.ParserArgs(utils.readTextFile(args.input),
-                                                  args.alg, args.png, args.grammar)
+                                                  args.alg or defaultParseAlg(lang),
+                                                  args.png, args.grammar)
             if lang == 'simple':
                 simple_parser.parse(parserArgs)
             elif lang == 'tinyJson':
                 tinyJson_parser = utils.importModuleNotInStudent('parsers.tinyJson.tinyJson_parser')
                 f = args.input
-                x = tinyJson_parser.parse(utils.readTextFile(f))
+                x = tinyJson_parser.parse(utils.readTextFile(f), args.iterative)
                 print(f'Successfully parsed {f} as json.')
                 print(x)
             else:
@@ -188,12 +267,12 @@ def main():
                 parseFun = getFun(parseMod, 'parseModule')
                 genericParser.parseWithOwnParser(args.input, parserArgs, ast, parseFun)
         case "tacInterp":
-            compileArgs = genericCompiler.Args(args.input, '/tmp/dummy.wasm', 'wat2wasm', 1, 1)
+            compileArgs = genericCompiler.Args(args.input, '/tmp/dummy.wasm', None, 1, 1)
             tac_interp.interpFile(compileArgs, args.print_tac)
         case "assembly":
-            compileArgs = genericCompiler.Args(args.input, args.output, 'wat2wasm', 1, 1,
+            compileArgs = genericCompiler.Args(args.input, args.output, None, 1, 1,
                                                args.max_registers)
-            tac_comp.compileFile(compileArgs)
+            tac_comp.compileFile(compileArgs, args.selector)
         case _:
             utils.abort(f'Unknown command: {args.cmd}')
 
@@ -1,12 +1,20 @@
 from typing import *
 from lark import Lark, Token, Tree, ParseTree, tree, exceptions
+from lark.lark import PostLex
+from lark.lexer import PatternStr
+from lark.tree import Meta
 import pydot
+import re
+import weakref
 import common.log as log
 import common.utils as utils
 from dataclasses import dataclass
 import os
 
-type ParseAlg = Literal['earley', 'lalr']
+type LarkAlg = Literal['earley', 'lalr']
+
+# ll1 is our own table-driven parser, see parsers/ll1.py
+type ParseAlg = LarkAlg | Literal['ll1']
 
 class TokenStream:
     """
@@ -95,6 +103,54 @@ def isAmbiguous(t: ParseTree) -> bool:
                 return True
         return False
 
+class _ParseTree(Tree[Token]):
+    """
+    The tree class used by parsers built with mkParser. NEWLINE tokens are removed and
+    ambiguity is detected while the parser builds the tree, so no extra pass over the
+    tree is needed. Children are always built before their parent.
+
+    Trees of rules starting with _ (except _ambig) are inlined into their parent by lark,
+    which reuses and extends their list of children. They are handled when the parent is
+    built, processing them here would make parsing of long repetitions quadratic.
+    """
+    def __init__(self, data: str, children: list[Any], meta: Optional[Meta]=None):
+        self.ambiguous: bool = False
+        if data.startswith('_') and data != '_ambig':
+            super().__init__(data, children, meta)
+            return
+        kept: list[Any] = []
+        ambiguous = data == '_ambig'
+        for c in children:
+            if isinstance(c, Token):
+                if c.type != 'NEWLINE':
+                    kept.append(c)
+            else:
+                if isinstance(c, _ParseTree) and c.ambiguous:
+                    ambiguous = True
+                kept.append(c)
+        super().__init__(data, kept, meta)
+        self.ambiguous = ambiguous
+
+class _TokenRecorder(PostLex):
+    """
+    Passes the tokens of the lexer on to the parser. If debug logging is enabled, the tokens
+    are also recorded in a buffer, so they can be logged without lexing the input again.
+    """
+    always_accept = ()
+    def __init__(self):
+        self.tokens: list[Token] = []
+    def process(self, stream: Iterator[Token]) -> Iterator[Token]:
+        self.tokens = []
+        if not log.isDebugEnabled():
+            return stream
+        return self.__record(stream)
+    def __record(self, stream: Iterator[Token]) -> Iterator[Token]:
+        for t in stream:
+            self.tokens.append(t)
+            yield t
+    def logTokens(self):
+        log.debugLazy(lambda: 'tokens:\n' + '\n'.join(['  ' + repr(t) for t in self.tokens]))
+
 def tree_to_dot(t: ParseTree, filename: str):
     f: Callable[[ParseTree], pydot.Dot] = getattr(tree, 'pydot__tree_to_graph')
     graph = f(t)
@@ -124,16 +180,80 @@ class ParseError(Exception):
 def mkLexer(grammarFile: str) -> Lark:
     return mkParser('earley', grammarFile, 'start')
 
-def mkParser(alg: ParseAlg, grammarFile: str, start: str) -> Lark:
+@dataclass(frozen=True)
+class _StreamLexer:
+    regex: re.Pattern[str]
+    ignore: frozenset[str]
+    keywords: dict[str, str] # value of a string terminal -> name of the terminal
+
+_streamLexers: weakref.WeakKeyDictionary[Lark, _StreamLexer] = weakref.WeakKeyDictionary()
+
+def _mkStreamLexer(lexer: Lark) -> _StreamLexer:
+    # Same order as lark's basic lexer
+    terminals = sorted(lexer.terminals, key=lambda t:
+                       (-t.priority, -t.pattern.max_width, -len(t.pattern.value), t.name))
+    regex = re.compile('|'.join(f'(?P<{t.name}>{t.pattern.to_regexp()})' for t in terminals))
+    keywords = {t.pattern.value: t.name for t in terminals if isinstance(t.pattern, PatternStr)}
+    return _StreamLexer(regex, frozenset(lexer.ignore_tokens), keywords)
+
+def lexStream(lexer: Lark, code: str) -> Iterator[Token]:
+    """
+    A faster replacement for lexer.lex(code). Tokens are produced on demand by matching a
+    single regular expression for all terminals. A match of a regex terminal whose text is
+    also the value of a string terminal yields a token of the string terminal (e.g. keywords).
+    Tokens only have a start position, no line and column.
+    """
+    sl = _streamLexers.get(lexer)
+    if sl is None:
+        sl = _mkStreamLexer(lexer)
+        _streamLexers[lexer] = sl
+    match = sl.regex.match
+    ignore = sl.ignore
+    keywords = sl.keywords
+    pos = 0
+    n = len(code)
+    while pos < n:
+        m = match(code, pos)
+        if m is None:
+            raise ParseError(f'No terminal matches input at position {pos}: {code[pos:pos+20]!r}')
+        name = utils.assertNotNone(m.lastgroup)
+        if name not in ignore:
+            value = m.group()
+            yield Token(keywords.get(value, name), value, start_pos=pos)
+        pos = m.end()
+
+type _ParserKey = tuple[str, int, LarkAlg, str]
+
+# Building a parser is expensive, so parsers are cached per process. The key contains the
+# modification time of the grammar file, so changes to the grammar are picked up.
+_parserCache: dict[_ParserKey, Lark] = {}
+
+def mkParser(alg: LarkAlg, grammarFile: str, start: str) -> Lark:
+    """
+    Returns a parser for the grammar in grammarFile, building it only if the grammar file or
+    the arguments changed since the last call. For lalr, lark also caches the parse tables
+    on disk, so the tables survive the process.
+    """
+    path = os.path.abspath(grammarFile)
+    key: _ParserKey = (path, os.stat(path).st_mtime_ns, alg, start)
+    parser = _parserCache.get(key)
+    if parser is None:
+        parser = _buildParser(alg, grammarFile, start)
+        _parserCache[key] = parser
+    return parser
+
+def _buildParser(alg: LarkAlg, grammarFile: str, start: str) -> Lark:
     grammar = utils.readTextFile(grammarFile)
     try:
         match alg:
             case 'earley':
                 return Lark(grammar, start=start, ambiguity='explicit', parser='earley',
-                            lexer='basic', debug=True)
+                            lexer='basic', debug=True, tree_class=_ParseTree,
+                            postlex=_TokenRecorder())
             case 'lalr':
                 return Lark(grammar, start=start, parser='lalr', strict=True,
-                            debug=False, lexer='basic')
+                            debug=False, lexer='basic', tree_class=_ParseTree,
+                            postlex=_TokenRecorder(), cache=True)
     except exceptions.LarkError as err:
         if alg == 'lalr':
             # lark does not output details about conflicts if running with strict=True.
@@ -142,21 +262,30 @@ def mkParser(alg: ParseAlg, grammarFile: str, start: str) -> Lark:
         raise ParseError(f'Error constructing {alg} parser from grammar in {grammarFile}: {err}')
 
 def _parseAsParseTree(parser: Lark, s: str, png: Optional[str]) -> ParseTree:
+    """
+    Parses s in a single pass: the input is lexed only once, NEWLINE tokens are removed
+    and ambiguity is detected while the tree is built (see _ParseTree).
+    """
     s = s.rstrip() + '\n' # ensure there is one trailing newline
+    recorder = parser.options.postlex
     try:
-        lexed = parser.lex(s)
-        lexedRepr = ['  ' + repr(tok) for tok in lexed]
-        log.debug('tokens:\n' + '\n'.join(lexedRepr))
         parseTree = parser.parse(s)
     except exceptions.LarkError as err:
+        if isinstance(recorder, _TokenRecorder):
+            recorder.logTokens()
         raise ParseError(str(err))
-    removeNewlines(parseTree)
-    log.debug(f'parse tree:\n{parseTree}')
-    log.debug(f'parse tree (pretty):\n{parseTree.pretty()}')
+    if isinstance(recorder, _TokenRecorder):
+        recorder.logTokens()
+    if not isinstance(parseTree, _ParseTree):
+        # parser was not built by mkParser
+        removeNewlines(parseTree)
+    log.debugLazy(lambda: f'parse tree:\n{parseTree}')
+    log.debugLazy(lambda: f'parse tree (pretty):\n{parseTree.pretty()}')
     if png is not None:
         parseTreeToPng(png, parseTree)
-    if isAmbiguous(parseTree):
-        raise ParseError(f'Got multiple parse trees (see logfile or png). ' \
+    ambiguous = parseTree.ambiguous if isinstance(parseTree, _ParseTree) else isAmbiguous(parseTree)
+    if ambiguous:
+        raise ParseError(f'Got multiple parse trees (see logfile with --level debug or png). ' \
             'You need to disambiguate your grammer.')
     return parseTree
 
@@ -165,6 +294,9 @@ def parseAsTree(args: ParserArgs, defaultGrammarFile: str, startSym: str) -> Par
         grammarFile = defaultGrammarFile
     else:
         grammarFile = args.grammarFile
+    if args.parseAlg == 'll1':
+        import parsers.ll1 as ll1 # ll1 depends on this module
+        return ll1.parseAsTree(grammarFile, startSym, args.code, args.parseTreePng)
     parser = mkParser(args.parseAlg, grammarFile, startSym)
     parseTree = _parseAsParseTree(parser, args.code, args.parseTreePng)
     return parseTree
@@ -18,7 +18,7 @@ def parse(code: str):
     toks = TokenStream(lexed)
     ast = ruleE(toks)
     toks.ensureEof(code)
-    log.debug(f'AST: {ast}')
+    log.debugLazy(lambda: f'AST: {ast}')
     return ast
 
 # E → F + E | F
@@ -8,7 +8,7 @@ grammarFile = "./src/parsers/lang_simple/simple_grammar.lark"
 def parse(args: ParserArgs) -> exp:
     parseTree = parseAsTree(args, grammarFile, 'exp')
     ast = parseTreeToExpAst(parseTree)
-    log.debug(f'AST: {ast}')
+    log.debugLazy(lambda: f'AST: {ast}')
     return ast
 
 def parseTreeToExpAst(t: ParseTree) -> exp:
@@ -19,7 +19,7 @@ def parse(code: str):
     toks = TokenStream(lexed)
     ast = ruleExp(toks)
     toks.ensureEof(code)
-    log.debug(f'AST: {ast}')
+    log.debugLazy(lambda: f'AST: {ast}')
     return ast
 
 # exp: exp_1 expA
@@ -8,7 +8,7 @@ grammarFile = "./src/parsers/lang_var/var_grammar.lark"
 def parse(args: ParserArgs) -> exp:
     parseTree = parseAsTree(args, grammarFile, 'lvar')
     ast = parseTreeToExpAst(parseTree)
-    log.debug(f'AST: {ast}')
+    log.debugLazy(lambda: f'AST: {ast}')
     return ast
 
 def parseTreeToExpAst(t: ParseTree) -> exp:
@@ -44,7 +44,7 @@ def parseTreeToExpAst(t: ParseTree) -> exp:
 def parseModule(args: ParserArgs) -> mod:
     parseTree = parseAsTree(args, grammarFile, "lvar")
     ast = parseTreeToModuleAst(parseTree)
-    log.debug(f"Module AST:: {ast}")
+    log.debugLazy(lambda: f'Module AST:: {ast}')
     return ast
 
 def parseTreeToStmtAst(t : ParseTree) -> stmt:
@@ -0,0 +1,339 @@
+"""
+A table-driven LL(1) parser for lark grammars.
+
+The generator reads the rules of a lark grammar, removes immediate left recursion,
+computes FIRST and FOLLOW sets, and builds a predictive parse table. The parser uses
+this table with an explicit stack, so it runs in linear time, never backtracks, and
+does not depend on python's recursion limit.
+
+The parse trees are the same as those built by lark (and parseAsTree): a left-recursive
+rule such as
+
+    exp: exp "+" exp_1 -> add_exp
+       | exp_1         -> exp_1
+
+still yields left-nested add_exp trees. Each right-hand side ends with a Reduce item
+that builds the tree from the values parsed for the right-hand side.
+
+Usage for printing the parse table of a grammar:
+
+  PYTHONPATH=src python -m parsers.ll1 GRAMMAR_FILE START_SYMBOL
+"""
+from typing import *
+from dataclasses import dataclass
+import sys
+import weakref
+from lark import Lark, Token, Tree, ParseTree
+from lark.grammar import Rule, Terminal, NonTerminal
+from parsers.common import *
+import common.log as log
+
+@dataclass(frozen=True)
+class Term:
+    name: str
+    keep: bool # whether the token becomes part of the parse tree
+
+@dataclass(frozen=True)
+class NonTerm:
+    name: str
+
+@dataclass(frozen=True)
+class Reduce:
+    """
+    Pops n values and builds a tree with the given data.
+    """
+    data: str
+    n: int
+    expand1: bool # rule of the form ?rule, a single child replaces the tree
+    inline: bool # rule of the form _rule, the children are inlined into the parent
+    # Number of None placeholders (for missing [x] items) before each of the n values,
+    # the last entry is the number of placeholders after the last value
+    nones: tuple[int, ...]
+
+type Item = Term | NonTerm | Reduce
+
+type Rhs = tuple[Item, ...]
+
+class GrammarError(Exception):
+    """
+    The grammar is not LL(1), even after removing immediate left recursion.
+    """
+    def __init__(self, msg: str):
+        super().__init__(msg)
+
+@dataclass(frozen=True)
+class LL1Table:
+    start: str
+    # Nonterminal -> terminal of the lookahead -> right-hand side to expand
+    rows: dict[str, dict[str, Rhs]]
+    first: dict[str, frozenset[str]]
+    follow: dict[str, frozenset[str]]
+
+EOF = TokenStream.eof.type
+
+def _tailName(nt: str) -> str:
+    # Lark rule names cannot contain ', so there are no name clashes
+    return nt + "'"
+
+def _emptyCounts(rule: Rule, maybePlaceholders: bool) -> list[int]:
+    """
+    Returns the number of None placeholders lark inserts before each symbol of the
+    expansion of rule, and after the last symbol.
+    """
+    empty = rule.options.empty_indices if maybePlaceholders else ()
+    if not empty:
+        return [0] * (len(rule.expansion) + 1)
+    # empty_indices has one False per symbol and one True per placeholder
+    return [len(ones) for ones in ''.join(str(int(b)) for b in empty).split('0')]
+
+def _rhs(rule: Rule, dropFirst: bool, maybePlaceholders: bool) -> tuple[list[Item], Reduce]:
+    keepAll = rule.options.keep_all_tokens
+    emptyCounts = _emptyCounts(rule, maybePlaceholders)
+    items: list[Item] = []
+    nones: list[int] = []
+    pending = 0 # placeholders before the next value
+    for (i, s) in enumerate(rule.expansion):
+        pending += emptyCounts[i]
+        if i == 0 and dropFirst:
+            keep = True # the tree of the left-recursive occurrence is already a value
+        else:
+            match s:
+                case Terminal():
+                    keep = (keepAll or not s.filter_out) and s.name != 'NEWLINE'
+                    items.append(Term(s.name, keep))
+                case NonTerminal():
+                    keep = True
+                    items.append(NonTerm(s.name))
+                case _:
+                    raise GrammarError(f'Unexpected symbol {s} in rule {rule}')
+        if keep:
+            nones.append(pending)
+            pending = 0
+    nones.append(pending + emptyCounts[-1])
+    origin = str(rule.origin.name)
+    data = str(rule.alias) if rule.alias else origin
+    inline = origin.startswith('_') and not rule.alias
+    return (items, Reduce(data, len(nones) - 1, rule.options.expand1, inline, tuple(nones)))
+
+def grammarFromRules(rules: list[Rule], maybePlaceholders: bool) -> dict[str, list[Rhs]]:
+    """
+    Converts the rules of a lark grammar into a grammar without immediate left recursion.
+    Rules A: A a_1 | ... | A a_k | b_1 | ... | b_m become
+    A: b_1 A' | ... | b_m A' and A': a_1 A' | ... | a_k A' | <empty>.
+    With maybePlaceholders (the lark option of the same name), the trees contain None
+    for missing [x] items, as with lark.
+    """
+    byOrigin: dict[str, list[Rule]] = {}
+    for r in rules:
+        byOrigin.setdefault(str(r.origin.name), []).append(r)
+    g: dict[str, list[Rhs]] = {}
+    for (nt, rs) in byOrigin.items():
+        def isLeftRec(r: Rule) -> bool:
+            return len(r.expansion) > 0 and r.expansion[0] == r.origin
+        leftRec = [r for r in rs if isLeftRec(r)]
+        if not leftRec:
+            g[nt] = []
+            for r in rs:
+                (items, red) = _rhs(r, False, maybePlaceholders)
+                g[nt].append(tuple(items + [red]))
+            continue
+        tail = _tailName(nt)
+        g[nt] = []
+        g[tail] = [()]
+        for r in rs:
+            if isLeftRec(r):
+                (items, red) = _rhs(r, True, maybePlaceholders)
+                g[tail].append(tuple(items + [red, NonTerm(tail)]))
+            else:
+                (items, red) = _rhs(r, False, maybePlaceholders)
+                g[nt].append(tuple(items + [red, NonTerm(tail)]))
+    return g
+
+def _firstOfSeq(rhs: Iterable[Item], first: dict[str, set[str]],
+                nullable: set[str]) -> tuple[set[str], bool]:
+    """
+    Returns the FIRST set of rhs and whether rhs is nullable.
+    """
+    result: set[str] = set()
+    for item in rhs:
+        match item:
+            case Term(name, _):
+                result.add(name)
+                return (result, False)
+            case NonTerm(name):
+                result |= first[name]
+                if name not in nullable:
+                    return (result, False)
+            case Reduce():
+                pass
+    return (result, True)
+
+def buildTable(g: dict[str, list[Rhs]], start: str) -> LL1Table:
+    """
+    Computes FIRST and FOLLOW sets for g and builds the predictive parse table. Raises a
+    GrammarError if g is not LL(1).
+    """
+    for alts in g.values():
+        for rhs in alts:
+            for item in rhs:
+                if isinstance(item, NonTerm) and item.name not in g:
+                    raise GrammarError(f'Undefined nonterminal {item.name}')
+    first: dict[str, set[str]] = {nt: set() for nt in g}
+    nullable: set[str] = set()
+    changed = True
+    while changed:
+        changed = False
+        for (nt, alts) in g.items():
+            for rhs in alts:
+                (f, isNullable) = _firstOfSeq(rhs, first, nullable)
+                if not f <= first[nt]:
+                    first[nt] |= f
+                    changed = True
+                if isNullable and nt not in nullable:
+                    nullable.add(nt)
+                    changed = True
+    follow: dict[str, set[str]] = {nt: set() for nt in g}
+    follow[start].add(EOF)
+    changed = True
+    while changed:
+        changed = False
+        for (nt, alts) in g.items():
+            for rhs in alts:
+                for (i, item) in enumerate(rhs):
+                    if not isinstance(item, NonTerm):
+                        continue
+                    (f, restNullable) = _firstOfSeq(rhs[i+1:], first, nullable)
+                    if restNullable:
+                        f = f | follow[nt]
+                    if not f <= follow[item.name]:
+                        follow[item.name] |= f
+                        changed = True
+    rows: dict[str, dict[str, Rhs]] = {nt: {} for nt in g}
+    for (nt, alts) in g.items():
+        for rhs in alts:
+            (f, isNullable) = _firstOfSeq(rhs, first, nullable)
+            if isNullable:
+                f = f | follow[nt]
+            for t in f:
+                if t in rows[nt]:
+                    raise GrammarError(f'Grammar is not LL(1): conflict for {nt} on {t} ' \
+                        f'between {showRhs(rows[nt][t])} and {showRhs(rhs)}')
+                rows[nt][t] = rhs
+    return LL1Table(start, rows,
+                    {nt: frozenset(s) for (nt, s) in first.items()},
+                    {nt: frozenset(s) for (nt, s) in follow.items()})
+
+def showRhs(rhs: Rhs) -> str:
+    items: list[str] = []
+    for item in rhs:
+        match item:
+            case Term(name, _) | NonTerm(name):
+                items.append(name)
+            case Reduce(data, n, _, _, _):
+                items.append(f'<{data}/{n}>')
+    return ' '.join(items) if items else '<empty>'
+
+def showTable(table: LL1Table) -> str:
+    lines: list[str] = []
+    for (nt, row) in table.rows.items():
+        lines.append(f'{nt}:')
+        lines.append(f'  FIRST:  {" ".join(sorted(table.first[nt]))}')
+        lines.append(f'  FOLLOW: {" ".join(sorted(table.follow[nt]))}')
+        for (t, rhs) in sorted(row.items()):
+            lines.append(f'  {t} -> {showRhs(rhs)}')
+    return '\n'.join(lines)
+
+_tables: weakref.WeakKeyDictionary[Lark, dict[str, LL1Table]] = weakref.WeakKeyDictionary()
+
+def getTable(grammarFile: str, start: str) -> LL1Table:
+    """
+    Returns the LL(1) table for the grammar in grammarFile. The table is computed only once
+    for each version of the grammar file.
+    """
+    lexer = mkParser('earley', grammarFile, start) # cached, provides rules and terminals
+    tables = _tables.setdefault(lexer, {})
+    if start not in tables:
+        rules = grammarFromRules(lexer.rules, lexer.options.maybe_placeholders)
+        tables[start] = buildTable(rules, start)
+    return tables[start]
+
+type _Value = Token | ParseTree | list[Any]
+
+def parseTokens(table: LL1Table, toks: TokenStream) -> ParseTree:
+    """
+    Parses toks with the predictive parse table. Trees of inlined rules are represented
+    by the list of their children until the tree of the enclosing rule is built.
+    """
+    stack: list[Item] = [NonTerm(table.start)]
+    values: list[_Value] = []
+    while stack:
+        item = stack.pop()
+        match item:
+            case Term(name, keep):
+                t = toks.next()
+                if t.type != name:
+                    unexpectedToken(t, name)
+                if keep:
+                    values.append(t)
+            case NonTerm(name):
+                t = toks.lookahead()
+                row = table.rows[name]
+                rhs = row.get(t.type)
+                if rhs is None:
+                    unexpectedToken(t, ', '.join(sorted(row)))
+                stack.extend(reversed(rhs))
+            case Reduce(data, n, expand1, inline, nones):
+                k = len(values) - n
+                children: list[Any] = []
+                for (v, m) in zip(values[k:], nones):
+                    if m:
+                        children.extend([None] * m)
+                    if isinstance(v, list):
+                        children.extend(v)
+                    else:
+                        children.append(v)
+                if nones[-1]:
+                    children.extend([None] * nones[-1])
+                del values[k:]
+                if expand1 and len(children) == 1:
+                    values.append(children[0])
+                elif inline:
+                    values.append(children)
+                else:
+                    values.append(Tree(data, children))
+    res = values[0]
+    if isinstance(res, list):
+        raise ParseError(f'Start symbol {table.start} must not be an inlined rule')
+    match res:
+        case Token():
+            raise ParseError(f'Expected a parse tree but got a single token: {res}')
+        case _:
+            return res
+
+def _showTree(t: ParseTree, pretty: bool) -> str:
+    # Printing lark trees recurses, but the parser handles trees of any depth
+    try:
+        return t.pretty() if pretty else str(t)
+    except RecursionError:
+        return f'<tree {t.data} too deep to print>'
+
+def parseAsTree(grammarFile: str, start: str, code: str, png: Optional[str]) -> ParseTree:
+    try:
+        table = getTable(grammarFile, start)
+    except GrammarError as err:
+        raise ParseError(f'Cannot use LL(1) parser for grammar {grammarFile}: {err}')
+    lexer = mkParser('earley', grammarFile, start)
+    toks = TokenStream(lexStream(lexer, code))
+    parseTree = parseTokens(table, toks)
+    toks.ensureEof(code)
+    log.debugLazy(lambda: f'parse tree:\n{_showTree(parseTree, False)}')
+    log.debugLazy(lambda: f'parse tree (pretty):\n{_showTree(parseTree, True)}')
+    if png is not None:
+        parseTreeToPng(png, parseTree)
+    return parseTree
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        print('USAGE: python -m parsers.ll1 GRAMMAR_FILE START_SYMBOL', file=sys.stderr)
+        sys.exit(1)
+    print(showTable(getTable(sys.argv[1], sys.argv[2])))
@@ -0,0 +1,67 @@
+"""
+Benchmark for the tinyJson parser. It generates json documents and compares the
+recursive parser with the iterative parser. Only the small document can be parsed
+by the recursive parser.
+
+Usage (from the toplevel directory of the project):
+
+  scripts/bench-tinyJson [--size MB] [--depth N]
+"""
+from typing import *
+import argparse
+import random
+import sys
+import time
+import parsers.tinyJson.tinyJson_parser as tinyJson
+
+def wideObject(targetBytes: int) -> str:
+    """
+    One object with many entries, each being a small nested object.
+    """
+    entries: list[str] = []
+    size = 0
+    i = 0
+    while size < targetBytes:
+        e = f'"key{i}": {{"n": {random.randint(0, 10**6)}, "s": "v{i}", "o": {{}}}}'
+        entries.append(e)
+        size += len(e) + 2
+        i += 1
+    return '{' + ', '.join(entries) + '}'
+
+def deepObject(depth: int) -> str:
+    return '{"k": ' * depth + '1' + '}' * depth
+
+def timeParse(name: str, code: str, iterative: bool) -> Optional[float]:
+    t0 = time.perf_counter()
+    try:
+        tinyJson.parse(code, iterative)
+    except RecursionError:
+        print(f'  {name:10}: recursion limit exceeded')
+        return None
+    t = time.perf_counter() - t0
+    print(f'  {name:10}: {t:.2f}s ({len(code) / t / 1e6:.2f} MB/s)')
+    return t
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark for the tinyJson parser')
+    parser.add_argument('--size', type=float, default=4,
+                        help='Size of the wide document in MB (default: 4)')
+    parser.add_argument('--depth', type=int, default=100000,
+                        help='Nesting depth of the deep document (default: 100000)')
+    parser.add_argument('--skip-recursive', action='store_true',
+                        help='Only run the iterative parser')
+    args = parser.parse_args()
+    random.seed(0)
+    tinyJson.parse('{}') # builds the lexer
+    docs = [('small', wideObject(100000)),
+            ('wide', wideObject(int(args.size * 1e6))),
+            ('deep', deepObject(args.depth))]
+    for (name, code) in docs:
+        print(f'{name} document, {len(code) / 1e6:.2f} MB')
+        if not args.skip_recursive:
+            timeParse('recursive', code, False)
+        timeParse('iterative', code, True)
+
+if __name__ == '__main__':
+    sys.setrecursionlimit(10000)
+    main()
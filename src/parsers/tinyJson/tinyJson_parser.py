@@ -37,11 +37,66 @@ def ruleString(toks: TokenStream) -> str:
 def ruleInt(toks: TokenStream) -> int:
     return int(toks.ensureNext("INT").value)
 
-def parse(code: str) -> Json:
+def ruleJsonIterative(toks: TokenStream) -> Json:
+    """
+    Parses the same language as ruleJson, but with an explicit stack instead of recursion,
+    so there is no limit on the nesting depth. The next token always determines how to
+    continue, so there is no backtracking. Runs in time linear in the number of tokens.
+    """
+    # The objects under construction, each with the key of the entry currently parsed
+    stack: list[tuple[dict[str, Json], str]] = []
+    while True:
+        # Parse a value. For a non-empty object, push it and parse the value of its first entry.
+        t = toks.next()
+        value: Json
+        match t.type:
+            case "LBRACE":
+                if toks.lookahead().type == "RBRACE":
+                    toks.next()
+                    value = {}
+                else:
+                    key = ruleString(toks)
+                    toks.ensureNext("COLON")
+                    stack.append(({}, key))
+                    continue
+            case "STRING":
+                value = str(t.value[1:-1])
+            case "INT":
+                value = int(t.value)
+            case _:
+                unexpectedToken(t, "LBRACE, STRING or INT")
+        # Store the value in the enclosing object. If that completes the object, the object
+        # is stored in its enclosing object, and so on.
+        while True:
+            if not stack:
+                return value
+            (d, key) = stack[-1]
+            d[key] = value
+            t = toks.next()
+            if t.type == "COMMA":
+                key = ruleString(toks)
+                toks.ensureNext("COLON")
+                stack[-1] = (d, key)
+                break
+            elif t.type == "RBRACE":
+                stack.pop()
+                value = d
+            else:
+                unexpectedToken(t, "COMMA or RBRACE")
+
+def parse(code: str, iterative: bool = False) -> Json:
+    """
+    Parses code as json. With iterative=True, tokens are streamed from lexStream into
+    ruleJsonIterative, use this mode for large or deeply nested inputs.
+    """
     parser = mkLexer("./src/parsers/tinyJson/tinyJson_grammar.lark")
-    tokens = list(parser.lex(code))
-    log.info(f'Tokens: {tokens}')
-    toks = TokenStream(tokens)
-    res = ruleJson(toks)
+    if iterative:
+        toks = TokenStream(lexStream(parser, code))
+        res = ruleJsonIterative(toks)
+    else:
+        tokens = list(parser.lex(code))
+        log.infoLazy(lambda: f'Tokens: {tokens}')
+        toks = TokenStream(tokens)
+        res = ruleJson(toks)
     toks.ensureEof(code)
     return res
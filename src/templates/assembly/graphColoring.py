@@ -16,6 +16,8 @@ def colorInterfGraph(g: InterfGraph, secondaryOrder: dict[tac.ident, int]={},
     to a TACspill variable. You have to implement the "simple graph coloring algorithm"
     from slide 58 here.
 
+    - g.vertices are the variables of the interference graph, g.succs(x) are the variables
+      interfering with x.
     - Parameter maxRegs is the maximum number of registers we are allowed to use.
     - Parameter secondaryOrder is used by the tests to get deterministic results even
       if two variables have the same number of forbidden colors.
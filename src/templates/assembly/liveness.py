@@ -1,5 +1,4 @@
 from assembly.common import *
-from assembly.graph import Graph
 import assembly.tac_ast as tac
 
 def instrDef(instr: tac.instr) -> set[tac.ident]:
@@ -53,7 +52,8 @@ class InterfGraphBuilder:
         to the interference graph.
 
         You should implement the algorithm specified on the slide
-        "Computing the interference graph" (slide 50) here.
+        "Computing the interference graph" (slide 50) here. interfG.addEdge(x, y)
+        adds an undirected edge between x and y.
         """
         raise ValueError('todo')
 
@@ -62,9 +62,10 @@ class InterfGraphBuilder:
         This method builds the interference graph. It performs three steps:
 
         - Use liveness to fill the sets self.before and self.after.
-        - Setup the interference graph as an undirected graph containing all variables
-          defined or used by any instruction of any basic block. Initially, the
-          graph does not have any edges.
+        - Setup the interference graph as an InterfGraph containing all variables
+          defined or used by any instruction of any basic block. Pass the variables to
+          the constructor, or add them with addVertex(x). Initially, the graph does not
+          have any edges.
         - Use __addEdgesForInstr to fill the edges of the interference graph.
         """
         raise ValueError('todo')
@@ -5,13 +5,14 @@ import logging
 # we want to have pytest assert introspection in the helpers
 pytest.register_assert_rewrite('common.testsupport')
 
-def _logLevel():
+def _logLevel(opt: str):
     import sys
     argv = sys.argv
     n = len(argv)
     for i in range(n):
-        if argv[i] == '--log-level' and i + 1 < n:
+        if argv[i] == opt and i + 1 < n:
             return log.resolveLevelName(sys.argv[i + 1])
-    return logging.WARNING
+    return None
 
-log.init(_logLevel(), 'minipy_tests.log')
+log.init(_logLevel('--log-level') or logging.WARNING, 'minipy_tests.log',
+         _logLevel('--log-file-level'))
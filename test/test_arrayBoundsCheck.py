@@ -0,0 +1,80 @@
+import shell
+import common.utils as utils
+import common.genericParser as genericParser
+import lang_array.array_ast as array_ast
+import lang_array.array_tychecker as array_tychecker
+import lang_array.array_transform as array_transform
+import pytest
+
+pytestmark = pytest.mark.instructor
+
+def parse(src: str) -> array_ast.mod:
+    with shell.tempDir() as d:
+        srcFile = shell.pjoin(d, 'input.py')
+        utils.writeTextFile(srcFile, src)
+        return genericParser.parseFile(srcFile, array_ast)
+
+def checkCounts(src: str) -> tuple[int, int]:
+    """
+    Returns the number of bounds checks needed and eliminated for the given program.
+    """
+    # We have to import the module dynamically because it is not present in student code
+    array_boundsCheck = utils.importModuleNotInStudent('compilers.lang_array.array_boundsCheck')
+    m = parse(src)
+    array_tychecker.tycheckModule(m)
+    stmts = array_transform.transStmts(m.stmts, array_transform.Ctx())
+    return array_boundsCheck.analyzeStmts(stmts).counts()
+
+def test_innerProduct():
+    src = utils.readTextFile('test_files/lang_array/inner_product.py')
+    assert checkCounts(src) == (0, 4)
+
+def test_constIndex():
+    assert checkCounts('A = [1, 2]\nprint(A[1])\nprint(A[2])') == (1, 3)
+
+def test_repeatedIndex():
+    src = 'A = [1, 2]\ni = input_int()\nA[i] = A[i] + 1\nprint(A[i])'
+    assert checkCounts(src) == (2, 4)
+
+def test_loopBound():
+    src = '\n'.join([
+        'A = [1, 2, 3]',
+        'n = len(A)',
+        'i = 0',
+        'while i < n:',
+        '    print(A[i])',
+        '    i = i + 1',
+        'print(A[i])'
+    ])
+    assert checkCounts(src) == (1, 3)
+
+def test_noEliminationAfterReassign():
+    src = '\n'.join([
+        'A = [1, 2, 3]',
+        'i = 0',
+        'while i != len(A):',
+        '    i = i + 1',
+        '    print(A[i])',
+    ])
+    assert checkCounts(src) == (1, 1)
+
+def test_noEliminationForDecrement():
+    src = '\n'.join([
+        'A = [1, 2, 3]',
+        'i = 2',
+        'while i != len(A):',
+        '    print(A[i])',
+        '    i = i - 1',
+    ])
+    assert checkCounts(src) == (2, 0)
+
+def test_noNonNegAfterOverflow():
+    src = '\n'.join([
+        'y = input_int()',
+        'a = [10, 20, 30]',
+        'if y >= 0:',
+        '    x = y + 1',
+        '    if x < len(a):',
+        '        print(a[x])',
+    ])
+    assert checkCounts(src) == (2, 0)
@@ -0,0 +1,74 @@
+import shell
+import common.utils as utils
+import common.genericParser as genericParser
+import lang_array.array_ast as array_ast
+from common.compilerSupport import CompilerConfig
+from common.sexp import renderSExpFast
+from common.wasm import *
+import pytest
+
+pytestmark = pytest.mark.instructor
+
+def compile(src: str) -> WasmModule:
+    # We have to import the module dynamically because it is not present in student code
+    array_compiler = utils.importModuleNotInStudent('compilers.lang_array.array_compiler')
+    with shell.tempDir() as d:
+        srcFile = shell.pjoin(d, 'input.py')
+        utils.writeTextFile(srcFile, src)
+        m = genericParser.parseFile(srcFile, array_ast)
+    cfg = CompilerConfig(CompilerConfig.defaultMaxMemSize, CompilerConfig.defaultMaxArraySize)
+    return array_compiler.compileModule(m, cfg)
+
+def mainCode(m: WasmModule) -> str:
+    return renderSExpFast(m.funcs[0].render())
+
+def test_arrayInitDynWithoutLoop():
+    code = mainCode(compile('n = input_int()\nA = n * [0]\nB = n * [True]\nprint(A[0])'))
+    assert code.count('memory.fill') == 1
+    assert code.count('memory.copy') == 1
+    # The only loop is the one doubling the initialized part of B
+    assert code.count('loop') == 1
+
+def test_arrayInitStaticFromData():
+    m = compile('A = [1, 2]\nB = [1, 2]\nC = [True]\nprint(A[0] + B[1])\nprint(C[0])')
+    passive = [d for d in m.data if d.start is None]
+    assert [d.contentBytes() for d in passive] == \
+        [b'\x01\x00\x00\x00\x00\x00\x00\x00\x02\x00\x00\x00\x00\x00\x00\x00',
+         b'\x01\x00\x00\x00']
+    assert mainCode(m).count('memory.init') == 3
+
+def test_arrayInitStaticWithVariables():
+    m = compile('x = input_int()\nA = [1, x]\nprint(A[0])')
+    assert [d for d in m.data if d.start is None] == []
+    assert 'memory.init' not in mainCode(m)
+
+def test_arrayVarsAreRoots():
+    m = compile('A = [1]\nx = 1\nB = [A, A]\nprint(B[x][0])')
+    globalIds = [g.id.id for g in m.globals]
+    assert '$@root_A' in globalIds
+    assert '$@root_B' in globalIds
+    assert '$@root_x' not in globalIds
+    code = mainCode(m)
+    assert code.count('global.set $@root_A') == 1
+    assert code.count('call $@alloc') == 2
+    assert '$@free_ptr' not in code
+
+def test_leftOperandIsRoot():
+    code = mainCode(compile('print([1] is [1])'))
+    assert code.count('global.set $@root_tmp') == 1
+
+def test_memoryStartsSmall():
+    [memory] = [i.desc for i in compile('A = [1]').imports if isinstance(i.desc, WasmImportMemory)]
+    assert memory == WasmImportMemory(1, CompilerConfig.defaultMaxMemSize)
+
+def test_sharedErrorFunctions():
+    m = compile('A = [1, 2]\ni = input_int()\nprint(A[i])\nprint(A[i + 1])')
+    [main, *otherFuncs] = m.funcs
+    errorFuncs = [f for f in otherFuncs if f.id.id.startswith('$@error_')]
+    code = renderSExpFast(main.render())
+    assert '$print_err' not in code
+    # One unsigned comparison per access checks both bounds
+    assert code.count('i64.le_u') == 2
+    assert code.count('$@error_IndexError') == 2
+    assert [f.id.id for f in errorFuncs] == ['$@error_ArraySizeError', '$@error_IndexError',
+                                            '$@error_MemoryError']
@@ -0,0 +1,68 @@
+import os
+import shell
+import common.utils as utils
+import common.genericCompiler as genCompiler
+from common.artifactCache import *
+from common.wasm import *
+from typing import Any
+
+def test_putGet():
+    with shell.tempDir() as d:
+        cache = ArtifactCache(shell.pjoin(d, 'cache'))
+        k1 = mkKey('a', 'b')
+        assert k1 != mkKey('ab')
+        assert cache.getText(k1) is None
+        cache.putText(k1, 'hello')
+        assert cache.getText(k1) == 'hello'
+        dest = shell.pjoin(d, 'out.txt')
+        assert cache.get(k1, dest)
+        assert utils.readTextFile(dest) == 'hello'
+        assert not cache.get(mkKey('x'), dest)
+
+def test_lruEviction():
+    with shell.tempDir() as d:
+        cache = ArtifactCache(shell.pjoin(d, 'cache'), maxSize=25)
+        keys = [mkKey(str(i)) for i in range(3)]
+        cache.putText(keys[0], 10 * '0')
+        cache.putText(keys[1], 10 * '1')
+        # make sure keys[0] is the most recently used artifact
+        os.utime(cache.artifactPath(keys[1]), (0, 0))
+        assert cache.getText(keys[0]) is not None
+        cache.putText(keys[2], 10 * '2')
+        assert cache.getText(keys[0]) is not None
+        assert cache.getText(keys[1]) is None
+        assert cache.getText(keys[2]) is not None
+
+def test_compileMainCached():
+    calls: list[Any] = []
+    def compileFun(m: Any, cfg: Any) -> WasmModule:
+        calls.append(m)
+        return WasmModule([], [], [], [], WasmFuncTable([]),
+                          [WasmFunc(WasmId('$main'), [], None, [], [])])
+    import lang_var.var_ast as var_ast
+    with shell.tempDir() as d:
+        src = shell.pjoin(d, 'input.py')
+        utils.writeTextFile(src, 'print(1)')
+        out = shell.pjoin(d, 'out.wasm')
+        args = genCompiler.Args(src, out, cacheDir=shell.pjoin(d, 'cache'))
+        genCompiler.compileMainCached(args, compileFun, var_ast)
+        first = shell.readBinaryFile(out)
+        os.remove(out)
+        genCompiler.compileMainCached(args, compileFun, var_ast)
+        assert len(calls) == 1
+        assert shell.readBinaryFile(out) == first
+        utils.writeTextFile(src, 'print(2)')
+        genCompiler.compileMainCached(args, compileFun, var_ast)
+        assert len(calls) == 2
+
+def test_hashDirCoversAllFiles():
+    with shell.tempDir() as d:
+        utils.writeTextFile(shell.pjoin(d, 'compiler.py'), 'x = 1')
+        utils.writeTextFile(shell.pjoin(d, 'grammar.lark'), 'start: "a"')
+        h = genCompiler.hashDir(d)
+        shell.mkdir(shell.pjoin(d, '__pycache__'))
+        utils.writeTextFile(shell.pjoin(d, '__pycache__', 'compiler.cpython-312.pyc'), 'junk')
+        utils.writeTextFile(shell.pjoin(d, 'minipy.log'), 'log')
+        assert genCompiler.hashDir(d) == h
+        utils.writeTextFile(shell.pjoin(d, 'grammar.lark'), 'start: "b"')
+        assert genCompiler.hashDir(d) != h
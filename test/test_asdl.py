@@ -3,3 +3,17 @@ from typing import *
 
 def test_asdl():
     shell.run(f'make all > /dev/null')
+
+def test_identInterning():
+    import pickle
+    import assembly.tac_ast as tac
+    import lang_var.var_ast as var
+    from common.wasm import WasmId
+    x = tac.Ident('x')
+    assert x is tac.Ident('x')
+    assert x == tac.Ident('x') and hash(x) == hash(tac.Ident('x'))
+    assert x != tac.Ident('y')
+    assert x != var.Ident('x')
+    assert pickle.loads(pickle.dumps(x)) is x
+    assert WasmId('$x') is WasmId('$x')
+    assert WasmId('$x') != WasmId('$y')
@@ -0,0 +1,44 @@
+import pytest
+import assembly.tacSpill_ast as tacSpill
+import assembly.mips_ast as mips
+from assembly.assignSelector import assignToMips
+from assembly.tacSpillToMips import resolveAssignSelector
+
+s0 = tacSpill.Ident('$s0')
+s1 = tacSpill.Ident('$s1')
+s2 = tacSpill.Ident('$s2')
+t2 = mips.Reg('$t2')
+
+def r(x: tacSpill.Ident) -> mips.Reg:
+    return mips.Reg(x.name)
+
+def binOp(left: tacSpill.prim, op: str, right: tacSpill.prim) -> tacSpill.Assign:
+    return tacSpill.Assign(s0, tacSpill.BinOp(left, tacSpill.Op(op), right))
+
+def test_assignPrim():
+    assert assignToMips(tacSpill.Assign(s0, tacSpill.Prim(tacSpill.Const(42)))) == \
+        [mips.LoadI(r(s0), mips.Imm(42))]
+    assert assignToMips(tacSpill.Assign(s0, tacSpill.Prim(tacSpill.Name(s1)))) == \
+        [mips.Move(r(s0), r(s1))]
+
+def test_assignBinOp():
+    assert assignToMips(binOp(tacSpill.Name(s1), 'SUB', tacSpill.Name(s2))) == \
+        [mips.Op(mips.Sub(), r(s0), r(s1), r(s2))]
+    assert assignToMips(binOp(tacSpill.Name(s1), 'ADD', tacSpill.Const(1))) == \
+        [mips.OpI(mips.AddI(), r(s0), r(s1), mips.Imm(1))]
+    assert assignToMips(binOp(tacSpill.Name(s1), 'MUL', tacSpill.Const(3))) == \
+        [mips.LoadI(t2, mips.Imm(3)), mips.Op(mips.Mul(), r(s0), r(s1), t2)]
+    assert assignToMips(binOp(tacSpill.Const(3), 'GE_S', tacSpill.Name(s1))) == \
+        [mips.LoadI(t2, mips.Imm(3)), mips.Op(mips.GreaterEq(), r(s0), t2, r(s1))]
+    assert assignToMips(binOp(tacSpill.Const(3), 'EQ', tacSpill.Const(4))) == \
+        [mips.LoadI(t2, mips.Imm(3)), mips.LoadI(r(s0), mips.Imm(4)),
+         mips.Op(mips.Eq(), r(s0), t2, r(s0))]
+
+def test_unknownOperator():
+    with pytest.raises(ValueError):
+        assignToMips(binOp(tacSpill.Name(s1), 'DIV_S', tacSpill.Name(s2)))
+
+def test_resolveAssignSelector():
+    assert resolveAssignSelector('table') is assignToMips
+    with pytest.raises(ValueError):
+        resolveAssignSelector('nope')
@@ -0,0 +1,19 @@
+import os
+import common.constants as constants
+from common.batchTestDriver import *
+import pytest
+
+pytestmark = pytest.mark.instructor
+
+def test_compileJob(tmp_path: str):
+    out = os.path.join(tmp_path, 'add.wasm')
+    res = compileJob(CompileJob('var', 'test_files/lang_var/add.py', out, None))
+    assert res.exitcode == 0
+    with open(out, 'rb') as f:
+        assert f.read(4) == b'\x00asm'
+
+def test_compileJobError(tmp_path: str):
+    out = os.path.join(tmp_path, 'big-int.wasm')
+    res = compileJob(CompileJob('var', 'test_files/lang_var/big-int.py', out, None))
+    assert res.exitcode == constants.COMPILE_ERROR_EXIT_CODE
+    assert res.stderr.startswith('Compile error:')
@@ -0,0 +1,46 @@
+import shell
+import subprocess
+import time
+import common.constants as constants
+import pytest
+
+pytestmark = pytest.mark.instructor
+
+def startServer(socketPath: str) -> subprocess.Popen[bytes]:
+    p = subprocess.Popen(['python', 'src/main.py', 'serve', '--socket', socketPath])
+    for _ in range(100):
+        if shell.exists(socketPath):
+            return p
+        time.sleep(0.1)
+    p.kill()
+    raise Exception(f'Compile server did not create socket {socketPath}')
+
+def runClient(socketPath: str, args: list[str], input: str|None = None) -> shell.RunResult:
+    return shell.run(['python', 'src/client.py', '--socket', socketPath] + args,
+                     captureStdout=True, captureStderr=True, input=input, onError='ignore')
+
+def test_compileServer():
+    with shell.tempDir() as d:
+        socketPath = shell.pjoin(d, 'server.sock')
+        p = startServer(socketPath)
+        try:
+            res = runClient(socketPath, ['--lang=loop', 'interp', 'test_files/lang_loop/factorial.py'],
+                            input='5')
+            assert res.exitcode == 0
+            assert res.stdout.strip().endswith('120')
+            res = runClient(socketPath, ['compile', '--output', shell.pjoin(d, 'out.wasm'),
+                                         'test_files/lang_var/big-int.py'])
+            assert res.exitcode == constants.COMPILE_ERROR_EXIT_CODE
+            assert 'int constant too large' in res.stderr
+            res = runClient(socketPath, ['compile', '--output', shell.pjoin(d, 'out.wasm'),
+                                         'test_files/lang_var/add.py'])
+            assert res.exitcode == 0
+            assert shell.isFile(shell.pjoin(d, 'out.wasm'))
+            res = runClient(socketPath, ['serve', '--socket', shell.pjoin(d, 'nested.sock')])
+            assert res.exitcode == 1
+            assert 'Cannot start a compile server' in res.stderr
+            assert not shell.exists(shell.pjoin(d, 'nested.sock'))
+        finally:
+            p.terminate()
+            p.wait()
+        assert not shell.exists(socketPath)
@@ -0,0 +1,27 @@
+import assembly.tac_ast as tac
+import assembly.controlFlow as controlFlow
+
+def assign(x: str, n: int) -> tac.instr:
+    return tac.Assign(tac.Ident(x), tac.Prim(tac.Const(n)))
+
+def test_buildControlFlowGraph():
+    instrs: list[tac.instr] = [
+        assign('x', 1),
+        tac.Label('start'),
+        tac.GotoIf(tac.Name(tac.Ident('x')), 'end'),
+        assign('x', 0),
+        tac.Goto('start'),
+        tac.Label('end'),
+        tac.Label('end2'),
+    ]
+    g = controlFlow.buildControlFlowGraph(instrs)
+    blocks = [(bb.labels, len(bb.instrs)) for bb in g.values]
+    assert blocks == [([], 1), (['start'], 1), ([], 2), (['end', 'end2'], 0)]
+    assert sorted(g.succs(1)) == [2, 3]
+    assert sorted(g.preds(1)) == [0, 2]
+    assert g.preds(3) == [1]
+    assert g.preds(0) == []
+
+def test_buildControlFlowGraphEmpty():
+    g = controlFlow.buildControlFlowGraph([])
+    assert list(g.vertices) == []
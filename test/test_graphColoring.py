@@ -1,5 +1,4 @@
 from assembly.common import InterfGraph
-from assembly.graph import Graph
 import assembly.tac_ast as tac
 import assembly.tacSpill_ast as tacSpill
 import common.utils as utils
@@ -13,9 +12,7 @@ def graphColoringTester(vars: list[str],
                    maxRegs: int=4):
     # We have to import this module dynamically because it is not present in student code
     graphColoring = utils.importModuleNotInStudent('compilers.assembly.graphColoring')
-    g: InterfGraph = Graph('undirected')
-    for x in vars:
-        g.addVertex(tac.Ident(x), None)
+    g = InterfGraph([tac.Ident(x) for x in vars])
     for x,y in deps:
         g.addEdge(tac.Ident(x), tac.Ident(y))
     secondaryOrder = dict([(tac.Ident(x), i) for i, x in enumerate(reversed(vars))])
@@ -0,0 +1,28 @@
+import assembly.tac_ast as tac
+from assembly.interfGraph import InterfGraph
+
+def test_interfGraph():
+    xs = [tac.Ident(f'x{i}') for i in range(20)]
+    g = InterfGraph(xs)
+    g.addEdge(xs[0], xs[1])
+    g.addEdge(xs[1], xs[0])
+    g.addEdge(xs[19], xs[3])
+    g.addEdge(xs[5], xs[5])
+    assert g.interferes(xs[1], xs[0])
+    assert g.interferes(xs[3], xs[19])
+    assert not g.interferes(xs[3], xs[18])
+    assert not g.interferes(xs[5], xs[5])
+    assert g.succs(xs[1]) == [xs[0]]
+    assert sorted(g.adjIds(3)) == [19]
+    assert len(g.edges) == 4
+
+def test_interfGraphAddVertexLater():
+    x = tac.Ident('x')
+    g = InterfGraph([x])
+    ys = [tac.Ident(f'y{i}') for i in range(10)]
+    for y in ys:
+        g.addVertex(y)
+        g.addEdge(x, y)
+    assert all(g.interferes(y, x) for y in ys)
+    assert not g.interferes(ys[0], ys[1])
+    assert g.vertexId(ys[9]) == 10
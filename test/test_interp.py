@@ -3,8 +3,8 @@ import common.testsupport as testsupport
 import common.log as log
 import pytest
 
-def runTest(lang: str, srcFile: str, input: str|None):
-    cmd = ['timeout', '10s', 'python', 'src/main.py', f'--lang={lang}', 'interp', srcFile]
+def runTest(lang: str, srcFile: str, input: str|None, extraArgs: list[str]=[]):
+    cmd = ['timeout', '10s', 'python', 'src/main.py', f'--lang={lang}', 'interp'] + extraArgs + [srcFile]
     log.info(f'Running command {" ".join(cmd)}')
     res = shell.run(cmd, input=input, captureStdout=True, captureStderr=True, onError='ignore')
     return res
@@ -17,3 +17,20 @@ def test_interp(lang: str, srcFile: str):
         errorMode='lenient'
     )
 
+
+@pytest.mark.parametrize("lang, srcFile", testsupport.collectTestFiles(langOnly=['fun']))
+def test_interpBytecode(lang: str, srcFile: str):
+    testsupport.runFileTest(
+        srcFile,
+        lambda captureErr, input, _extraArgs: runTest(lang, srcFile, input, ['--bytecode']),
+        errorMode='lenient'
+    )
+
+@pytest.mark.parametrize("lang, srcFile",
+                         testsupport.collectTestFiles(langOnly=['var', 'loop', 'array']))
+def test_interpFlat(lang: str, srcFile: str):
+    testsupport.runFileTest(
+        srcFile,
+        lambda captureErr, input, _extraArgs: runTest(lang, srcFile, input, ['--flat']),
+        errorMode='lenient'
+    )
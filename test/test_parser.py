@@ -6,6 +6,10 @@ import parsers.common as p
 from common.constants import *
 import pytest
 import common.log as log
+import os
+import shutil
+import dataclasses
+from typing import *
 
 simpleExp = '1 + 2 + 3 * 4'
 
@@ -47,3 +51,61 @@ def test_simpleAlternativeRecAscParserManual():
                                    ast.Add(),
                                    ast.BinOp(ast.IntConst(3), ast.Mul(), ast.IntConst(value=4))))
     assert t == expected
+
+def test_mkParserCache(tmp_path: Any):
+    grammarFile = str(tmp_path / 'grammar.lark')
+    shutil.copy('./src/parsers/lang_simple/simple_grammar.lark', grammarFile)
+    p1 = p.mkParser('lalr', grammarFile, 'exp')
+    assert p.mkParser('lalr', grammarFile, 'exp') is p1
+    assert p.mkParser('earley', grammarFile, 'exp') is not p1
+    st = os.stat(grammarFile)
+    os.utime(grammarFile, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    assert p.mkParser('lalr', grammarFile, 'exp') is not p1
+
+@pytest.mark.parametrize("s", simpleExps())
+def test_simpleParserLL1(s: str):
+    t1 = simpleParser.parse(p.ParserArgs(s, 'lalr', None, None))
+    t2 = simpleParser.parse(p.ParserArgs(s, 'll1', None, None))
+    assert t1 == t2
+
+def test_simpleParserLL1Long():
+    # the parser does not recurse, comparing deep trees does
+    s = ' + '.join(['(1 * 2)'] * 5000)
+    t = p.parseAsTree(p.ParserArgs(s, 'll1', None, None), simpleParser.grammarFile, 'exp')
+    assert len(list(t.find_data('add_exp'))) == 4999
+    assert len(list(t.find_data('mul_exp'))) == 5000
+    s = ' + '.join(['(1 * 2)'] * 200)
+    args = p.ParserArgs(s, 'll1', None, None)
+    assert p.parseAsTree(args, simpleParser.grammarFile, 'exp') == \
+        p.parseAsTree(dataclasses.replace(args, parseAlg='lalr'), simpleParser.grammarFile, 'exp')
+
+def test_ll1NotLL1():
+    with pytest.raises(p.ParseError):
+        p.parseAsTree(p.ParserArgs('1 + 2', 'll1', None, None),
+                      './src/parsers/lang_simple/simple_grammar_ambiguous.lark', 'exp')
+
+optionalGrammar = r'''
+%import common.WS
+%ignore WS
+INT: /[0-9]+/
+NAME: /[a-z]+/
+?start: decl
+decl: [NAME] "let" NAME type init ";"
+type: [":" NAME]
+init: ["=" exp]
+?exp: exp "+" atom -> add_exp
+    | atom
+atom: INT | "(" exp ")"
+'''
+
+@pytest.mark.parametrize("s", ['let x;', 'let x = 1;', 'pub let x: t = 1 + (2 + 3);'])
+def test_ll1Placeholders(s: str, tmp_path: str):
+    grammarFile = os.path.join(tmp_path, 'optional.lark')
+    with open(grammarFile, 'w') as f:
+        f.write(optionalGrammar)
+    args = p.ParserArgs(s, 'll1', None, grammarFile)
+    t = p.parseAsTree(args, grammarFile, 'start')
+    assert t == p.parseAsTree(dataclasses.replace(args, parseAlg='lalr'), grammarFile, 'start')
+    if s == 'let x;':
+        # missing [x] items are None, as with lark
+        assert [None in st.children for st in t.iter_subtrees_topdown()] == [True, True, True]
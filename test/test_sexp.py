@@ -0,0 +1,43 @@
+from common.sexp import *
+from common.wasm import *
+
+def sampleModule() -> WasmModule:
+    idMain = WasmId('$main')
+    x = WasmId('$x')
+    exit = WasmId('$loop_exit')
+    start = WasmId('$loop_start')
+    loop: list[WasmInstr] = [
+        WasmInstrVarLocal('get', x),
+        WasmInstrConst('i64', 0),
+        WasmInstrIntRelOp('i64', 'gt_s'),
+        WasmInstrIf(None, [], [WasmInstrBranch(exit, False)]),
+        WasmInstrVarLocal('get', x),
+        WasmInstrCall(WasmId('$print_i64')),
+        WasmInstrVarLocal('get', x),
+        WasmInstrConst('i64', 1),
+        WasmInstrNumBinOp('i64', 'sub'),
+        WasmInstrVarLocal('set', x),
+        WasmInstrBranch(start, False)
+    ]
+    instrs: list[WasmInstr] = [
+        WasmInstrConst('i64', 3),
+        WasmInstrVarLocal('set', x),
+        WasmInstrBlock(exit, None, [WasmInstrLoop(start, loop)])
+    ]
+    return WasmModule(
+        imports=[WasmImport('env', 'print_i64', WasmImportFunc(WasmId('$print_i64'), ['i64'], None))],
+        exports=[WasmExport('main', WasmExportFunc(idMain))],
+        globals=[],
+        data=[WasmData(0, 'IndexError')],
+        funcTable=WasmFuncTable([]),
+        funcs=[WasmFunc(idMain, [], None, [(x, 'i64')], instrs)])
+
+def test_writeSExpSameTokens():
+    s = sampleModule().render()
+    assert renderSExpFast(s).split() == renderSExp(s).split()
+
+def test_writeSExpLayout():
+    s = SExpBlock.singleItem('block', [SExpId('$l'), mkNamedSeq('br', SExpId('$l'))])
+    assert renderSExpFast(mkNamedSeq('func', SExpId('$f'), s)) == \
+        '(func $f\n  block $l\n    (br $l)\n  end)\n'
+    assert renderSExpFast(mkNamedSeq('param', SExpId('i32'), SExpId('i64'))) == '(param i32 i64)\n'
@@ -3,6 +3,10 @@ import pytest
 import common.testsupport as testsupport
 import common.log as log
 import shell
+import contextlib
+import io
+import assembly.tac_ast as tac
+import assembly.tacInterp as tacInterp
 
 pytestmark = pytest.mark.instructor
 
@@ -24,3 +28,40 @@ def test_tacInterp(lang: str, srcFile: str, tmp_path: str):
             runTest(lang, srcFile, tmp_path, captureErr, input, extraArgs)
     )
 
+
+def interp(instrs: list[tac.instr]) -> str:
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        tacInterp.interpInstrs(instrs)
+    return out.getvalue()
+
+def printConst(n: int) -> tac.instr:
+    return tac.Call(None, tac.Ident('$print_i64'), [tac.Const(n)])
+
+def test_firstLabelWins():
+    instrs: list[tac.instr] = [
+        tac.Goto('L'),
+        tac.Label('L'),
+        printConst(1),
+        tac.Goto('end'),
+        tac.Label('L'),
+        printConst(2),
+        tac.Label('end')
+    ]
+    assert interp(instrs) == '1\n'
+
+def test_errorsOnlyWhenReached():
+    x = tac.Ident('x')
+    instrs: list[tac.instr] = [
+        tac.GotoIf(tac.Const(0), 'missing'),
+        tac.Goto('skip'),
+        tac.Goto('missing'),
+        tac.Assign(x, tac.BinOp(tac.Const(1), tac.Op('DIV'), tac.Const(1))),
+        tac.Label('skip'),
+        printConst(3)
+    ]
+    assert interp(instrs) == '3\n'
+    with pytest.raises(ValueError, match='Label missing not found'):
+        interp([tac.Goto('missing')])
+    with pytest.raises(ValueError, match='Unhandled operator: DIV'):
+        interp(instrs[3:4])
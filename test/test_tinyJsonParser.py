@@ -12,9 +12,10 @@ type Json = str | int | dict[str, Json]
 
 def parseTest(src: str, expected: Json):
     m = importModTinyJsonParser()
-    res = m.parse(src)
-    if res != expected:
-        pytest.fail(f'Parsing {src} returned {res}, expected {expected}')
+    for iterative in [False, True]:
+        res = m.parse(src, iterative)
+        if res != expected:
+            pytest.fail(f'Parsing {src} returned {res}, expected {expected} (iterative={iterative})')
 
 def test_simple():
     parseTest('1', 1)
@@ -29,3 +30,21 @@ def test_object():
 def test_nestedObject():
     parseTest('{"k1": {}}', {'k1': {}})
     parseTest('{"k1": {"k1": 1, "k2": "foo"}}', {'k1': {'k1': 1, 'k2': 'foo'}})
+
+def test_iterativeLarge():
+    m = importModTinyJsonParser()
+    n = 20000
+    src = '{' + ', '.join(f'"k{i}": {{"x": {i}}}' for i in range(n)) + '}'
+    assert m.parse(src, True) == {f'k{i}': {'x': i} for i in range(n)}
+    depth = 20000
+    res = m.parse('{"k": ' * depth + '"v"' + '}' * depth, True)
+    for _ in range(depth):
+        assert isinstance(res, dict)
+        res = res['k']
+    assert res == 'v'
+
+@pytest.mark.parametrize('src', ['{', '{"k1": 1,}', '{"k1" 1}', '{1: 2}', '{"k": 1} 2', '}', ''])
+def test_iterativeError(src: str):
+    m = importModTinyJsonParser()
+    with pytest.raises(m.ParseError):
+        m.parse(src, True)
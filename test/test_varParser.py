@@ -45,3 +45,12 @@ def test_parseError():
     with pytest.raises(p.ParseError) as err:
         parseModule(args)
     assert "Unexpected token Token('RPAR', ')') at line 1, column 9" in str(err)
+
+def test_parseAsTreeRemovesNewlines():
+    code = '\nx = 1\n\nprint(x + 2)\n'
+    t = p.parseAsTree(p.ParserArgs(code, 'lalr', None, None),
+                      './src/parsers/lang_var/var_grammar.lark', 'lvar')
+    newlines = [tok for tok in t.scan_values(lambda v: isinstance(v, p.Token))
+                if tok.type == 'NEWLINE']
+    assert newlines == []
+    assert [c.data for c in t.children if isinstance(c, p.Tree)] == ['assign_stmt', 'exp_stmt']
@@ -0,0 +1,123 @@
+import pytest
+from common.wasm import *
+from common.wasmBinary import *
+
+def test_uleb128():
+    assert uleb128(0) == b'\x00'
+    assert uleb128(127) == b'\x7f'
+    assert uleb128(128) == b'\x80\x01'
+    assert uleb128(624485) == b'\xe5\x8e\x26'
+
+def test_sleb128():
+    assert sleb128(0) == b'\x00'
+    assert sleb128(-1) == b'\x7f'
+    assert sleb128(63) == b'\x3f'
+    assert sleb128(64) == b'\xc0\x00'
+    assert sleb128(-64) == b'\x40'
+    assert sleb128(-123456) == b'\xc0\xbb\x78'
+
+def test_toSigned():
+    assert toSigned(2**64 - 1, 64) == -1
+    assert toSigned(42, 32) == 42
+    assert toSigned(2**31, 32) == -2**31
+
+def mkModule(instrs: list[WasmInstr], locals: list[tuple[WasmId, WasmValtype]] = [],
+             data: list[WasmData] = []) -> WasmModule:
+    idMain = WasmId('$main')
+    return WasmModule(
+        imports=[WasmImport('env', 'print_i64', WasmImportFunc(WasmId('$print_i64'), ['i64'], None))],
+        exports=[WasmExport('main', WasmExportFunc(idMain))],
+        globals=[],
+        data=data,
+        funcTable=WasmFuncTable([]),
+        funcs=[WasmFunc(idMain, [], None, locals, instrs)])
+
+def sections(m: WasmModule) -> list[tuple[int, bytes]]:
+    b = encodeModule(m)
+    assert b[:8] == MAGIC + VERSION
+    res: list[tuple[int, bytes]] = []
+    i = 8
+    while i < len(b):
+        id = b[i]
+        size = b[i + 1] # all sections in these tests are smaller than 128 bytes
+        res.append((id, b[i + 2:i + 2 + size]))
+        i += 2 + size
+    return res
+
+def codeSection(m: WasmModule) -> bytes:
+    for (id, content) in sections(m):
+        if id == SECTION_CODE:
+            return content
+    raise ValueError('No code section')
+
+def test_encodeEmptyFunc():
+    # one function body of size 2: no locals, end
+    assert codeSection(mkModule([])) == b'\x01\x02\x00\x0b'
+
+def test_encodeLocalsAndCall():
+    x = WasmId('$x')
+    instrs: list[WasmInstr] = [
+        WasmInstrConst('i64', 42),
+        WasmInstrVarLocal('set', x),
+        WasmInstrVarLocal('get', x),
+        WasmInstrCall(WasmId('$print_i64'))
+    ]
+    body = b'\x01\x01\x7e' + b'\x42\x2a' + b'\x21\x00' + b'\x20\x00' + b'\x10\x00' + b'\x0b'
+    assert codeSection(mkModule(instrs, [(x, 'i64')])) == bytes([1, len(body)]) + body
+
+def test_encodeBranchDepth():
+    exit = WasmId('$exit')
+    start = WasmId('$start')
+    instrs: list[WasmInstr] = [
+        WasmInstrBlock(exit, None, [
+            WasmInstrLoop(start, [
+                WasmInstrConst('i32', 1),
+                WasmInstrIf(None, [WasmInstrBranch(exit, False)], []),
+                WasmInstrBranch(start, False)
+            ])
+        ])
+    ]
+    body = b'\x00' + b'\x02\x40' + b'\x03\x40' + b'\x41\x01' + \
+        b'\x04\x40' + b'\x0c\x02' + b'\x0b' + b'\x0c\x00' + b'\x0b' + b'\x0b' + b'\x0b'
+    assert codeSection(mkModule(instrs)) == bytes([1, len(body)]) + body
+
+def test_encodeBulkMemory():
+    seg = WasmId('$seg')
+    data = [WasmData(0, 'err'), WasmData(None, b'\x01\x02', seg)]
+    instrs: list[WasmInstr] = [
+        WasmInstrConst('i32', 0), WasmInstrConst('i32', 0), WasmInstrConst('i32', 2),
+        WasmInstrMemInit(seg),
+        WasmInstrConst('i32', 0), WasmInstrConst('i32', 0), WasmInstrConst('i32', 2),
+        WasmInstrMemCopy(),
+        WasmInstrConst('i32', 0), WasmInstrConst('i32', 0), WasmInstrConst('i32', 2),
+        WasmInstrMemFill()
+    ]
+    args = b'\x41\x00\x41\x00\x41\x02'
+    body = b'\x00' + args + b'\xfc\x08\x01\x00' + args + b'\xfc\x0a\x00\x00' + \
+        args + b'\xfc\x0b\x00' + b'\x0b'
+    m = mkModule(instrs, data=data)
+    secs = sections(m)
+    ids = [id for (id, _) in secs]
+    # the data count section comes right before the code section
+    assert ids[ids.index(SECTION_CODE) - 1] == SECTION_DATA_COUNT
+    assert dict(secs)[SECTION_DATA_COUNT] == b'\x02'
+    assert dict(secs)[SECTION_DATA] == b'\x02' + b'\x00\x41\x00\x0b\x03err' + b'\x01\x02\x01\x02'
+    assert codeSection(m) == bytes([1, len(body)]) + body
+
+def test_encodeNoDataCountWithoutPassiveData():
+    ids = [id for (id, _) in sections(mkModule([], data=[WasmData(0, 'err')]))]
+    assert SECTION_DATA_COUNT not in ids
+
+def test_encodeMemGrow():
+    instrs: list[WasmInstr] = [
+        WasmInstrMemSize(),
+        WasmInstrMemGrow(),
+        WasmInstrDrop()
+    ]
+    body = b'\x00' + b'\x3f\x00' + b'\x40\x00' + b'\x1a' + b'\x0b'
+    assert codeSection(mkModule(instrs)) == bytes([1, len(body)]) + body
+
+def test_encodeUnknownInstr():
+    instr = WasmInstrConst(cast(WasmValtype, 'v128'), 0)
+    with pytest.raises(ValueError, match='cannot encode'):
+        encodeModule(mkModule([instr]))
@@ -0,0 +1,9 @@
+# Allocates much more than the 64kB of memory in total, but little is live at any time
+total = 0
+i = 0
+while i < 40:
+    a = 3000 * [i]
+    b = [a, 2 * [i + 1]]
+    total = total + b[0][2999] + b[1][1]
+    i = i + 1
+print(total)
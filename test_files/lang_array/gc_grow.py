@@ -0,0 +1,14 @@
+# The live arrays need more than 64kB, so the memory must grow after a collection
+n = 40
+live = n * [[0]]
+i = 0
+while i < n:
+    tmp = 500 * [i]
+    live[i] = 250 * [tmp[499]]
+    i = i + 1
+total = 0
+i = 0
+while i < n:
+    total = total + live[i][249]
+    i = i + 1
+print(total)
@@ -0,0 +1,10 @@
+### run error: MemoryError
+# The live arrays need more than the 64kB of memory, collecting does not help
+n = 40
+live = n * [[0]]
+i = 0
+while i < n:
+    tmp = 500 * [i]
+    live[i] = 250 * [tmp[499]]
+    i = i + 1
+print(live[n - 1][249])
@@ -0,0 +1,8 @@
+### run error: IndexError
+# y + 1 wraps around, so x might be negative even though y >= 0
+y = input_int()
+a = [10, 20, 30]
+if y >= 0:
+    x = y + 1
+    if x < len(a):
+        print(a[x])